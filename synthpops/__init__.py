@@ -2,14 +2,17 @@ from .version import __version__, __versiondate__
 from .defaults import *
 from .base import *  # depends on defaults
 from .config import *  # depends on defaults, version
+from .profiling import *  # depends on config, version
 from .data import *  # depends on defaults, config
 from .sampling import *  # depends on base
 from .data_distributions import *  # depends on defaults, base, config, data
-from .households import * # depends on base, sampling, data_distributions
-from .ltcfs import *  # depends on base, sampling, data_distributions, households
+from .households import * # depends on base, sampling, data_distributions, arrays
+from .ltcfs import *  # depends on base, sampling, data_distributions, households, arrays
 from .schools import *  # depends on defaults, base, sampling, data_distributions
-from .workplaces import *  # depends on defaults, base, sampling
+from .workplaces import *  # depends on defaults, base, sampling, arrays
 from .contact_networks import *  # depends on config, data_distributions, schools
-from .pop import *  # depends on version, defaults, base, config, sampling, data_distributions, households, ltcfs, schools, workplaces, contact_networks, plotting
+from .arrays import *  # depends on config, defaults
+from .sharding import *  # depends on arrays
+from .pop import *  # depends on version, defaults, base, config, sampling, data_distributions, households, ltcfs, schools, workplaces, contact_networks, arrays, sharding, plotting
 from .plotting import * # depends on pop et. al (pop and plotting depend on each other but pop simply redirects to methods housed in plotting whereas plotting actually uses more from pop)
 logger.debug('Finished imports')
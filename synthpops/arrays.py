@@ -0,0 +1,1125 @@
+"""
+This module provides a columnar, array-backed store for a generated population,
+as an alternative to the per-person popdict.
+"""
+
+import os
+import gzip
+import json
+import itertools
+import numpy as np
+import sciris as sc
+from collections.abc import Mapping, Sequence
+from .config import logger as log
+from . import version as spv
+from . import defaults
+
+
+__all__ = ['PopulationArrays', 'PopDictView', 'GroupTable', 'edges_to_csr', 'group_edges',
+           'pack_groups', 'concatenate_tables', 'compute_statistics', 'save_arrays', 'load_arrays', 'save_json']
+
+
+# Columns holding the id of the group a person belongs to; None is stored as -1
+id_keys = ['hhid', 'scid', 'wpid', 'wpindcode', 'ltcfid']
+
+# Columns holding the id of a layer group; re-based when populations are concatenated
+group_keys = ['hhid', 'scid', 'wpid', 'ltcfid']
+
+# Group table columns holding a uid; shifted with the uids when populations are concatenated
+uid_column_keys = ['reference_uid']
+
+# Columns holding role flags; 1 is stored as True and None as False
+flag_keys = ['sc_student', 'sc_teacher', 'sc_staff', 'ltcf_res', 'ltcf_staff']
+
+# Columns holding categorical labels; stored as int codes into a list of labels, None is stored as -1
+label_keys = ['sc_type', 'sc_mixing_type']
+
+# Keys only present in the popdict when long term care facilities were generated
+ltcf_keys = ['ltcf_res', 'ltcf_staff', 'ltcfid']
+
+# Columns read by compute_statistics()
+statistics_keys = ['age', 'hhid', 'scid', 'sc_student', 'sc_teacher', 'sc_staff', 'sc_type',
+                   'wpid', 'ltcfid', 'ltcf_res', 'ltcf_staff']
+
+# Order of the keys in each person's dictionary, matching contact_networks.make_contacts()
+person_keys = ['age', 'sex', 'loc', 'contacts', 'ltcf_res', 'ltcf_staff', 'hhid',
+               'scid', 'sc_student', 'sc_teacher', 'sc_staff', 'sc_type',
+               'sc_mixing_type', 'wpid', 'wpindcode', 'ltcfid']
+
+id_dtype = np.int32
+index_dtype = np.int32
+indptr_dtype = np.int64
+
+# Name and version of the on-disk format written by save_arrays(); bump the version when the layout changes
+file_format = 'synthpops-arrays'
+file_format_version = 1
+
+
+def edges_to_csr(n, edges, symmetric=True, unique=False):
+    """
+    Convert an array of edges into compressed sparse row (CSR) adjacency
+    arrays.
+
+    Args:
+        n (int)              : number of people (rows)
+        edges (np.ndarray)   : (E, 2) array of edges between uids
+        symmetric (bool)     : If True, each edge (i, j) is stored for both i and j
+        unique (bool)        : If True, store each contact once even if the edge is repeated
+
+    Returns:
+        tuple: indptr and indices arrays such that the contacts of uid i are
+        indices[indptr[i]:indptr[i+1]].
+    """
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    if symmetric:
+        rows = np.concatenate([edges[:, 0], edges[:, 1]])
+        cols = np.concatenate([edges[:, 1], edges[:, 0]])
+    else:
+        rows, cols = edges[:, 0], edges[:, 1]
+    if unique and len(rows):
+        pairs = np.unique(rows * n + cols)
+        rows, cols = pairs // n, pairs % n
+
+    order = np.lexsort((cols, rows))
+    indices = cols[order].astype(index_dtype)
+    indptr = np.zeros(n + 1, dtype=indptr_dtype)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, indices
+
+
+def group_edges(groups):
+    """
+    Get the edges of fully connected groups, such as households, where every
+    member is in contact with every other member of their group.
+
+    Args:
+        groups (list) : list of lists of uids
+
+    Returns:
+        np.ndarray: An (E, 2) array of edges (i, j), one for each pair of members of each group.
+    """
+    packed = _pack_ragged(groups)
+    sizes = np.diff(packed.indptr)
+    edges = [np.zeros((0, 2), dtype=np.int64)]
+    for size in np.unique(sizes[sizes > 1]):
+        starts = packed.indptr[:-1][sizes == size]
+        members = packed['values'][starts[:, None] + np.arange(size)]  # one row per group of this size
+        i, j = np.triu_indices(size, 1)
+        edges.append(np.stack([members[:, i].ravel(), members[:, j].ravel()], axis=1))
+    return np.concatenate(edges)
+
+
+class PopulationArrays(sc.prettyobj):
+    """
+    A columnar store of a population. Person attributes are held as NumPy
+    columns indexed by uid, and contacts are held as CSR adjacency arrays
+    (indptr, indices) for each layer.
+
+    Args:
+        n (int)                   : number of people
+        layer_keys (list)         : names of the contact layers
+        with_ltcf (bool)          : If True, people have long term care facility attributes
+
+    Notes:
+        Missing values are encoded as -1 for id and label columns, and as False
+        for role flags. Use PopDictView (or pop.popdict) to access the
+        population with the same dictionary structure as the popdict.
+    """
+
+    def __init__(self, n=0, layer_keys=None, with_ltcf=False):
+        """Class constructor for an empty population of n people."""
+        self.n = int(n)
+        self.with_ltcf = with_ltcf
+        self.age = np.zeros(self.n, dtype=np.int16)
+        self.sex = np.zeros(self.n, dtype=np.int8)
+        for key in id_keys + label_keys:
+            self[key] = np.full(self.n, -1, dtype=id_dtype)
+        for key in flag_keys:
+            self[key] = np.zeros(self.n, dtype=bool)
+        self.labels = {key: [] for key in label_keys}
+
+        self.contacts = sc.objdict()
+        for layer in sc.tolist(layer_keys):
+            self.contacts[layer] = sc.objdict(indptr=np.zeros(self.n + 1, dtype=indptr_dtype),
+                                              indices=np.zeros(0, dtype=index_dtype))
+        return
+
+    def __getitem__(self, key):
+        """Return the column named key."""
+        return self.__dict__[key]
+
+    def __setitem__(self, key, value):
+        """Set the column named key."""
+        self.__dict__[key] = value
+
+    def __len__(self):
+        """Return the number of people."""
+        return self.n
+
+    @property
+    def layer_keys(self):
+        """The names of the contact layers."""
+        return list(self.contacts.keys())
+
+    @property
+    def columns(self):
+        """The names of the person attribute columns."""
+        return ['age', 'sex'] + id_keys + label_keys + flag_keys
+
+    @classmethod
+    def from_popdict(cls, popdict, layer_keys=None, columns=None):
+        """
+        Create a columnar store from a popdict such as the one returned by
+        contact_networks.make_contacts(). Contacts may be stored as sets or lists.
+
+        Args:
+            popdict (dict)    : dictionary of people keyed by uid, where uids run from 0 to n-1
+            layer_keys (list) : If given, only pack the contacts of these layers
+            columns (list)    : If given, only fill these person attribute columns; the rest are left as missing values
+
+        Returns:
+            sp.PopulationArrays: The columnar population.
+        """
+        log.debug('PopulationArrays.from_popdict()')
+        n = len(popdict)
+        if n and (min(popdict.keys()) != 0 or max(popdict.keys()) != n - 1):
+            errormsg = f'PopulationArrays requires uids to run from 0 to n-1 ({n-1}). Instead, the uids range from {min(popdict.keys())} to {max(popdict.keys())}.'
+            raise ValueError(errormsg)
+
+        people = [popdict[uid] for uid in range(n)]
+        first = people[0] if n else {'contacts': {}}
+        if layer_keys is None:
+            layer_keys = list(first['contacts'].keys())
+        arrs = cls(n, layer_keys=layer_keys, with_ltcf='ltcfid' in first)
+        columns = arrs.columns if columns is None else columns
+
+        if 'age' in columns:
+            arrs.age[:] = [p['age'] for p in people]
+        if 'sex' in columns:
+            arrs.sex[:] = [p['sex'] for p in people]
+        for key in id_keys:
+            if key in columns:
+                arrs[key][:] = [-1 if p.get(key) is None else p[key] for p in people]
+        for key in flag_keys:
+            if key in columns:
+                arrs[key][:] = [p.get(key) is not None and p[key] != 0 for p in people]
+        for key in label_keys:
+            if key in columns:
+                values = [p.get(key) for p in people]
+                arrs.labels[key] = sorted(set(v for v in values if v is not None))
+                codes = {v: c for c, v in enumerate(arrs.labels[key])}
+                arrs[key][:] = [-1 if v is None else codes[v] for v in values]
+
+        for layer in arrs.layer_keys:
+            layer_contacts = [p['contacts'][layer] for p in people]
+            indptr = arrs.contacts[layer].indptr
+            np.cumsum([len(c) for c in layer_contacts], out=indptr[1:])
+            arrs.contacts[layer].indices = np.fromiter(itertools.chain.from_iterable(layer_contacts), dtype=index_dtype, count=indptr[-1])
+
+        return arrs
+
+    @classmethod
+    def concatenate(cls, arrays_list, id_offsets=None):
+        """
+        Concatenate populations into one. The people of each population take the
+        next range of uids, contacts are shifted with them, and the group ids
+        (hhid, scid, wpid, ltcfid) are re-based so that the groups of each
+        population follow on from those of the populations before it.
+
+        Args:
+            arrays_list (list) : list of sp.PopulationArrays
+            id_offsets (list)  : for each population, the offset to add to each group id column, e.g. {'hhid': 120}; by default one more than the largest id in the populations before it
+
+        Returns:
+            sp.PopulationArrays: The concatenated population.
+        """
+        if not len(arrays_list):
+            errormsg = 'Cannot concatenate an empty list of populations.'
+            raise ValueError(errormsg)
+
+        layer_keys = []
+        for arrs in arrays_list:
+            layer_keys += [layer for layer in arrs.layer_keys if layer not in layer_keys]
+        uid_offsets = _offsets([arrs.n for arrs in arrays_list])
+        if id_offsets is None:
+            id_offsets = [{key: 0 for key in group_keys}]
+            for arrs in arrays_list[:-1]:
+                id_offsets.append({key: id_offsets[-1][key] + int(arrs[key].max(initial=-1)) + 1 for key in group_keys})
+
+        merged = cls(0, layer_keys=layer_keys, with_ltcf=any(arrs.with_ltcf for arrs in arrays_list))
+        merged.n = int(uid_offsets[-1])
+        for key in ['age', 'sex'] + flag_keys:
+            merged[key] = np.concatenate([arrs[key] for arrs in arrays_list])
+        for key in id_keys:
+            merged[key] = np.concatenate([_shift_ids(arrs[key], offsets.get(key, 0)) if key in group_keys else arrs[key]
+                                          for arrs, offsets in zip(arrays_list, id_offsets)])
+        for key in label_keys:
+            merged.labels[key], recodes = _merge_labels([arrs.labels[key] for arrs in arrays_list])
+            merged[key] = np.concatenate([_recode(arrs[key], recode) for arrs, recode in zip(arrays_list, recodes)])
+
+        for layer in layer_keys:
+            pieces = [sc.objdict(indptr=arrs.contacts[layer].indptr, values=arrs.contacts[layer].indices) if layer in arrs.contacts
+                      else _pack_ragged([()] * arrs.n) for arrs in arrays_list]
+            ragged = _concatenate_ragged(pieces, uid_offsets[:-1])
+            merged.contacts[layer] = sc.objdict(indptr=ragged.indptr, indices=ragged['values'].astype(index_dtype))
+
+        return merged
+
+    def set_layer_edges(self, layer, edges):
+        """
+        Set the contacts of a layer from an array of undirected edges. Repeated
+        edges, e.g. from overlapping groups, are stored once.
+
+        Args:
+            layer (str)        : name of the contact layer
+            edges (np.ndarray) : (E, 2) array of edges between uids
+        """
+        indptr, indices = edges_to_csr(self.n, edges, unique=True)
+        self.contacts[layer] = sc.objdict(indptr=indptr, indices=indices)
+        return
+
+    def set_groups(self, key, groups, values=None, flag=None):
+        """
+        Set a column for the members of each group, such as the household id of
+        each household member.
+
+        Args:
+            key (str)            : name of the id column
+            groups (list)        : list of lists of uids
+            values (np.ndarray)  : the value of each group; by default the index of the group
+            flag (str)           : If given, also set this role flag for the members, e.g. 'sc_student'
+        """
+        packed = _pack_ragged(groups)
+        index = np.repeat(np.arange(len(groups)), np.diff(packed.indptr))
+        self[key][packed['values']] = index if values is None else np.asarray(values)[index]
+        if flag is not None:
+            self[flag][packed['values']] = True
+        return
+
+    def set_group_labels(self, key, groups, labels):
+        """
+        Set a categorical column for the members of each group to the label of
+        their group, such as the school type of everyone in each school.
+
+        Args:
+            key (str)      : name of the label column
+            groups (list)  : list of lists of uids
+            labels (list)  : the label (or None) of each group
+        """
+        self.labels[key] = sorted(set(v for v in labels if v is not None))
+        codes = {v: c for c, v in enumerate(self.labels[key])}
+        self.set_groups(key, groups, values=np.array([-1 if v is None else codes[v] for v in labels], dtype=id_dtype))
+        return
+
+    def get_contacts(self, uid, layer):
+        """
+        Return the contacts of a person in a layer.
+
+        Args:
+            uid (int)   : person id
+            layer (str) : name of the contact layer
+
+        Returns:
+            np.ndarray: The uids of the person's contacts in the layer.
+        """
+        csr = self.contacts[layer]
+        return csr.indices[csr.indptr[uid]:csr.indptr[uid + 1]]
+
+    def degree(self, layer):
+        """
+        Return the degree of each person in a layer.
+
+        Args:
+            layer (str) : name of the contact layer
+
+        Returns:
+            np.ndarray: The number of contacts of each person in the layer.
+        """
+        return np.diff(self.contacts[layer].indptr)
+
+    def get_label(self, key, uid):
+        """Return the label of a categorical column for person uid, or None."""
+        code = self[key][uid]
+        return None if code < 0 else self.labels[key][code]
+
+    def person(self, uid):
+        """
+        Return a dictionary of a person's attributes and contacts, with the same
+        structure as an entry in the popdict.
+
+        Args:
+            uid (int) : person id
+
+        Returns:
+            dict: A dictionary of the person's attributes.
+        """
+        if uid < 0 or uid >= self.n:
+            raise KeyError(uid)
+        person = {}
+        for key in person_keys:
+            if key in ltcf_keys and not self.with_ltcf:
+                continue
+            elif key == 'age' or key == 'sex':
+                person[key] = int(self[key][uid])
+            elif key == 'loc':
+                person[key] = None
+            elif key == 'contacts':
+                person[key] = {layer: self.get_contacts(uid, layer).tolist() for layer in self.layer_keys}
+            elif key in flag_keys:
+                person[key] = 1 if self[key][uid] else None
+            elif key in label_keys:
+                person[key] = self.get_label(key, uid)
+            else:
+                person[key] = None if self[key][uid] < 0 else int(self[key][uid])
+        return person
+
+    def to_popdict(self):
+        """
+        Export to a popdict.
+
+        Returns:
+            dict: A dictionary of people keyed by uid.
+        """
+        return {uid: self.person(uid) for uid in range(self.n)}
+
+    @property
+    def nbytes(self):
+        """The total number of bytes held by the arrays."""
+        total = sum(self[key].nbytes for key in self.columns)
+        for csr in self.contacts.values():
+            total += csr.indptr.nbytes + csr.indices.nbytes
+        return total
+
+
+class PopDictView(Mapping):
+    """
+    A read-only, dictionary-like view of a PopulationArrays object. Indexing the
+    view by uid returns a new dictionary for that person with the same
+    structure as an entry in the popdict; modifying that dictionary does not
+    change the underlying arrays.
+
+    Args:
+        arrays (sp.PopulationArrays) : the columnar population
+    """
+
+    def __init__(self, arrays):
+        """Class constructor for the view."""
+        self.arrays = arrays
+
+    def __getitem__(self, uid):
+        """Return the person with id uid."""
+        if not isinstance(uid, (int, np.integer)):
+            raise KeyError(uid)
+        return self.arrays.person(int(uid))
+
+    def __iter__(self):
+        """Iterate over the uids."""
+        return iter(range(self.arrays.n))
+
+    def __len__(self):
+        """Return the number of people."""
+        return self.arrays.n
+
+    def __repr__(self):
+        """Brief representation of the view."""
+        return f'<{self.__class__.__name__} of {self.arrays.n} people>'
+
+    def to_dict(self):
+        """Export to a popdict."""
+        return self.arrays.to_popdict()
+
+
+def _count_by_group(ids, counted=None):
+    """
+    Count the members of each group from a column of group ids (-1 for none).
+
+    Args:
+        ids (np.ndarray)     : group id of each person
+        counted (np.ndarray) : If given, boolean mask of the members to count; groups with no counted members are kept with a count of 0
+
+    Returns:
+        tuple: The group ids in order of first appearance by uid, the smallest
+        uid in each group, and the count of members in each group.
+    """
+    members = np.flatnonzero(ids >= 0)
+    groups, first, inverse = np.unique(ids[members], return_index=True, return_inverse=True)
+    weights = None if counted is None else counted[members]
+    counts = np.bincount(inverse, weights=weights, minlength=len(groups)).astype(np.int64)
+    order = np.argsort(first, kind='stable')
+    return groups[order], members[first[order]], counts[order]
+
+
+def compute_statistics(arrays, max_age=None):
+    """
+    Compute the size, enrollment, employment, and head of household tables of a
+    population in a single vectorised pass over the attribute columns. The
+    tables match those returned by the per-table functions in the households,
+    ltcfs, schools, and workplaces modules.
+
+    Args:
+        arrays (sp.PopulationArrays) : the columnar population; only the columns in statistics_keys are used
+        max_age (int)                : number of single year ages to count, defaults to settings.max_age
+
+    Returns:
+        sc.objdict: Dictionary of the age count, household sizes, household
+        heads and their ages, long term care facility sizes, enrollment by
+        age and by school type, employment by age, and workplace sizes.
+    """
+    log.debug('compute_statistics()')
+    if max_age is None:
+        max_age = defaults.settings.max_age
+    stats = sc.objdict()
+
+    def by_age(mask=None):
+        ages = arrays.age if mask is None else arrays.age[mask]
+        count = np.bincount(ages, minlength=max_age)
+        return dict(zip(np.arange(len(count)), count.tolist()))
+
+    stats.age_count = by_age()
+
+    hhids, heads, sizes = _count_by_group(arrays.hhid)
+    stats.household_sizes = dict(zip(hhids.tolist(), sizes.tolist()))
+    stats.household_heads = dict(zip(hhids.tolist(), heads.tolist()))
+    stats.household_head_ages = dict(zip(hhids.tolist(), arrays.age[heads].tolist()))
+
+    ltcfids, _, sizes = _count_by_group(arrays.ltcfid, counted=arrays.ltcf_res | arrays.ltcf_staff)
+    stats.ltcf_sizes = dict(zip(ltcfids.tolist(), sizes.tolist()))
+
+    students = (arrays.scid >= 0) & arrays.sc_student
+    stats.enrollment_by_age = by_age(students)
+    _, first, sizes = _count_by_group(np.where(students, arrays.scid, -1))
+    enrollment_by_school_type = dict()
+    for code, size in zip(arrays.sc_type[first].tolist(), sizes.tolist()):
+        sc_type = None if code < 0 else arrays.labels['sc_type'][code]
+        enrollment_by_school_type.setdefault(sc_type, []).append(size)
+    if None not in enrollment_by_school_type:  # combine all school types, as in schools.count_enrollment_by_school_type()
+        enrollment_by_school_type = {None: list(itertools.chain.from_iterable(enrollment_by_school_type.values()))}
+    stats.enrollment_by_school_type = enrollment_by_school_type
+
+    # as in workplaces.count_employment_by_age(), a wpid of 0 does not count as employed
+    employed = arrays.ltcf_staff | arrays.sc_teacher | arrays.sc_staff | (arrays.wpid > 0)
+    stats.employment_by_age = by_age(employed)
+
+    wpids, _, sizes = _count_by_group(arrays.wpid)
+    stats.workplace_sizes = dict(zip(wpids.tolist(), sizes.tolist()))
+
+    return stats
+
+
+def _offsets(counts):
+    """The offsets (indptr) of consecutive runs of the given lengths."""
+    indptr = np.zeros(len(counts) + 1, dtype=indptr_dtype)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr
+
+
+def _pack_ragged(lists):
+    """Pack a list of lists of ints (None counts as empty) into ragged (indptr, values) arrays."""
+    lists = [() if v is None else v for v in lists]
+    indptr = _offsets(np.fromiter((len(v) for v in lists), dtype=indptr_dtype, count=len(lists)))
+    values = np.fromiter(itertools.chain.from_iterable(lists), dtype=np.int64, count=indptr[-1])
+    return sc.objdict(indptr=indptr, values=values)
+
+
+def _concatenate_indptr(indptrs):
+    """Concatenate the offsets (indptr) of consecutive ragged arrays."""
+    pieces, total = [np.zeros(1, dtype=indptr_dtype)], 0
+    for indptr in indptrs:
+        pieces.append(indptr[1:] + total)
+        total += int(indptr[-1])
+    return np.concatenate(pieces).astype(indptr_dtype)
+
+
+def _concatenate_ragged(pieces, offsets):
+    """Concatenate ragged (indptr, values) arrays, adding offsets[i] to the values of piece i."""
+    values = [np.zeros(0, dtype=np.int64)] + [piece['values'].astype(np.int64) + int(offset) for piece, offset in zip(pieces, offsets)]
+    return sc.objdict(indptr=_concatenate_indptr([piece.indptr for piece in pieces]), values=np.concatenate(values))
+
+
+def _shift_ids(ids, offset):
+    """Add offset to the ids, leaving missing values (-1) as they are."""
+    return np.where(ids >= 0, ids + int(offset), ids).astype(ids.dtype)
+
+
+def _merge_labels(label_lists):
+    """Merge lists of labels into one sorted list, with an array per list mapping its codes to the merged codes."""
+    labels = sorted(set(itertools.chain.from_iterable(label_lists)))
+    codes = {v: c for c, v in enumerate(labels)}
+    return labels, [np.array([codes[v] for v in label_list], dtype=id_dtype) for label_list in label_lists]
+
+
+def _recode(codes, recode):
+    """Map label codes through recode, leaving missing values (-1) as they are."""
+    recoded = np.full(len(codes), -1, dtype=id_dtype)
+    mask = codes >= 0
+    recoded[mask] = recode[codes[mask]]
+    return recoded
+
+
+def _encode_labels(values):
+    """Encode a list of strings (or None) as int codes into a sorted list of labels, with None as -1."""
+    labels = sorted(set(str(v) for v in values if v is not None))
+    codes = {v: c for c, v in enumerate(labels)}
+    return labels, np.array([-1 if v is None else codes[str(v)] for v in values], dtype=id_dtype)
+
+
+def _empty_table(n):
+    """An empty packed table of n layer groups."""
+    return sc.objdict(n=n, keys=[], columns={}, labels={}, ragged={}, children={}, present={})
+
+
+def pack_groups(groups):
+    """
+    Pack a list of layer groups (households, schools, workplaces, long term
+    care facilities, or classrooms) into a table of arrays. Integer values are
+    stored as columns (None as -1), string values as int codes into a list of
+    labels, arrays of uids as ragged (indptr, values) arrays, and lists of
+    nested layer groups as packed child tables. Keys missing from some of the
+    groups get a boolean mask of the groups that have them.
+
+    Args:
+        groups (list) : list of sp.LayerGroup objects, or a GroupTable
+
+    Returns:
+        sc.objdict: The packed table with the number of groups n, the ordered
+        keys, and dictionaries of columns, labels, ragged arrays, children, and
+        presence masks.
+    """
+    if isinstance(groups, GroupTable):
+        return groups.pack()
+
+    table = _empty_table(len(groups))
+    for group in groups:
+        for key in group.keys():
+            if key not in table['keys']:
+                table['keys'].append(key)
+
+    for key in table['keys']:
+        values = [group.get(key) for group in groups]
+        present = np.array([key in group for group in groups], dtype=bool)
+        if not present.all():
+            table.present[key] = present
+        if any(isinstance(v, np.ndarray) for v in values):
+            table.ragged[key] = _pack_ragged(values)
+        elif any(isinstance(v, list) for v in values):
+            children = [child for v in values if v is not None for child in v]
+            table.children[key] = sc.objdict(indptr=_offsets([0 if v is None else len(v) for v in values]), table=pack_groups(children))
+        elif any(isinstance(v, str) for v in values):
+            table.labels[key], table.columns[key] = _encode_labels(values)
+        else:
+            table.columns[key] = np.array([-1 if v is None else v for v in values], dtype=np.int64)
+
+    return table
+
+
+def concatenate_tables(tables, uid_offsets, id_key=None):
+    """
+    Concatenate packed tables of layer groups (see pack_groups()) from
+    populations that were concatenated with PopulationArrays.concatenate().
+    The uids held by each table are shifted by the uid offset of its
+    population, and the group id column is re-based so that ids run on from
+    one table to the next. Keys missing from some of the tables are marked
+    absent in the presence masks.
+
+    Args:
+        tables (list)      : packed tables of layer groups, one per population
+        uid_offsets (list) : offset of the uids of each population
+        id_key (str)       : column holding the group id, e.g. hhid; nested groups such as classrooms keep their ids
+
+    Returns:
+        sc.objdict: The concatenated packed table.
+    """
+    table = _empty_table(sum(t.n for t in tables))
+    for t in tables:
+        table['keys'] += [key for key in t['keys'] if key not in table['keys']]
+    group_offsets = _offsets([t.n for t in tables])
+
+    for key in table['keys']:
+        present = np.concatenate([np.zeros(0, dtype=bool)] + [t.get('present', {}).get(key, np.full(t.n, key in t['keys'], dtype=bool)) for t in tables])
+        if not present.all():
+            table.present[key] = present
+
+        if any(key in t.ragged for t in tables):
+            pieces = [t.ragged[key] if key in t.ragged else _pack_ragged([()] * t.n) for t in tables]
+            table.ragged[key] = _concatenate_ragged(pieces, uid_offsets)
+        elif any(key in t.children for t in tables):
+            children = [t.children[key] if key in t.children else sc.objdict(indptr=np.zeros(t.n + 1, dtype=indptr_dtype), table=_empty_table(0)) for t in tables]
+            table.children[key] = sc.objdict(indptr=_concatenate_indptr([c.indptr for c in children]), table=concatenate_tables([c.table for c in children], uid_offsets))
+        elif any(key in t.labels for t in tables):
+            table.labels[key], recodes = _merge_labels([t.labels.get(key, []) for t in tables])
+            table.columns[key] = np.concatenate([_recode(t.columns[key], recode) if key in t.columns else np.full(t.n, -1, dtype=id_dtype)
+                                                 for t, recode in zip(tables, recodes)])
+        else:
+            columns = []
+            for t, uid_offset, group_offset in zip(tables, uid_offsets, group_offsets):
+                values = t.columns[key] if key in t.columns else np.full(t.n, -1, dtype=np.int64)
+                if key == id_key:
+                    values = _shift_ids(values, group_offset)
+                elif key in uid_column_keys:
+                    values = _shift_ids(values, uid_offset)
+                columns.append(values)
+            table.columns[key] = np.concatenate([np.zeros(0, dtype=np.int64)] + columns)
+
+    return table
+
+
+class GroupTable(Sequence):
+    """
+    A list-like table of layer groups (households, schools, workplaces, long
+    term care facilities, or classrooms) stored as arrays: a typed column per
+    id or label (None stored as -1), member offsets and indices per array of
+    uids, and a nested table per list of child groups (see pack_groups()).
+
+    Indexing the table returns a layer group object, created the first time it
+    is accessed and kept, so that changes made to it persist. Groups can also be
+    replaced or appended as in a list. The members and columns of all groups can
+    be read directly from the arrays without creating any objects; these read
+    the packed table, so reflect changes made through the objects only after
+    pack().
+
+    Args:
+        table (sc.objdict)   : packed table of layer groups
+        group_class (type)   : the sp.LayerGroup subclass to create, e.g. sp.Household
+        child_classes (dict) : the sp.LayerGroup subclass for each nested list of groups, e.g. {'classrooms': sp.Classroom}
+
+    **Example**::
+
+        households = sp.GroupTable.from_lists(sp.Household, n=2, ragged=dict(member_uids=[[0, 1], [2]]), columns=dict(hhid=[0, 1]))
+        households.sizes()         # array([2, 1])
+        households.members(0)      # array([0, 1])
+        households[1]['hhid']      # 1
+    """
+
+    def __init__(self, table, group_class, child_classes=None):
+        """Class constructor for the table."""
+        table.setdefault('present', {})  # tables saved before presence masks were added
+        self.table = table
+        self.group_class = group_class
+        self.child_classes = sc.mergedicts(child_classes)
+        self._groups = {}  # group objects created so far, by index
+        self._n_appended = 0
+        return
+
+    @classmethod
+    def from_lists(cls, group_class, n, ragged=None, columns=None, labels=None, child_classes=None):
+        """
+        Build a table of n groups directly from per-group lists, without creating
+        any group objects. Keys of group_class that are not supplied take the
+        class default: empty for arrays of uids and None otherwise.
+
+        Args:
+            group_class (type)   : the sp.LayerGroup subclass, e.g. sp.Household
+            n (int)              : number of groups
+            ragged (dict)        : list of uids of each group for each key, e.g. member_uids
+            columns (dict)       : int value of each group for each key, with None stored as -1
+            labels (dict)        : str value (or None) of each group for each key, e.g. sc_type
+            child_classes (dict) : the sp.LayerGroup subclass for each nested list of groups
+
+        Returns:
+            GroupTable: The table of groups.
+        """
+        ragged, columns, labels = sc.mergedicts(ragged), sc.mergedicts(columns), sc.mergedicts(labels)
+        template = group_class()
+        table = _empty_table(n)
+        table['keys'] = list(template.keys()) + [k for k in list(ragged) + list(columns) + list(labels) if k not in template]
+        for key, values in itertools.chain(ragged.items(), columns.items(), labels.items()):
+            if len(values) != n:
+                errmsg = f'Expected {n} values for {group_class.__name__} key {key}, but {len(values)} were supplied.'
+                raise ValueError(errmsg)
+
+        for key in table['keys']:
+            if key in ragged:
+                table.ragged[key] = _pack_ragged(ragged[key])
+            elif key in columns:
+                table.columns[key] = np.asarray(columns[key], dtype=np.int64)
+            elif key in labels:
+                table.labels[key], table.columns[key] = _encode_labels(labels[key])
+            elif isinstance(template[key], np.ndarray):
+                table.ragged[key] = _pack_ragged([() for i in range(n)])
+            else:
+                table.columns[key] = np.full(n, -1 if template[key] is None else template[key], dtype=np.int64)
+        return cls(table, group_class, child_classes=child_classes)
+
+    @property
+    def is_packed(self):
+        """True if no group objects have been created or appended, so the packed table holds everything."""
+        return not self._groups and not self._n_appended
+
+    def _check_key(self, key, kind):
+        """Raise a KeyError if the table does not have key of the given kind."""
+        if key not in self.table[kind]:
+            errmsg = f'{self.group_class.__name__} table has no {kind} key {key}. Available keys: {list(self.table[kind].keys())}.'
+            raise KeyError(errmsg)
+        return
+
+    def offsets(self, key='member_uids'):
+        """The offsets into indices() of the uids in key of each group; group i has indices()[offsets()[i]:offsets()[i+1]]."""
+        self._check_key(key, 'ragged')
+        return self.table.ragged[key].indptr
+
+    def indices(self, key='member_uids'):
+        """The uids in key of all groups, concatenated in group order."""
+        self._check_key(key, 'ragged')
+        return self.table.ragged[key]['values']
+
+    def sizes(self, key='member_uids'):
+        """The number of uids in key of each group."""
+        return np.diff(self.offsets(key))
+
+    def members(self, index, key='member_uids'):
+        """The uids in key of the group at index, as a view into the table."""
+        indptr = self.offsets(key)
+        return self.indices(key)[indptr[index]:indptr[index + 1]]
+
+    def column(self, key):
+        """
+        The value of key for each group: an int array (None as -1) for ids, or a
+        list of strings (or None) for labels.
+        """
+        self._check_key(key, 'columns')
+        values = self.table.columns[key]
+        if key in self.table.labels:
+            labels = self.table.labels[key]
+            return [None if code < 0 else labels[code] for code in values]
+        return values
+
+    def set_column(self, key, values, present=None):
+        """
+        Add or replace an int column of the packed table. Groups already created
+        are not updated.
+
+        Args:
+            key (str)          : key of the column
+            values (array)     : int value of each group, with None stored as -1
+            present (np.array) : boolean mask of the groups that have the key; all if None
+        """
+        self.table.columns[key] = np.asarray(values, dtype=np.int64)
+        self._add_key(key, present)
+        return
+
+    def set_children(self, key, counts, children, present=None):
+        """
+        Add or replace a nested list of child groups in the packed table. Groups
+        already created are not updated.
+
+        Args:
+            key (str)             : key of the nested list, e.g. classrooms
+            counts (array)        : number of children of each group
+            children (GroupTable) : table of the children of all groups, in group order
+            present (np.array)    : boolean mask of the groups that have the key; all if None
+        """
+        indptr = _offsets(counts)
+        if indptr[-1] != children.table.n:
+            errmsg = f'The counts of {key} add up to {indptr[-1]}, but {children.table.n} children were supplied.'
+            raise ValueError(errmsg)
+        self.table.children[key] = sc.objdict(indptr=indptr, table=children.pack())
+        self.child_classes[key] = children.group_class
+        self._add_key(key, present)
+        return
+
+    def _add_key(self, key, present):
+        """Record key in the packed table, with its presence mask if given."""
+        if key not in self.table['keys']:
+            self.table['keys'].append(key)
+        if present is not None and not np.all(present):
+            self.table.present[key] = np.asarray(present, dtype=bool)
+        else:
+            self.table.present.pop(key, None)
+        return
+
+    def _make_group(self, index):
+        """Create the group object at index from the packed table."""
+        table = self.table
+        kwargs = {}
+        for key in table['keys']:
+            if key in table.present and not table.present[key][index]:
+                continue
+            if key in table.ragged:
+                ragged = table.ragged[key]
+                kwargs[key] = np.array(ragged['values'][ragged.indptr[index]:ragged.indptr[index + 1]], dtype=int)
+            elif key in table.children:
+                child = table.children[key]
+                view = GroupTable(child.table, self.child_classes[key])
+                kwargs[key] = [view[i] for i in range(child.indptr[index], child.indptr[index + 1])]
+            elif key in table.labels:
+                code = table.columns[key][index]
+                kwargs[key] = None if code < 0 else table.labels[key][code]
+            else:
+                value = table.columns[key][index]
+                kwargs[key] = None if value < 0 else int(value)
+
+        group = self.group_class()
+        group.update(kwargs)
+        return group
+
+    def _check_index(self, index):
+        """Return index as a non-negative int, or raise an IndexError."""
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError(f'group index {index} out of range')
+        return int(index)
+
+    def __getitem__(self, index):
+        """Return the group at index, creating it if it has not been accessed before."""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = self._check_index(index)
+        if index not in self._groups:
+            self._groups[index] = self._make_group(index)
+        return self._groups[index]
+
+    def __setitem__(self, index, group):
+        """Replace the group at index."""
+        self._groups[self._check_index(index)] = group
+        return
+
+    def __iter__(self):
+        """Iterate over the groups."""
+        for index in range(len(self)):
+            yield self[index]
+
+    def __len__(self):
+        """Return the number of groups."""
+        return self.table.n + self._n_appended
+
+    def __repr__(self):
+        """Brief representation of the table."""
+        return f'<{self.__class__.__name__} of {len(self)} {self.group_class.__name__} objects>'
+
+    def append(self, group):
+        """Add a group to the end of the table."""
+        self._groups[len(self)] = group
+        self._n_appended += 1
+        return
+
+    def pack(self):
+        """
+        Return the packed table of the groups, packing the group objects again
+        if any have been created or appended, since they may have changed.
+
+        Returns:
+            sc.objdict: The packed table (see pack_groups()).
+        """
+        if self.is_packed:
+            return self.table
+        return pack_groups(list(self))
+
+
+def _save_table(dirname, table):
+    """Write a packed table of layer groups to dirname and return its spec for the header."""
+    os.makedirs(dirname, exist_ok=True)
+    spec = dict(n=table.n, keys=table['keys'], labels=table.labels, children={}, present=[])
+    for key, values in table.columns.items():
+        np.save(os.path.join(dirname, f'{key}.npy'), values)
+    for key, ragged in table.ragged.items():
+        np.save(os.path.join(dirname, f'{key}.indptr.npy'), ragged.indptr)
+        np.save(os.path.join(dirname, f'{key}.npy'), ragged['values'])
+    for key, child in table.children.items():
+        np.save(os.path.join(dirname, f'{key}.indptr.npy'), child.indptr)
+        spec['children'][key] = _save_table(os.path.join(dirname, key), child.table)
+    for key, present in table.get('present', {}).items():
+        np.save(os.path.join(dirname, f'{key}.present.npy'), present)
+        spec['present'].append(key)
+    spec['ragged'] = list(table.ragged.keys())
+    return spec
+
+
+def _load_table(dirname, spec, mmap_mode=None):
+    """Read a packed table of layer groups written by _save_table()."""
+    table = sc.objdict(n=spec['n'], keys=spec['keys'], columns={}, labels=spec['labels'], ragged={}, children={}, present={})
+    for key in spec.get('present', []):  # not written before presence masks were added
+        table.present[key] = np.load(os.path.join(dirname, f'{key}.present.npy'), mmap_mode=mmap_mode)
+    for key in spec['keys']:
+        path = os.path.join(dirname, f'{key}.npy')
+        if key in spec['children']:
+            indptr = np.load(os.path.join(dirname, f'{key}.indptr.npy'), mmap_mode=mmap_mode)
+            table.children[key] = sc.objdict(indptr=indptr, table=_load_table(os.path.join(dirname, key), spec['children'][key], mmap_mode=mmap_mode))
+        elif key in spec['ragged']:
+            indptr = np.load(os.path.join(dirname, f'{key}.indptr.npy'), mmap_mode=mmap_mode)
+            table.ragged[key] = sc.objdict(indptr=indptr, values=np.load(path, mmap_mode=mmap_mode))
+        else:
+            table.columns[key] = np.load(path, mmap_mode=mmap_mode)
+    return table
+
+
+def save_arrays(dirname, arrays, groups=None, header=None):
+    """
+    Save a columnar population to a directory of NumPy .npy files with a JSON
+    header. The layout is::
+
+        header.json
+        people/<column>.npy
+        contacts/<layer>.indptr.npy, contacts/<layer>.indices.npy
+        groups/<table>/<key>.npy (and <key>.indptr.npy for ragged arrays)
+
+    Args:
+        dirname (str)                : the directory to write to; created if it does not exist
+        arrays (sp.PopulationArrays) : the columnar population
+        groups (dict)                : packed tables of layer groups keyed by name, see pack_groups()
+        header (dict)                : additional JSON serializable information to store in the header
+
+    Returns:
+        str: The path to the header file.
+    """
+    log.debug('save_arrays()')
+    groups = sc.mergedicts(groups)
+    for subdir in ['people', 'contacts', 'groups']:
+        os.makedirs(os.path.join(dirname, subdir), exist_ok=True)
+
+    for key in arrays.columns:
+        np.save(os.path.join(dirname, 'people', f'{key}.npy'), arrays[key])
+    for layer, csr in arrays.contacts.items():
+        np.save(os.path.join(dirname, 'contacts', f'{layer}.indptr.npy'), csr.indptr)
+        np.save(os.path.join(dirname, 'contacts', f'{layer}.indices.npy'), csr.indices)
+
+    info = dict(format=file_format,
+                format_version=file_format_version,
+                synthpops_version=spv.__version__,
+                n=arrays.n,
+                with_ltcf=arrays.with_ltcf,
+                layer_keys=arrays.layer_keys,
+                labels=arrays.labels,
+                groups={name: _save_table(os.path.join(dirname, 'groups', name), table) for name, table in groups.items()},
+                )
+    info = sc.mergedicts(sc.jsonify(header), info)
+    filename = os.path.join(dirname, 'header.json')
+    sc.savejson(filename, info, indent=2)
+    return filename
+
+
+def load_arrays(dirname, mmap=False):
+    """
+    Load a columnar population saved by save_arrays().
+
+    Args:
+        dirname (str) : the directory to read from
+        mmap (bool)   : If True, memory map the arrays read-only instead of reading them into memory
+
+    Returns:
+        tuple: The sp.PopulationArrays object, the packed tables of layer
+        groups keyed by name, and the header dictionary.
+    """
+    log.debug('load_arrays()')
+    filename = os.path.join(dirname, 'header.json')
+    if not os.path.isfile(filename):
+        errormsg = f'{dirname} is not a synthpops arrays directory: {filename} does not exist.'
+        raise FileNotFoundError(errormsg)
+
+    header = sc.loadjson(filename)
+    if header.get('format') != file_format or header.get('format_version', 0) > file_format_version:
+        errormsg = f"Cannot read {dirname}: expected format {file_format} version {file_format_version} or lower, not {header.get('format')} version {header.get('format_version')}."
+        raise ValueError(errormsg)
+
+    mmap_mode = 'r' if mmap else None
+    arrays = PopulationArrays(0, with_ltcf=header['with_ltcf'])
+    arrays.n = header['n']
+    for key in arrays.columns:
+        arrays[key] = np.load(os.path.join(dirname, 'people', f'{key}.npy'), mmap_mode=mmap_mode)
+    arrays.labels = header['labels']
+    for layer in header['layer_keys']:
+        arrays.contacts[layer] = sc.objdict(indptr=np.load(os.path.join(dirname, 'contacts', f'{layer}.indptr.npy'), mmap_mode=mmap_mode),
+                                            indices=np.load(os.path.join(dirname, 'contacts', f'{layer}.indices.npy'), mmap_mode=mmap_mode))
+
+    groups = sc.objdict()
+    for name, spec in header['groups'].items():
+        groups[name] = _load_table(os.path.join(dirname, 'groups', name), spec, mmap_mode=mmap_mode)
+
+    return arrays, groups, header
+
+
+def _json_default(obj):
+    """Convert NumPy scalars and arrays and sets to JSON serializable types."""
+    if isinstance(obj, np.integer):
+        return int(obj)
+    elif isinstance(obj, np.floating):
+        return float(obj)
+    elif isinstance(obj, np.ndarray):
+        return obj.tolist()
+    elif isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError(f'Object of type {type(obj)} is not JSON serializable')
+
+
+def _open_text(filename, compress):
+    """Open filename for writing text, gzipped if compress is True."""
+    return gzip.open(filename, 'wt', encoding='utf-8') if compress else open(filename, 'w', encoding='utf-8')
+
+
+def _layer_filename(filename, layer):
+    """Return the name of the file for a layer, e.g. pop.ndjson.gz -> pop_H.ndjson.gz."""
+    suffix = ''
+    if filename.endswith('.gz'):
+        filename, suffix = filename[:-3], '.gz'
+    root, ext = os.path.splitext(filename)
+    return f'{root}_{layer}{ext}{suffix}'
+
+
+def _write_records(filename, records, format, compress, chunk_size):
+    """Write an iterable of JSON serializable records chunk_size at a time, as lines or as one JSON array."""
+    with _open_text(filename, compress) as f:
+        if format == 'array':
+            f.write('[\n')
+        first = True
+        while True:
+            chunk = list(itertools.islice(records, chunk_size))
+            if not chunk:
+                break
+            lines = [json.dumps(record, default=_json_default) for record in chunk]
+            if format == 'array':
+                f.write(('' if first else ',\n') + ',\n'.join(lines))
+            else:
+                f.write('\n'.join(lines) + '\n')
+            first = False
+        if format == 'array':
+            f.write('\n]\n')
+    return filename
+
+
+def save_json(filename, popdict, format='ndjson', compress=None, separate_layers=False, chunk_size=10000):
+    """
+    Stream a population to JSON, one person at a time, so that memory use is
+    bounded by chunk_size rather than the size of the population.
+
+    Args:
+        filename (str)         : the name or path of the file to write
+        popdict (dict)         : dictionary of people keyed by uid, or a PopDictView
+        format (str)           : 'ndjson' to write one JSON record per line, or 'array' to write a single JSON array of records
+        compress (bool)        : If True, gzip the output; by default, gzip if filename ends with .gz
+        separate_layers (bool) : If True, leave contacts out of the person records and write each layer to its own file of [uid, contact uid] edges, named as filename with _<layer> appended to the stem
+        chunk_size (int)       : number of records serialized per write
+
+    Returns:
+        list: The names of the files written.
+
+    Notes:
+        Each person record is the person's popdict entry with their uid added
+        as the first key. Each edge in a layer file is written once, with the
+        smaller uid first.
+    """
+    log.debug('save_json()')
+    if format not in ['ndjson', 'array']:
+        errormsg = f"format must be 'ndjson' or 'array', not {format}."
+        raise ValueError(errormsg)
+    if compress is None:
+        compress = filename.endswith('.gz')
+
+    def person_records():
+        for uid in popdict:
+            person = popdict[uid]
+            record = {'uid': uid}
+            record.update({k: v for k, v in person.items() if not (separate_layers and k == 'contacts')})
+            yield record
+
+    def layer_edges(layer):
+        for uid in popdict:
+            for contact in popdict[uid]['contacts'][layer]:
+                if uid < contact:
+                    yield [uid, contact]
+
+    filenames = [_write_records(filename, person_records(), format, compress, chunk_size)]
+    if separate_layers and len(popdict):
+        for layer in popdict[next(iter(popdict))]['contacts'].keys():
+            filenames.append(_write_records(_layer_filename(filename, layer), layer_edges(layer), format, compress, chunk_size))
+
+    return filenames
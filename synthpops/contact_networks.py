@@ -8,6 +8,8 @@ import pandas as pd
 import networkx as nx
 from . import data_distributions as spdata
 from . import schools as spsch
+from . import sampling as spsamp
+from . import arrays as sparr
 from .config import logger as log, checkmem
 
 
@@ -32,7 +34,10 @@ def make_contacts(pop,
                   average_additional_staff_degree=20,
                   school_type_by_age=None,
                   workplaces_by_industry_codes=None,
-                  max_contacts=None):
+                  max_contacts=None,
+                  n_workers=None,
+                  use_arrays=False,
+                  rng=None):
     """
     From microstructure objects (dictionary mapping ID to age, lists of lists in different settings, etc.), create a dictionary of individuals.
     Each key is the ID of an individual which maps to a dictionary for that individual with attributes such as their age, household ID (hhid),
@@ -60,6 +65,9 @@ def make_contacts(pop,
         school_type_by_age (dict)                         : A dictionary of probabilities for the school type likely for each age.
         workplaces_by_industry_codes (np.ndarray or None) : array with workplace industry code for each workplace
         trimmed_size_dic (dict)                           : If supplied, trim contacts on creation rather than post hoc.
+        n_workers (int)                                   : If given, generate the contacts in schools and workplaces with their own random number streams across this many worker processes
+        use_arrays (bool)                                 : If True, fill a columnar sp.PopulationArrays object directly from the groups and edges instead of building the popdict
+        rng (np.random.Generator)                         : random number generator for this stage; see sp.get_rng()
 
     Returns:
         A popdict of people with attributes. Dictionary keys are the IDs of individuals in the population and the values are a dictionary
@@ -68,7 +76,7 @@ def make_contacts(pop,
         households ('H'), schools ('S'), and workplaces ('W'), and long term care facilities ('LTCF'). Contacts in these layers are clustered and thus form a network composed of
         groups of people interacting with each other. For example, all household members are contacts of each other, and everyone in the
         same school is considered a contact of each other. If use_two_group_reduction is True, then contracts within 'LTCF' are reduced
-        from fully connected.
+        from fully connected. If use_arrays is True, the same population is returned as an sp.PopulationArrays object instead.
 
     Notes:
         Methods to trim large groups of contacts down to better approximate a sense of close contacts (such as classroom sizes or
@@ -78,6 +86,7 @@ def make_contacts(pop,
         but other parameters such as average_additional_staff_degree will not be used.
     """
     log.debug('make_contacts_from_microstructure_objects()')
+    rng = spsamp.get_rng(rng)
     popdict = {}
 
     grade_age_mapping = {i: i + 5 for i in range(13)}
@@ -141,33 +150,53 @@ def make_contacts(pop,
     log.debug('  starting...' + checkmem())
 
     # TODO: include age-based sex ratios
-    sexes = np.random.randint(2, size=len(age_by_uid))
-
-    for u, uid in enumerate(age_by_uid):
-        popdict[uid] = {}
-        popdict[uid]['age'] = int(age_by_uid[uid])
-        popdict[uid]['sex'] = sexes[u]
-        popdict[uid]['loc'] = None
-        popdict[uid]['contacts'] = {}
-        if use_ltcf:
-            popdict[uid]['ltcf_res'] = None
-            popdict[uid]['ltcf_staff'] = None
-        popdict[uid]['hhid'] = None
-        popdict[uid]['scid'] = None
-        popdict[uid]['sc_student'] = None
-        popdict[uid]['sc_teacher'] = None
-        popdict[uid]['sc_staff'] = None
-        popdict[uid]['sc_type'] = None
-        popdict[uid]['sc_mixing_type'] = None
-        popdict[uid]['wpid'] = None
-        popdict[uid]['wpindcode'] = None
-        if use_ltcf:
-            popdict[uid]['ltcfid'] = None
-        for k in layer_keys:
-            popdict[uid]['contacts'][k] = set()
+    sexes = rng.integers(2, size=len(age_by_uid))
+
+    if use_arrays:
+        arrays = sparr.PopulationArrays(len(age_by_uid), layer_keys=layer_keys, with_ltcf=use_ltcf)
+        uids = np.fromiter(age_by_uid.keys(), dtype=np.int64, count=len(age_by_uid))
+        if len(uids) and (uids.min() != 0 or uids.max() != len(uids) - 1):
+            errormsg = f'use_arrays requires uids to run from 0 to n-1 ({len(uids)-1}). Instead, the uids range from {uids.min()} to {uids.max()}.'
+            raise ValueError(errormsg)
+        arrays.age[uids] = np.fromiter(age_by_uid.values(), dtype=np.int64, count=len(uids))
+        arrays.sex[uids] = sexes
+    else:
+        for u, uid in enumerate(age_by_uid):
+            popdict[uid] = {}
+            popdict[uid]['age'] = int(age_by_uid[uid])
+            popdict[uid]['sex'] = sexes[u]
+            popdict[uid]['loc'] = None
+            popdict[uid]['contacts'] = {}
+            if use_ltcf:
+                popdict[uid]['ltcf_res'] = None
+                popdict[uid]['ltcf_staff'] = None
+            popdict[uid]['hhid'] = None
+            popdict[uid]['scid'] = None
+            popdict[uid]['sc_student'] = None
+            popdict[uid]['sc_teacher'] = None
+            popdict[uid]['sc_staff'] = None
+            popdict[uid]['sc_type'] = None
+            popdict[uid]['sc_mixing_type'] = None
+            popdict[uid]['wpid'] = None
+            popdict[uid]['wpindcode'] = None
+            if use_ltcf:
+                popdict[uid]['ltcfid'] = None
+            for k in layer_keys:
+                popdict[uid]['contacts'][k] = set()
 
     # read in facility residents and staff
-    if use_ltcf:
+    if use_ltcf and use_arrays:
+        arrays.set_groups('ltcfid', facilities_by_uid_lists, flag='ltcf_res')
+        arrays.set_groups('ltcfid', facilities_staff_uid_lists, flag='ltcf_staff')
+        facilities = [facility + facilities_staff_uid_lists[nf] for nf, facility in enumerate(facilities_by_uid_lists)]
+        if use_two_group_reduction:
+            ltcf_edges = [get_reduced_contact_uid_edges(facility, facilities_staff_uid_lists[nf], average_degree=average_LTCF_degree, force_cross_edges=True, rng=rng)
+                          for nf, facility in enumerate(facilities_by_uid_lists)]
+            arrays.set_layer_edges('LTCF', np.concatenate([np.zeros((0, 2), dtype=np.int64)] + ltcf_edges))
+        else:
+            arrays.set_layer_edges('LTCF', sparr.group_edges(facilities))
+
+    elif use_ltcf:
         for nf, facility in enumerate(facilities_by_uid_lists):
             facility_staff = facilities_staff_uid_lists[nf]
 
@@ -182,7 +211,7 @@ def make_contacts(pop,
             if use_two_group_reduction:
                 popdict = create_reduced_contacts_with_group_types(popdict, facility, facility_staff, 'LTCF',
                                                                    average_degree=average_LTCF_degree,
-                                                                   force_cross_edges=True)
+                                                                   force_cross_edges=True, rng=rng)
 
             else:
                 log.debug('...LTCFs ' + checkmem())
@@ -197,20 +226,24 @@ def make_contacts(pop,
                     popdict[uid]['contacts']['LTCF'].remove(uid)
 
     log.debug('...households ' + checkmem())
-    for nh, household in enumerate(homes_by_uids):
-        for uid in household:
-            popdict[uid]['contacts']['H'] = set(household)
-            popdict[uid]['contacts']['H'].remove(uid)
-            popdict[uid]['hhid'] = nh
+    if use_arrays:
+        arrays.set_groups('hhid', homes_by_uids)
+        arrays.set_layer_edges('H', sparr.group_edges(homes_by_uids))
+    else:
+        for nh, household in enumerate(homes_by_uids):
+            for uid in household:
+                popdict[uid]['contacts']['H'] = set(household)
+                popdict[uid]['contacts']['H'].remove(uid)
+                popdict[uid]['hhid'] = nh
 
     log.debug('...students ' + checkmem())
 
     student_in_groups, teachers_in_groups = [], []
 
+    # get the members and mixing parameters of each school
+    school_kwargs = []
     for ns, students in enumerate(students_by_uid_lists):
 
-        schools[ns] = {}
-
         teachers = teachers_by_uid_lists[ns]
         if non_teaching_staff_uid_lists is None:
             non_teaching_staff = []
@@ -219,28 +252,59 @@ def make_contacts(pop,
         else:
             non_teaching_staff = non_teaching_staff_uid_lists[ns]
 
-        this_school_type = None
-        this_school_mixing_type = None
-
         if with_school_types:
             student_ages = [age_by_uid[i] for i in students]
             min_age = min(student_ages)
             this_school_type = school_type_by_age[min_age]
             this_school_mixing_type = school_mixing_type_dic[this_school_type]
-            popdict, student_groups, teacher_groups = spsch.add_school_edges(popdict, students, student_ages,
-                                                                             teachers, non_teaching_staff, age_by_uid,
-                                                                             grade_age_mapping, age_grade_mapping,
-                                                                             average_class_size_by_mixing_type[this_school_mixing_type],
-                                                                             inter_grade_mixing,
-                                                                             average_student_teacher_ratio,
-                                                                             average_teacher_teacher_degree,
-                                                                             average_additional_staff_degree,
-                                                                             this_school_mixing_type)
-
+            kwargs = dict(student_uids=students, student_ages=student_ages, teacher_uids=teachers, non_teaching_staff_uids=non_teaching_staff,
+                          age_by_uid={uid: age_by_uid[uid] for uid in students + teachers},
+                          average_class_size=average_class_size_by_mixing_type[this_school_mixing_type], school_mixing_type=this_school_mixing_type)
         else:
+            # generic schools are well mixed across students, teachers, and non teaching staff
             school = students.copy() + teachers.copy() + non_teaching_staff.copy()
-            school_edges = spsch.generate_random_contacts_across_school(school, average_class_size)
-            popdict = spsch.add_contacts_from_edgelist(popdict, school_edges, 'S')
+            kwargs = dict(student_uids=school, student_ages=None, teacher_uids=[], non_teaching_staff_uids=[], age_by_uid={},
+                          average_class_size=average_class_size, school_mixing_type='random')
+        school_kwargs.append(kwargs)
+
+    # generate the contacts in each school, optionally across a pool of worker processes with a random number stream for each school
+    school_pars = dict(grade_age_mapping=grade_age_mapping, age_grade_mapping=age_grade_mapping, inter_grade_mixing=inter_grade_mixing,
+                       average_student_teacher_ratio=average_student_teacher_ratio, average_teacher_teacher_degree=average_teacher_teacher_degree,
+                       average_additional_staff_degree=average_additional_staff_degree)
+    if n_workers is None:
+        school_edges = [spsch.get_school_edges(**kwargs, **school_pars, rng=rng) for kwargs in school_kwargs]
+    else:
+        school_seeds = rng.integers(2**31, size=len(school_kwargs))
+        for kwargs, seed in zip(school_kwargs, school_seeds):
+            kwargs['seed'] = int(seed)
+        school_edges = sc.parallelize(spsch.get_school_edges, iterkwargs=school_kwargs, kwargs=school_pars, ncpus=n_workers, serial=n_workers <= 1) if len(school_kwargs) else []
+
+    school_edges_by_uid = [np.zeros((0, 2), dtype=np.int64)]
+    staff_by_school, school_types_by_school, school_mixing_types_by_school = [], [], []
+    for ns, students in enumerate(students_by_uid_lists):
+
+        schools[ns] = {}
+
+        teachers = teachers_by_uid_lists[ns]
+        if non_teaching_staff_uid_lists is None:
+            non_teaching_staff = []
+        elif non_teaching_staff_uid_lists == []:
+            non_teaching_staff = []
+        else:
+            non_teaching_staff = non_teaching_staff_uid_lists[ns]
+
+        this_school_type = None
+        this_school_mixing_type = None
+
+        edges, groups, student_groups, teacher_groups = school_edges[ns]
+        if use_arrays:
+            school_edges_by_uid += [np.asarray(edgelist, dtype=np.int64).reshape(-1, 2) for edgelist in edges] + [sparr.group_edges(groups)]
+        else:
+            popdict = spsch.add_school_edges_from_lists(popdict, edges, groups)
+        if with_school_types:
+            this_school_type = school_type_by_age[min(school_kwargs[ns]['student_ages'])]
+            this_school_mixing_type = school_kwargs[ns]['school_mixing_type']
+        else:
             student_groups = [students]
             teacher_groups = [teachers]
 
@@ -249,6 +313,12 @@ def make_contacts(pop,
         schools[ns]['student_groups'] = student_groups
         schools[ns]['teacher_groups'] = teacher_groups
 
+        if use_arrays:
+            staff_by_school.append(non_teaching_staff)
+            school_types_by_school.append(this_school_type)
+            school_mixing_types_by_school.append(this_school_mixing_type)
+            continue
+
         for uid in students:
             popdict[uid]['scid'] = ns
             popdict[uid]['sc_student'] = 1
@@ -269,19 +339,43 @@ def make_contacts(pop,
 
     pop.schools_in_groups = schools
 
+    if use_arrays:
+        arrays.set_groups('scid', students_by_uid_lists, flag='sc_student')
+        arrays.set_groups('scid', teachers_by_uid_lists, flag='sc_teacher')
+        arrays.set_groups('scid', staff_by_school, flag='sc_staff')
+        school_members = [students + teachers_by_uid_lists[ns] + staff_by_school[ns] for ns, students in enumerate(students_by_uid_lists)]
+        arrays.set_group_labels('sc_type', school_members, school_types_by_school)
+        arrays.set_group_labels('sc_mixing_type', school_members, school_mixing_types_by_school)
+        arrays.set_layer_edges('S', np.concatenate(school_edges_by_uid))
+
     log.debug('...workplaces ' + checkmem())
+    if use_arrays:
+        arrays.set_groups('wpid', workplace_by_uid_lists)
+        if workplaces_by_industry_codes is not None: # pragma: no cover
+            arrays.set_groups('wpindcode', workplace_by_uid_lists, values=workplaces_by_industry_codes)
+        if do_trim and 'W' in trim_keys:
+            arrays.set_layer_edges('W', get_workplace_edges(workplace_by_uid_lists, max_contacts['W'], n_workers=n_workers, rng=rng))
+        else: # pragma: no cover
+            arrays.set_layer_edges('W', sparr.group_edges(workplace_by_uid_lists))
+
+        log.debug('...done ' + checkmem())
+        return arrays
+
     if do_trim and 'W' in trim_keys:
 
+        # only the popdict path turns the edges into sets; with use_arrays they are written straight into the CSR layer above
         average_degree = max_contacts['W']
-        for nw, workplace in enumerate(workplace_by_uid_lists):
-            uids = np.array(workplace)
+        edges = get_workplace_edges(workplace_by_uid_lists, average_degree, n_workers=n_workers, rng=rng)
+        src = np.concatenate([edges[:, 0], edges[:, 1]])
+        dst = np.concatenate([edges[:, 1], edges[:, 0]])
+        order = np.argsort(src, kind='stable')
+        src_uids, starts = np.unique(src[order], return_index=True)
+        contacts_by_uid = dict(zip(src_uids.tolist(), np.split(dst[order], starts[1:]))) if len(src_uids) else {}
+        no_contacts = np.zeros(0, dtype=int)
 
-            G = random_graph_model(uids, average_degree)  # undirected graph
-            for u, uid in enumerate(workplace):
-                v = list(G.neighbors(u))
-
-                popdict[uid]['contacts']['W'] = set(uids[v])
-                popdict[uid]['contacts']['W'].discard(uid)  # this shouldn't be needed
+        for nw, workplace in enumerate(workplace_by_uid_lists):
+            for uid in workplace:
+                popdict[uid]['contacts']['W'] = set(contacts_by_uid.get(uid, no_contacts).tolist())
                 popdict[uid]['wpid'] = nw
                 if workplaces_by_industry_codes is not None: # pragma: no cover
                     popdict[uid]['wpindcode'] = int(workplaces_by_industry_codes[nw])
@@ -300,7 +394,7 @@ def make_contacts(pop,
     return popdict
 
 
-def create_reduced_contacts_with_group_types(popdict, group_1, group_2, setting, average_degree=20, p_matrix=None, force_cross_edges=True):
+def create_reduced_contacts_with_group_types(popdict, group_1, group_2, setting, average_degree=20, p_matrix=None, force_cross_edges=True, rng=None):
     """
     Create contacts between members of group 1 and group 2, fixing the average degree, and the
     probability of an edge between any two groups controlled by p_matrix if provided.
@@ -313,16 +407,46 @@ def create_reduced_contacts_with_group_types(popdict, group_1, group_2, setting,
         average_degree (int)      : average degree across group 1 and 2
         p_matrix (np.ndarray)     : probability matrix for edges between any two groups
         force_cross_groups (bool) : If True, force each individual to have at least one contact with a member from the other group
+        rng (np.random.Generator) : random number generator to draw from; see sp.get_rng()
 
     Returns:
         Popdict with edges added for nodes in the two groups.
 
     Notes:
         This method uses the Stochastic Block Model algorithm to generate contacts both between nodes in different groups
-    and for nodes within the same group. In the current version, fixing the average degree and p_matrix, the matrix of probabilities
+    and for nodes within the same group, sampled with get_reduced_contact_edges(). In the current version, fixing the average degree and p_matrix, the matrix of probabilities
     for edges between any two groups is not supported. Future versions may add support for this.
     """
 
+    edges = get_reduced_contact_uid_edges(group_1, group_2, average_degree=average_degree, p_matrix=p_matrix, force_cross_edges=force_cross_edges, rng=rng)
+
+    # only the members of the two groups are touched
+    for uid in list(group_1) + list(group_2):
+        popdict[int(uid)]['contacts'].setdefault(setting, set())
+
+    for id_i, id_j in edges.tolist():
+        popdict[id_i]['contacts'][setting].add(id_j)
+        popdict[id_j]['contacts'][setting].add(id_i)
+
+    return popdict
+
+
+def get_reduced_contact_uid_edges(group_1, group_2, average_degree=20, p_matrix=None, force_cross_edges=True, rng=None):
+    """
+    Generate the edges between the members of group 1 and group 2 as pairs of
+    uids. See create_reduced_contacts_with_group_types() for details.
+
+    Args:
+        group_1 (list)            : list of ids for group 1
+        group_2 (list)            : list of ids for group 2
+        average_degree (int)      : average degree across group 1 and 2
+        p_matrix (np.ndarray)     : probability matrix for edges between any two groups
+        force_cross_edges (bool)  : If True, force each individual to have at least one contact with a member from the other group
+        rng (np.random.Generator) : random number generator to draw from; see sp.get_rng()
+
+    Returns:
+        np.ndarray: An (E, 2) array of edges between uids.
+    """
     if len(group_1) == 0 or len(group_2) == 0:
         errormsg = f'This method requires that both groups are populated. If one of the two groups has size 0, then consider using the synthpops.trim_contacts() method, or checking that the groups provided to this method are correct.'
         raise ValueError(errormsg)
@@ -331,95 +455,89 @@ def create_reduced_contacts_with_group_types(popdict, group_1, group_2, setting,
         errormsg = f'This method is likely to create disconnected graphs with average_degree < 2. In order to keep the group connected, use a higher average_degree for nodes across the two groups.'
         raise ValueError(errormsg)
 
-    r1 = [int(i) for i in group_1]
-    r2 = [int(i) for i in group_2]
+    group = np.array([int(i) for i in group_1] + [int(i) for i in group_2], dtype=np.int64)
+    edges = get_reduced_contact_edges(len(group_1), len(group_2), average_degree=average_degree, p_matrix=p_matrix, force_cross_edges=force_cross_edges, rng=rng)
+    return group[edges]
+
 
-    n1 = list(np.arange(len(r1)).astype(int))
-    n2 = list(np.arange(len(r1), len(r1) + len(r2)).astype(int))
+def get_reduced_contact_edges(n_1, n_2, average_degree=20, p_matrix=None, force_cross_edges=True, rng=None):
+    """
+    Generate the edges between the members of two groups, such as the
+    residents and staff of a long term care facility, fixing the average degree.
+    This is the edge generator used by create_reduced_contacts_with_group_types().
 
-    group = r1 + r2
-    sizes = [len(r1), len(r2)]
+    Args:
+        n_1 (int)                 : the number of people in group 1, with indices 0 to n_1 - 1
+        n_2 (int)                 : the number of people in group 2, with indices n_1 to n_1 + n_2 - 1
+        average_degree (int)      : average degree across group 1 and 2
+        p_matrix (np.ndarray)     : 2 by 2 probability matrix for edges within and between the two groups
+        force_cross_edges (bool)  : If True, force each individual in group 1 to have at least one contact with a member of group 2
+        rng (np.random.Generator) : random number generator to draw from; see sp.get_rng()
+
+    Returns:
+        np.ndarray: An (E, 2) array of edges (i, j) with i < j.
 
-    for i in popdict:
-        popdict[i]['contacts'].setdefault(setting, set())
+    Notes:
+        Contacts are a two block stochastic block model. A member of group 1
+        without a contact in group 2 gets one with a random member of group 2,
+        who drops a contact within group 2 if they have one, to preserve the
+        degree distribution.
+    """
+    rng = spsamp.get_rng(rng)
+    n = n_1 + n_2
 
     # group is less than the average degree, so return a fully connected graph instead
-    if len(group) <= average_degree:
-        G = nx.complete_graph(len(group))
+    if n <= average_degree:
+        return np.stack(np.triu_indices(n, 1), axis=1)
 
     # group 2 is less than 2 people so everyone in group 1 must be connected to that lone group 2 individual, create a fully connected graph then remove some edges at random to preserve the degree distribution
-    elif len(group_2) < 2:
-        G = nx.complete_graph(len(group))
-        for i in n1:
-            group_1_neighbors = [j for j in G.neighbors(i) if j in n1]
+    if n_2 < 2:
+        adjacency = ~np.eye(n, dtype=bool)
+        for i in range(n_1):
+            group_1_neighbors = np.flatnonzero(adjacency[i, :n_1])
 
             # if the person's degree is too high, cut out some contacts
             if len(group_1_neighbors) > average_degree:
-                ncut = len(group_1_neighbors) - average_degree  # rough number to cut
+                ncut = int(len(group_1_neighbors) - average_degree)  # rough number to cut
+                cut = rng.choice(group_1_neighbors, ncut, replace=False)
+                adjacency[i, cut] = adjacency[cut, i] = False
 
-                for k in range(ncut):
-                    j = np.random.choice(group_1_neighbors)
-                    G.remove_edge(i, j)
-                    group_1_neighbors.remove(j)
-
-    else:
-        share_k_matrix = np.ones((2, 2))
-        share_k_matrix *= average_degree / np.sum(sizes)
+        return np.stack(np.nonzero(np.triu(adjacency, 1)), axis=1)
 
-        if p_matrix is None:
-            p_matrix = share_k_matrix.copy()
+    if p_matrix is None:
+        p_matrix = np.full((2, 2), average_degree / n)
 
-        # create a graph with edges within each groups and between members of different groups using the probability matrix
-        G = nx.stochastic_block_model(sizes, p_matrix)
+    # create edges within each group and between members of different groups using the probability matrix
+    edges_1 = get_random_graph_edges([n_1], p_matrix[0][0] * n_1, seed=rng)
+    edges_2 = get_random_graph_edges([n_2], p_matrix[1][1] * n_2, seed=rng)
+    cross = rng.random((n_1, n_2)) < p_matrix[0][1]
 
-        # how many people in group 2 have connections they could cut to preserve the degree distribution
-        group_2_to_group_2_connections = []
-        for i in n2:
-            group_2_neighbors = [j for j in G.neighbors(i) if j in n2]
-            if len(group_2_neighbors) > 0:
-                group_2_to_group_2_connections.append(i)
+    if force_cross_edges:
+        lonely = np.flatnonzero(~cross.any(axis=1))  # people in group 1 without a contact in group 2
+        adjacency_2 = np.zeros((n_2, n_2), dtype=bool)
+        adjacency_2[edges_2[:, 0], edges_2[:, 1]] = adjacency_2[edges_2[:, 1], edges_2[:, 0]] = True
 
         # there are no people in group 2 who can remove edges to other group 2 people, so instead, just add edges
-        if len(group_2_to_group_2_connections) == 0:
-            for i in n1:
-                group_2_neighbors = [j for j in G.neighbors(i) if j in n2]
-
-                # need to add a contact in group 2
-                if len(group_2_neighbors) == 0:
-
-                    random_group_2_j = np.random.choice(n2)
-                    G.add_edge(i, random_group_2_j)
+        if not adjacency_2.any():
+            cross[lonely, rng.integers(n_2, size=len(lonely))] = True
 
         # some in group 2 have contacts to remove to preserve the degree distribution
         else:
-            for i in n1:
-                group_2_neighbors = [j for j in G.neighbors(i) if j in n2]
-
+            for i in lonely:
                 # increase the degree of the node in group 1, while decreasing the degree of a member of group 2 at random
-                if len(group_2_neighbors) == 0:
+                j = rng.integers(n_2)
+                cross[i, j] = True
 
-                    random_group_2_j = np.random.choice(n2)
-                    random_group_2_neighbors = [ii for ii in G.neighbors(random_group_2_j) if ii in n2]
+                # if the group 2 person has an edge they can cut to their own group, remove it
+                group_2_neighbors = np.flatnonzero(adjacency_2[j])
+                if len(group_2_neighbors) > 0:
+                    k = rng.choice(group_2_neighbors)
+                    adjacency_2[j, k] = adjacency_2[k, j] = False
 
-                    # add an edge to random_group_2_j
-                    G.add_edge(i, random_group_2_j)
+        edges_2 = np.stack(np.nonzero(np.triu(adjacency_2, 1)), axis=1)
 
-                    # if the group 2 person has an edge they can cut to their own group, remove it
-                    if len(random_group_2_neighbors) > 0:
-                        random_group_2_neighbor_cut = np.random.choice(random_group_2_neighbors)
-                        G.remove_edge(random_group_2_j, random_group_2_neighbor_cut)
-
-    E = G.edges()
-    for e in E:
-        i, j = e
-
-        id_i = group[i]
-        id_j = group[j]
-
-        popdict[id_i]['contacts'][setting].add(id_j)
-        popdict[id_j]['contacts'][setting].add(id_i)
-
-    return popdict
+    cross_edges = np.stack(np.nonzero(cross), axis=1) + [0, n_1]
+    return np.concatenate([edges_1, edges_2 + n_1, cross_edges]).astype(np.int64)
 
 
 def get_contact_counts_by_layer(popdict, layer='S', with_layer_ids=False):
@@ -474,42 +592,47 @@ def get_contact_counts_by_layer(popdict, layer='S', with_layer_ids=False):
     else:
         raise NotImplementedError(f"layer {layer} not supported.")
 
+    # work on the columnar arrays: role flags, layer ids, and CSR contacts by uid
+    if isinstance(popdict, sparr.PopDictView):
+        arrays = popdict.arrays
+    else:
+        arrays = sparr.PopulationArrays.from_popdict(popdict, layer_keys=[layer], columns=[layer_keys[layer]] + people_types)
+    layer_ids = arrays[layer_keys[layer]]
+    in_layer = layer_ids >= 0
+    all_counts = arrays.degree(layer)
+
+    # count each person's contacts of each role in one sweep over the edges of the layer
+    role_counts = dict()
+    if layer in ['S', 'LTCF']:
+        csr = arrays.contacts[layer]
+        sources = np.repeat(np.arange(arrays.n), np.diff(csr.indptr))
+        for k in people_types:
+            role_counts[k] = np.bincount(sources, weights=arrays[k][csr.indices], minlength=arrays.n).astype(int)
+        if layer == 'S':
+            role_counts['all_staff'] = role_counts['sc_teacher'] + role_counts['sc_staff']
+
     # initialize the contact counter between each people type and contact type as empty list
     contact_counter = {k: dict(zip(contact_types, ([] for _ in contact_types))) for k in
                        dict.fromkeys(people_types)}
-    # index_switcher is a case-switch selector for the person selected by its type
-    index_switcher = {k: contact_counter[k] for k in people_types}
-
-    # also store all contacts count per layer id in contacts_counter_by_id
-    contacts_counter_by_id = dict()
-    for uid, person in popdict.items():
-        if person[layer_keys[layer]] is not None:
-            # count_switcher is a case-switch selector for contact counts by type
-            count_switcher = {
-                'sc_student': len([c for c in person["contacts"]["S"] if popdict[c]['sc_student']]),
-                'sc_teacher': len([c for c in person["contacts"]["S"] if popdict[c]['sc_teacher']]),
-                'sc_staff': len([c for c in person["contacts"]["S"] if popdict[c]['sc_staff']]),
-                'ltcf_res': len([c for c in person["contacts"]["LTCF"] if popdict[c]['ltcf_res']]),
-                'ltcf_staff': len([c for c in person["contacts"]["LTCF"] if popdict[c]['ltcf_staff']]),
-                'all_staff': len([c for c in person["contacts"]["S"] if popdict[c]['sc_teacher']]) + len([c for c in person["contacts"]["S"] if popdict[c]['sc_staff']]),
-                'all': len([c for c in person["contacts"][layer]])
-            }
-
-            contacts_counter_by_id.setdefault(person[layer_keys[layer]], [])
-            for k1 in people_types:
-                # if this person does not belong to a particular key, we don't need to store the counts under this key
-                if person.get(k1) is not None:
-                    # store sc_teacher, sc_student, sc_staff, all_staff and all below
-                    if layer == "S":
-                        for k2 in people_types:
-                            index_switcher.get(k1)[k2].append(count_switcher.get(k2))
-                        index_switcher.get(k1)["all_staff"].append(
-                            count_switcher.get('sc_teacher') + count_switcher.get('sc_staff'))
-                    # for other types, only all contacts are stored
-                    index_switcher.get(k1)["all"].append(count_switcher.get('all'))
-            if with_layer_ids:
-                contacts_counter_by_id[person[layer_keys[layer]]].append(count_switcher.get('all'))
+    for k1 in people_types:
+        # if this person does not belong to a particular key, we don't need to store the counts under this key
+        members = in_layer & (arrays[k1] if k1 in sparr.flag_keys else in_layer)
+        # store sc_teacher, sc_student, sc_staff, all_staff and all below
+        if layer == 'S':
+            for k2 in people_types + ['all_staff']:
+                contact_counter[k1][k2] = role_counts[k2][members].tolist()
+        # for other types, only all contacts are stored
+        contact_counter[k1]['all'] = all_counts[members].tolist()
+
     if with_layer_ids:
+        # also store all contacts count per layer id in contacts_counter_by_id, with layer ids in order of first appearance
+        ids = layer_ids[in_layer]
+        counts = all_counts[in_layer]
+        order = np.argsort(ids, kind='stable')
+        unique_ids, starts = np.unique(ids[order], return_index=True)
+        groups = np.split(counts[order], starts[1:])
+        first_seen = np.argsort(order[starts], kind='stable')
+        contacts_counter_by_id = {int(unique_ids[i]): groups[i].tolist() for i in first_seen}
         return contact_counter, contacts_counter_by_id
     else:
         return contact_counter
@@ -610,9 +733,14 @@ def random_graph_model(uids, average_degree, seed=None):
     Args:
         uids (list, np.ndarray) : a list or array of the ids of people in the graph
         average_degree (float)  : the average degree in the generated graph
+        seed (int)              : If given, seed for the random number generator; otherwise, draw from np.random
 
     Returns:
-        nx.Graph : Fast implementation of the Erdos-Renyi random graph model.
+        nx.Graph : Erdos-Renyi random graph with nodes 0 to len(uids) - 1.
+
+    Notes:
+        To work with the edges directly, use random_graph_edges(), which does
+        not build a networkx graph.
     """
     N = len(uids)
     if N == 0:
@@ -620,15 +748,138 @@ def random_graph_model(uids, average_degree, seed=None):
 
     if average_degree >= N:
         log.debug(f"Desired average degree is greater than or equal to the number of nodes. This method does not support multi-edges; returning a fully connected graph.")
-        G = nx.complete_graph(N)
 
-    else:
-        p = average_degree / N
-        G = nx.fast_gnp_random_graph(N, p, seed=seed)
+    G = nx.Graph()
+    G.add_nodes_from(range(N))
+    G.add_edges_from(random_graph_edges(N, average_degree, seed=seed).tolist())
 
     return G
 
 
+def random_graph_edges(n, average_degree, seed=None):
+    """
+    Generate the edges of an Erdos-Renyi random graph of n nodes with the
+    expected average degree, without networkx. The graph is G(n, p) with
+    p = average_degree / n, or a complete graph if average_degree >= n.
+
+    Args:
+        n (int)                : the number of nodes
+        average_degree (float) : the average degree in the generated graph
+        seed (int)             : If given, a seed for a new random number generator, or the np.random.Generator to draw from; otherwise, draw from np.random
+
+    Returns:
+        np.ndarray: An (E, 2) array of edges (i, j) between nodes 0 to n - 1, with i < j.
+    """
+    return get_random_graph_edges([n], average_degree, seed=seed)
+
+
+def get_random_graph_edges(group_sizes, average_degree, seed=None, return_offsets=False):
+    """
+    Generate Erdos-Renyi random graphs for many groups at once, without
+    networkx. Each group of N nodes is a G(N, p) random graph with
+    p = average_degree / N, or a complete graph if average_degree >= N, as in
+    random_graph_edges().
+
+    Args:
+        group_sizes (list, np.ndarray) : the number of nodes in each group
+        average_degree (float)         : the average degree in each generated graph
+        seed (int)                     : If given, a seed for a new random number generator, or the np.random.Generator to draw from; otherwise, draw from np.random
+        return_offsets (bool)          : If True, also return the offset of each group's edges in the edge array
+
+    Returns:
+        np.ndarray: An (E, 2) array of edges, as indices into the
+        concatenation of all groups, so that the nodes of group g run from
+        offsets[g] to offsets[g] + group_sizes[g] - 1. If return_offsets is
+        True, the edges are ordered by group and an array of length
+        len(group_sizes) + 1 is also returned, such that the edges of group g
+        are edges[edge_offsets[g]:edge_offsets[g+1]].
+    """
+    rng = np.random if seed is None else np.random.default_rng(seed)
+
+    sizes = np.asarray(group_sizes, dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.int64)
+    n_pairs = sizes * (sizes - 1) // 2
+    p = np.where(average_degree >= sizes, 1.0, average_degree / np.maximum(sizes, 1))
+
+    # dense graphs: draw every possible edge
+    dense = np.flatnonzero((p >= 0.1) & (n_pairs > 0))
+    dense_groups = np.repeat(dense, n_pairs[dense])
+    dense_pair_starts = np.cumsum(n_pairs[dense]) - n_pairs[dense]
+    dense_pairs = np.arange(len(dense_groups)) - np.repeat(dense_pair_starts, n_pairs[dense])
+    keep = rng.random(len(dense_groups)) < p[dense_groups]
+    groups, pairs = [dense_groups[keep]], [dense_pairs[keep]]
+
+    # sparse graphs: draw the number of edges, then that many distinct edges
+    sparse = np.flatnonzero((p < 0.1) & (n_pairs > 0))
+    if len(sparse):
+        n_edges = rng.binomial(n_pairs[sparse], p[sparse])
+        key_offsets = np.cumsum(n_pairs[sparse]) - n_pairs[sparse]
+        keys = np.zeros(0, dtype=np.int64)
+        n_left = n_edges
+        while n_left.sum() > 0:
+            new_groups = np.repeat(np.arange(len(sparse)), n_left)
+            new_keys = key_offsets[new_groups] + (rng.random(len(new_groups)) * n_pairs[sparse][new_groups]).astype(np.int64)
+            keys = np.unique(np.concatenate([keys, new_keys]))
+            n_left = n_edges - np.bincount(np.searchsorted(key_offsets, keys, side='right') - 1, minlength=len(sparse))
+        sparse_groups = np.searchsorted(key_offsets, keys, side='right') - 1
+        groups.append(sparse[sparse_groups])
+        pairs.append(keys - key_offsets[sparse_groups])
+
+    groups, pairs = np.concatenate(groups), np.concatenate(pairs)
+    if return_offsets:
+        order = np.argsort(groups, kind='stable')
+        groups, pairs = groups[order], pairs[order]
+
+    # convert the index of each pair to the nodes (i, j), i < j, in the upper triangle of the adjacency matrix
+    j = ((1 + np.sqrt(1 + 8 * pairs.astype(np.float64))) // 2).astype(np.int64)
+    j[j * (j - 1) // 2 > pairs] -= 1
+    j[(j + 1) * j // 2 <= pairs] += 1
+    i = pairs - j * (j - 1) // 2
+    edges = np.stack([offsets[groups] + i, offsets[groups] + j], axis=1)
+
+    if return_offsets:
+        edge_offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(groups, minlength=len(sizes)), out=edge_offsets[1:])
+        return edges, edge_offsets
+    return edges
+
+
+def get_workplace_edges(workplace_by_uid_lists, average_degree, n_workers=None, chunk_size=100000, rng=None):
+    """
+    Generate the contacts in all workplaces as Erdos-Renyi random graphs.
+
+    Args:
+        workplace_by_uid_lists (list) : list of lists where each sublist is a workplace with the ids of workers
+        average_degree (float)        : the average degree in each workplace
+        n_workers (int)               : If given, generate the workplaces in chunks of about chunk_size workers, each with its own random number stream, across this many worker processes
+        chunk_size (int)              : the number of workers in each chunk when n_workers is given
+        rng (np.random.Generator)     : random number generator to draw from, or to seed the chunks from; see sp.get_rng()
+
+    Returns:
+        np.ndarray: An (E, 2) array of edges between worker ids.
+    """
+    log.debug('get_workplace_edges()')
+    rng = spsamp.get_rng(rng)
+    sizes = np.array([len(workplace) for workplace in workplace_by_uid_lists], dtype=np.int64)
+    uids = np.array([uid for workplace in workplace_by_uid_lists for uid in workplace], dtype=np.int64)
+
+    if n_workers is None:
+        edges = get_random_graph_edges(sizes, average_degree, seed=rng)
+
+    else:
+        # split the workplaces into chunks that do not depend on the number of workers so the result does not either
+        ends = np.cumsum(sizes)
+        bounds = np.unique(np.concatenate(([0], np.searchsorted(ends, np.arange(chunk_size, ends[-1] if len(ends) else 0, chunk_size)), [len(sizes)])))
+        seeds = rng.integers(2**31, size=len(bounds) - 1)
+        chunks = [dict(group_sizes=sizes[b0:b1], seed=int(seed)) for b0, b1, seed in zip(bounds[:-1], bounds[1:], seeds)]
+        chunk_edges = sc.parallelize(get_random_graph_edges, iterkwargs=chunks, kwargs=dict(average_degree=average_degree), ncpus=n_workers, serial=n_workers <= 1) if len(chunks) else []
+
+        chunk_offsets = np.concatenate(([0], ends))[bounds[:-1]]
+        edges = np.concatenate([e + offset for e, offset in zip(chunk_edges, chunk_offsets)] + [np.zeros((0, 2), dtype=np.int64)])
+
+    return uids[edges].reshape((-1, 2))
+
+
 def get_expected_density(average_degree, n_nodes):
     """
     Calculate the expected density of an undirected graph with no self-loops
@@ -122,6 +122,46 @@ def calculate_location_filepath(location, state_location, country_location):
     return filepath
 
 
+# Process-wide cache of fully resolved location data objects, see load_location()
+_location_cache = {}
+
+# Process-wide cache of the inputs derived from the location data, see get_population_inputs()
+_inputs_cache = {}
+
+
+def get_location_cache_key(specific_location, state_location, country_location, location_filepath):
+    """
+    Get the key used to cache the location data object loaded from
+    location_filepath. The key includes the data directory and the modification
+    time of the file so that edited or relocated data are reloaded.
+
+    Args:
+        specific_location (string) : name of the location
+        state_location (string)    : name of the state the location is in
+        country_location (string)  : name of the country the location is in
+        location_filepath (str)    : file path to the location data, relative to the data directory
+
+    Returns:
+        tuple: The cache key (datadir, location, state_location, country_location, mtime).
+    """
+    datadir = get_relative_path(defaults.settings.datadir)
+    mtime = os.path.getmtime(os.path.join(datadir, location_filepath))
+    return (datadir, specific_location, state_location, country_location, mtime)
+
+
+def clear_location_cache():
+    """
+    Clear the cache of location data objects so that the next call to
+    load_location() reads the data from disk again. Needed if parent location
+    files are edited, as only the modification time of the location file itself
+    is checked. Also clears the inputs derived from the location data, see
+    get_population_inputs().
+    """
+    _location_cache.clear()
+    _inputs_cache.clear()
+    return
+
+
 def load_location(specific_location, state_location, country_location, revert_to_default=None):
     """
     Loading json object for the location data.
@@ -134,12 +174,21 @@ def load_location(specific_location, state_location, country_location, revert_to
 
     Returns:
         str: A filename for where the location data reside.
+
+    Notes:
+        Location data objects are cached for the lifetime of the process, so
+        the same object is returned for repeated calls and should be treated as
+        read-only. Use sp.clear_location_cache() to force a reload.
     """
     if revert_to_default is None:
         revert_to_default = False
     location_filepath = calculate_location_filepath(specific_location, state_location, country_location)
     try:
+        key = get_location_cache_key(specific_location, state_location, country_location, location_filepath)
+        if key in _location_cache:
+            return _location_cache[key]
         location_object = data.load_location_from_filepath(location_filepath)
+        _location_cache[key] = location_object
         logger.debug(f"Loaded (location, state_location, country_location) = "
                      f"({specific_location}, {state_location}, {country_location}) "
                      f"from [{location_filepath}]")
@@ -408,6 +457,103 @@ def get_census_age_brackets(datadir=None, location=None, state_location=None, co
     return age_brackets
 
 # TODO: still open question on how to handle these.
+# Setting codes and the name of each setting in the MUestimates contact matrix files
+contact_matrix_settings = {'H': 'home', 'S': 'school', 'W': 'work', 'C': 'other_locations'}
+
+# Compiled store of the contact matrices of all countries and settings in the data directory, see compile_contact_matrices()
+contact_matrix_store = 'contact_matrices.npz'
+
+# Process-wide cache of contact matrices read from the data directory, see get_contact_matrix()
+_contact_matrix_cache = {}
+
+
+def read_contact_matrices(datadir, setting_code):
+    """
+    Read the contact matrices of all countries for a setting from the pickled
+    MUestimates data, or from the Excel files if the pickled data are not
+    available.
+
+    Args:
+        datadir (string)      : file path to the data directory
+        setting_code (string) : name of the physial contact setting: H for households, S for schools, W for workplaces, C for community or other
+
+    Returns:
+        dict: The contact matrix of each country keyed by sheet name.
+    """
+    base_dir = get_relative_path(datadir)
+    file_path = os.path.join(base_dir, 'MUestimates_' + contact_matrix_settings[setting_code] + '_1.xlsx')
+    try:
+        return sc.loadobj(file_path.replace('_1.xlsx', '.obj'))
+    except Exception as E:
+        logger.warning(f'Could not load pickled contact matrices ({str(E)}), reading the Excel files instead.')
+        matrices = {}
+        for path, header in [(file_path, 0), (file_path.replace('_1.xlsx', '_2.xlsx'), None)]:
+            for sheet_name, df in pd.read_excel(path, sheet_name=None, header=header).items():
+                matrices[sheet_name] = np.array(df)
+        return matrices
+
+
+def compile_contact_matrices(datadir=None, filename=None):
+    """
+    Compile the contact matrices of all countries and settings into a single
+    indexed .npz store, with one entry per setting and sheet named
+    '<setting_code>/<sheet_name>', so that get_contact_matrix() only reads the
+    matrix it needs. Rerun when the MUestimates data change.
+
+    Args:
+        datadir (string)  : file path to the data directory; defaults to sp.settings.datadir
+        filename (string) : file path of the store; defaults to contact_matrix_store in the data directory
+
+    Returns:
+        str: The file path of the store.
+    """
+    if datadir is None:
+        datadir = defaults.settings.datadir
+    if filename is None:
+        filename = os.path.join(get_relative_path(datadir), contact_matrix_store)
+
+    entries = {}
+    for setting_code in contact_matrix_settings:
+        for sheet_name, matrix in read_contact_matrices(datadir, setting_code).items():
+            entries[f'{setting_code}/{sheet_name}'] = np.asarray(matrix, dtype=np.float64)
+    np.savez(filename, **entries)
+    clear_contact_matrix_cache()
+    logger.debug(f'Compiled {len(entries)} contact matrices to {filename}.')
+    return filename
+
+
+def clear_contact_matrix_cache():
+    """
+    Clear the cache of contact matrices so that the next call to
+    get_contact_matrix() reads them from disk again.
+    """
+    _contact_matrix_cache.clear()
+    return
+
+
+def load_contact_matrix(datadir, setting_code, sheet_name):
+    """
+    Load the contact matrix for a setting and sheet from the compiled store in
+    the data directory, falling back to the pickled or Excel MUestimates data
+    if the store does not have it.
+
+    Args:
+        datadir (string)      : file path to the data directory
+        setting_code (string) : name of the physial contact setting: H for households, S for schools, W for workplaces, C for community or other
+        sheet_name (string)   : name of the sheet in the excel file with contact patterns
+
+    Returns:
+        ndarray: The contact matrix.
+    """
+    store_path = os.path.join(get_relative_path(datadir), contact_matrix_store)
+    try:
+        with np.load(store_path) as store:
+            return store[f'{setting_code}/{sheet_name}']
+    except (FileNotFoundError, KeyError):
+        logger.debug(f'Contact matrix ({setting_code}, {sheet_name}) is not in the compiled store {store_path}.')
+    return read_contact_matrices(datadir, setting_code)[sheet_name]
+
+
 def get_contact_matrix(datadir, setting_code, sheet_name=None, file_path=None, delimiter=' ', header=None):
     """
     Get setting specific age contact matrix given sheet name to use. If
@@ -428,30 +574,21 @@ def get_contact_matrix(datadir, setting_code, sheet_name=None, file_path=None, d
         then the contact rate, number, or frequency for the average individual
         in age bracket i with all of their contacts in age bracket j in that
         physical contact setting.
+
+    Notes:
+        Matrices from the data directory are read from the compiled store (see
+        sp.compile_contact_matrices()) and cached for the lifetime of the
+        process by data directory, sheet name, and setting; each call returns a
+        copy. Use sp.clear_contact_matrix_cache() to force a reload.
     """
     if file_path is None:
-        setting_names = {'H': 'home', 'S': 'school', 'W': 'work', 'C': 'other_locations'}
-        base_dir = get_relative_path(datadir)
-
-        if setting_code in setting_names:
-            file_path = os.path.join(base_dir, 'MUestimates_' + setting_names[setting_code] + '_1.xlsx')
-
-            try: # Shortcut: use pre-processed data
-                obj_path = file_path.replace('_1.xlsx', '.obj').replace('_2.xlsx', '.obj')
-                data = sc.loadobj(obj_path)
-                arr = data[sheet_name]
-                return arr
-            except Exception as E:
-                errormsg = f'Warning: could not load pickled data ({str(E)}), defaulting to Excel...'
-                print(errormsg)
-                try:
-                    df = pd.read_excel(file_path, sheet_name=sheet_name, header=0)
-                except:
-                    file_path = file_path.replace('_1.xlsx', '_2.xlsx')
-                    df = pd.read_excel(file_path, sheet_name=sheet_name, header=None)
-                return np.array(df)
-        else:
+        if setting_code not in contact_matrix_settings:
             raise NotImplementedError("Invalid setting code. Try again.")
+
+        key = (get_relative_path(datadir), sheet_name, setting_code)
+        if key not in _contact_matrix_cache:
+            _contact_matrix_cache[key] = load_contact_matrix(datadir, setting_code, sheet_name)
+        return _contact_matrix_cache[key].copy()
     else:
         try:
             df = pd.read_csv(file_path, delimiter=delimiter, header=header)
@@ -459,6 +596,52 @@ def get_contact_matrix(datadir, setting_code, sheet_name=None, file_path=None, d
         except:
             raise NotImplementedError("Contact matrix did not open. Check inputs.")
 
+
+def get_population_inputs(datadir=None, location=None, state_location=None, country_location=None, use_default=False, sheet_name=None, window_length=7):
+    """
+    Get the inputs shared by every population generated for a location: the
+    expected single year age distribution, the census age brackets, and the
+    contact matrices with their age brackets.
+
+    Args:
+        datadir (string)          : file path to the data directory
+        location (string)         : name of the location
+        state_location (string)   : name of the state the location is in
+        country_location (string) : name of the country the location is in
+        use_default (bool)        : if True, try to first use the other parameters to find data specific to the location under study, otherwise returns default data drawing from settings.location, settings.state_location, settings.country_location.
+        sheet_name (string)       : name of the sheet in the excel file with contact patterns
+        window_length (int)       : length of window over which to average or smooth out age distribution
+
+    Returns:
+        sc.objdict: Dictionary of the expected age distribution (expected_age_dist and expected_age_dist_values), the age brackets (age_brackets and age_by_brackets), and the contact matrices (contact_matrices, cm_age_brackets, and cm_age_by_brackets).
+
+    Notes:
+        The inputs are cached for the lifetime of the process by location,
+        data settings, sheet name, and window length, so the same object is
+        returned for repeated calls and should be treated as read-only. Use
+        sp.clear_location_cache() to force a reload.
+    """
+    loc_pars = dict(datadir=datadir, location=location, state_location=state_location, country_location=country_location, use_default=use_default)
+    key = (get_relative_path(datadir), location, state_location, country_location, use_default, sheet_name, window_length, defaults.settings.nbrackets)
+    if key in _inputs_cache:
+        return _inputs_cache[key]
+
+    inputs = sc.objdict()
+    inputs.expected_age_dist = get_smoothed_single_year_age_distr(**loc_pars, window_length=window_length)
+    inputs.expected_age_dist_values = [inputs.expected_age_dist[a] for a in inputs.expected_age_dist]
+
+    inputs.age_brackets = get_census_age_brackets(**loc_pars)
+    inputs.age_by_brackets = spb.get_age_by_brackets(inputs.age_brackets)
+
+    inputs.contact_matrices = get_contact_matrices(datadir, sheet_name=sheet_name)
+    contact_matrix_row = inputs.contact_matrices[list(inputs.contact_matrices.keys())[0]].shape[0]  # age brackets that match the contact matrices
+    inputs.cm_age_brackets = get_census_age_brackets(**loc_pars, nbrackets=contact_matrix_row)
+    inputs.cm_age_by_brackets = spb.get_age_by_brackets(inputs.cm_age_brackets)
+
+    _inputs_cache[key] = inputs
+    return inputs
+
+
 # TODO: still open question on how to handle these.
 def get_contact_matrices(datadir=None, sheet_name=None, file_path_dic=None, delimiter=' ', header=None, use_default=False):
     # need review for additional countries
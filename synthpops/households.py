@@ -4,6 +4,7 @@ Functions for generating households
 
 import sciris as sc
 import numpy as np
+import numba as nb
 import pandas as pd
 from collections import Counter
 from .config import logger as log, checkmem
@@ -11,6 +12,7 @@ from . import base as spb
 from . import sampling as spsamp
 from . import ltcfs as spltcf
 from . import data_distributions as spdata
+from . import arrays as sparr
 
 
 class Household(spb.LayerGroup):
@@ -128,42 +130,41 @@ def populate_households(pop, households, age_by_uid):
         pop (sp.Pop)      : population
         households (list) : list of lists where each sublist represents a household and contains the ids of the household members
         age_by_uid (dict) : dictionary mapping each person's id to their age
-    """
-    # initialize an empty set of households
-    # if previously you had 10 households and now you want to repopulate with
-    # this method and only supply 5 households, this method will overwrite the list to produce only 5 households
-    initialize_empty_households(pop, len(households))
 
+    Notes:
+        The households are stored as a sp.GroupTable; each sp.Household object
+        is only created when it is first accessed. Any existing households are
+        replaced.
+    """
     log.debug("Populating households.")
 
-    # now populate households
-    for nh, hh in enumerate(households):
-        kwargs = dict(hhid=nh,
-                      member_uids=hh,
-                      reference_uid=hh[0],  # by default, the reference person is the first in the household in synthpops - with vital dynamics this may change
-                      reference_age=age_by_uid[hh[0]]
-                      )
-        household = Household()
-        household.set_layer_group(**kwargs)
-        pop.households[household['hhid']] = sc.dcp(household)
-
+    # by default, the reference person is the first in the household in synthpops - with vital dynamics this may change
+    reference_uids = [hh[0] for hh in households]
+    pop.households = sparr.GroupTable.from_lists(Household, len(households),
+                                                 ragged=dict(member_uids=households),
+                                                 columns=dict(hhid=np.arange(len(households)),
+                                                              reference_uid=reference_uids,
+                                                              reference_age=[age_by_uid[uid] for uid in reference_uids]))
+    pop.n_households = len(pop.households)
     pop.populate = True
 
     return
 
 
-def generate_household_size_count_from_fixed_pop_size(N, hh_size_distr):
+def generate_household_size_count_from_fixed_pop_size(N, hh_size_distr, rng=None):
     """
     Given a number of people and a household size distribution, generate the number of homes of each size needed to place everyone in a household.
 
     Args:
         N      (int)         : The number of people in the population.
         hh_size_distr (dict) : The distribution of household sizes.
+        rng (np.random.Generator) : random number generator for this stage; see sp.get_rng()
 
     Returns:
         An array with the count of households of size s at index s-1.
     """
     log.debug('generate_household_size_count_from_fixed_pop_size()')
+    rng = spsamp.get_rng(rng)
     # Quickly produce number of expected households for a population of size N
     ss = np.sum([hh_size_distr[s] * s for s in hh_size_distr])
     f = N / np.round(ss, 1)
@@ -183,7 +184,7 @@ def generate_household_size_count_from_fixed_pop_size(N, hh_size_distr):
 
         people_to_add = -people_to_add_or_remove
         while people_to_add > 0:
-            new_household_size = np.random.choice(hh_size_keys, p=hh_size_distr_array)
+            new_household_size = rng.choice(hh_size_keys, p=hh_size_distr_array)
 
             if new_household_size > people_to_add:
                 new_household_size = people_to_add
@@ -196,7 +197,7 @@ def generate_household_size_count_from_fixed_pop_size(N, hh_size_distr):
         people_to_remove = people_to_add_or_remove
         while people_to_remove > 0:
 
-            new_household_size_to_remove = np.random.choice(hh_size_keys, p=hh_size_distr_array)
+            new_household_size_to_remove = rng.choice(hh_size_keys, p=hh_size_distr_array)
             if new_household_size_to_remove > people_to_remove:
                 new_household_size_to_remove = people_to_remove
 
@@ -261,7 +262,7 @@ def generate_age_count(n, age_distr):
     return age_count
 
 
-def generate_age_count_multinomial(n, age_distr):
+def generate_age_count_multinomial(n, age_distr, rng=None):
     """
     Generate a stochastic count of people for each age given the age
     distribution (age_distr) and number of people to generate (n).
@@ -269,17 +270,19 @@ def generate_age_count_multinomial(n, age_distr):
     Args:
         n (int)                        : number of people to generate
         age_distr (list or np.ndarray) : single year age distribution
+        rng (np.random.Generator)      : random number generator for this stage; see sp.get_rng()
 
     Returns:
         dict: A dictionary with the count of people to generate for each age
         given an age distribution and the number of people to generate.
     """
     log.debug('generate_age_count_multinomial()')
-    age_count = np.random.multinomial(n, age_distr)
+    rng = spsamp.get_rng(rng)
+    age_count = rng.multinomial(n, age_distr)
     return dict(zip(range(len(age_distr)), age_count))
 
 
-def generate_household_head_ages(household_sizes, hha_by_size, hha_brackets, ages_left_to_assign):
+def generate_household_head_ages(household_sizes, hha_by_size, hha_brackets, ages_left_to_assign, rng=None):
     """
     Generate the head of household ages conditional on household size and the
     expected ages of people in the population.
@@ -289,23 +292,25 @@ def generate_household_head_ages(household_sizes, hha_by_size, hha_brackets, age
         hha_by_size (matrix)       : A matrix in which each row contains the age distribution of the reference person for household size s at index s-1.
         hha_brackets (dict)        : The age brackets for the heads of household.
         ages_left_to_assign (dic)  : The counter of ages for the generated population left to place in a residence
+        rng (np.random.Generator)  : random number generator to draw from; see sp.get_rng()
 
     Returns:
         An array of head of household ages, updated counter of the ages in the
         population left to place in a residence.
     """
+    rng = spsamp.get_rng(rng)
     household_head_ages = []
 
     for nh, hs in enumerate(household_sizes):
         hs_distr = hha_by_size[hs - 1, :]
-        hbi = spsamp.fast_choice(hs_distr)
+        hbi = spsamp.fast_choice(hs_distr, rng=rng)
         hbi_distr = np.array([ages_left_to_assign[a] for a in hha_brackets[hbi]])
 
         while sum(hbi_distr) == 0: # pragma: no cover
-            hbi = spsamp.fast_choice(hs_distr)
+            hbi = spsamp.fast_choice(hs_distr, rng=rng)
             hbi_distr = np.array([ages_left_to_assign[a] for a in hha_brackets[hbi]])
 
-        hha = hha_brackets[hbi][spsamp.fast_choice(hbi_distr)]
+        hha = hha_brackets[hbi][spsamp.fast_choice(hbi_distr, rng=rng)]
         ages_left_to_assign[hha] -= 1
 
         household_head_ages.append(hha)
@@ -314,7 +319,7 @@ def generate_household_head_ages(household_sizes, hha_by_size, hha_brackets, age
     return household_head_ages, ages_left_to_assign
 
 
-def generate_household_sizes(hh_sizes):
+def generate_household_sizes(hh_sizes, rng=None):
     """
     Create a list of the household sizes in random order so that as individuals
     are placed by age into homes running out of specific ages is not
@@ -322,81 +327,147 @@ def generate_household_sizes(hh_sizes):
     greatly outnumber households of other sizes.
 
     Args:
-        hh_sizes (array) : The count of household size s at index s-1.
+        hh_sizes (array)          : The count of household size s at index s-1.
+        rng (np.random.Generator) : random number generator to draw from; see sp.get_rng()
 
     Returns:
         Np.array: An array of household sizes to be generated and place people
         into households.
     """
+    rng = spsamp.get_rng(rng)
     household_sizes = []
     for hs in range(1, len(hh_sizes) + 1):
         household_sizes.extend([hs] * hh_sizes[hs - 1])
     household_sizes = np.array(household_sizes)
-    np.random.shuffle(household_sizes)
+    rng.shuffle(household_sizes)
     return household_sizes
 
 
-def generate_larger_households_fixed_ages(larger_hh_size_array, larger_hha_chosen, hha_brackets, cm_age_brackets, cm_age_by_brackets, household_matrix, ages_left_to_assign, homes_dic):
+@nb.njit(cache=True)
+def _fast_choice_nb(weights):
+    """Numba version of sampling.fast_choice() for an array of weights."""
+    total = 0.0
+    for w in weights:
+        total += w
+    target = np.random.random() * total
+    cum = 0.0
+    for i in range(len(weights) - 1):
+        cum += weights[i]
+        if cum > target:
+            return i
+    return len(weights) - 1
+
+
+@nb.njit(cache=True)
+def _fill_households_fixed_ages(sizes, heads, head_brackets, ages_left, household_matrix, bracket_min, bracket_max, seed):
     """
-    Assign people to households larger than one person (excluding special
-    residences like long term care facilities or agricultural workers living in
-    shared residential quarters).
+    Numba kernel for generate_larger_households_fixed_ages(). Fills the ages of
+    all household members other than the reference person, drawing them
+    without replacement from ages_left.
 
     Args:
-        hh_sizes (array)              : The count of household size s at index s-1.
-        hha_by_size (matrix)          : A matrix in which each row contains the age distribution of the reference person for household size s at index s-1.
-        hha_brackets (dict)           : The age brackets for the heads of household.
-        cm_age_brackets (dict)        : The age brackets for the contact matrix.
-        cm_age_by_brackets (dict)     : A dictionary mapping age to the age bracket range it falls within.
-        household_matrix (dict)       : The age-specific contact matrix for the household ontact setting.
-        ages_left_to_assign (dict)    : Age count of people left to place in households larger than one person.
+        sizes (np.ndarray)            : size of each household
+        heads (np.ndarray)            : age of the reference person of each household
+        head_brackets (np.ndarray)    : contact matrix age bracket of the reference person of each household
+        ages_left (np.ndarray)        : count of people left to place at each age; modified in place
+        household_matrix (np.ndarray) : household contact matrix; columns of brackets with no one left are set to 0 in place
+        bracket_min (np.ndarray)      : minimum age of each contact matrix age bracket
+        bracket_max (np.ndarray)      : maximum age of each contact matrix age bracket
+        seed (int)                    : seed for the random number generator
 
     Returns:
-        dict: A dictionary of households by age indexed by household size.
+        np.ndarray: The ages of all household members, one household after another.
     """
+    np.random.seed(seed)
 
-    # go through every household and assign the ages of the other household members from those left to place
-    for nh, hs in enumerate(larger_hh_size_array):
+    nbrackets = len(bracket_min)
+    bracket_left = np.zeros(nbrackets, dtype=np.int64)
+    for bi in range(nbrackets):
+        bracket_left[bi] = ages_left[bracket_min[bi]:bracket_max[bi] + 1].sum()
+    matrix_total = household_matrix.sum()
 
-        hha = larger_hha_chosen[nh]
-        b = cm_age_by_brackets[hha]
+    offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(sizes)
+    homes = np.zeros(offsets[-1], dtype=np.int64)
 
-        home = np.zeros(hs)
-        home[0] = hha
+    for nh in range(len(sizes)):
+        b = head_brackets[nh]
+        homes[offsets[nh]] = heads[nh]
 
-        for nj in range(1, hs):
+        for nj in range(1, sizes[nh]):
 
             # can no longer place anyone in households where b is the age bracket of the head since those people are no longer available
-            if np.sum(household_matrix[b, :]) == 0: # pragma: no cover
+            if household_matrix[b, :].sum() == 0:
                 break
 
-            bi = spsamp.fast_choice(household_matrix[b, :])
-
-            a_prob = np.array([ages_left_to_assign[a] for a in cm_age_brackets[bi]])
-            if np.sum(a_prob) == 0:  # must check if all zeros since sp.fast_choice will not check
+            bi = _fast_choice_nb(household_matrix[b, :])
+            while bracket_left[bi] == 0:
                 household_matrix[:, bi] = 0  # turn off this part of the matrix
+                matrix_total = household_matrix.sum()
+                if matrix_total == 0 or household_matrix[b, :].sum() == 0:
+                    break
+                bi = _fast_choice_nb(household_matrix[b, :])
 
-            # entire matrix has been turned off, can no longer select anyone
-            if np.sum(household_matrix) == 0: # pragma: no cover
+            # entire matrix has been turned off, or no one is left for the brackets mixing with b
+            if bracket_left[bi] == 0:
                 break
 
-            # must check if all zeros since sp.fast_choice will not check
-            while np.sum(a_prob) == 0: # pragma: no cover
-                bi = spsamp.fast_choice(household_matrix[b, :])
-                a_prob = np.array([ages_left_to_assign[a] for a in cm_age_brackets[bi]])
+            aj = bracket_min[bi] + _fast_choice_nb(ages_left[bracket_min[bi]:bracket_max[bi] + 1].astype(np.float64))
+            ages_left[aj] -= 1
+            bracket_left[bi] -= 1
 
-                # must check if all zeros sine sp.fast_choice will not check
-                if np.sum(a_prob) == 0: # pragma: no cover
-                    household_matrix[:, bi] = 0
+            homes[offsets[nh] + nj] = aj
 
-            aj = cm_age_brackets[bi][spsamp.fast_choice(a_prob)]
-            ages_left_to_assign[aj] -= 1
+    return homes
 
-            home[nj] = aj
-        homes_dic[hs].append(home)
 
+def generate_larger_households_fixed_ages(larger_hh_size_array, larger_hha_chosen, hha_brackets, cm_age_brackets, cm_age_by_brackets, household_matrix, ages_left_to_assign, homes_dic, seed=None, rng=None):
+    """
+    Assign people to households larger than one person (excluding special
+    residences like long term care facilities or agricultural workers living in
+    shared residential quarters). The households are filled by a Numba-compiled
+    kernel.
+
+    Args:
+        larger_hh_size_array (array)  : The size of each household larger than one person.
+        larger_hha_chosen (array)     : The age of the reference person of each household larger than one person.
+        hha_brackets (dict)           : The age brackets for the heads of household.
+        cm_age_brackets (dict)        : The age brackets for the contact matrix.
+        cm_age_by_brackets (dict)     : A dictionary mapping age to the age bracket range it falls within.
+        household_matrix (dict)       : The age-specific contact matrix for the household ontact setting.
+        ages_left_to_assign (dict)    : Age count of people left to place in households larger than one person.
+        homes_dic (dict)              : A dictionary of households by age indexed by household size.
+        seed (int)                    : Seed for the kernel's random number generator; if None, drawn from rng.
+        rng (np.random.Generator)     : random number generator to draw the seed from; see sp.get_rng()
+
+    Returns:
+        dict: A dictionary of households by age indexed by household size.
+    """
+    if seed is None:
+        seed = spsamp.get_rng(rng).integers(1e9)
+
+    sizes = np.asarray(larger_hh_size_array, dtype=np.int64)
+    heads = np.asarray(larger_hha_chosen, dtype=np.int64)
+    head_brackets = np.array([cm_age_by_brackets[hha] for hha in heads], dtype=np.int64)
+    bracket_keys = sorted(cm_age_brackets.keys())
+    bracket_min = np.array([cm_age_brackets[k][0] for k in bracket_keys], dtype=np.int64)
+    bracket_max = np.array([cm_age_brackets[k][-1] for k in bracket_keys], dtype=np.int64)
+
+    ages_left = np.zeros(max(max(ages_left_to_assign.keys()), bracket_max.max()) + 1, dtype=np.int64)
+    for a, count in ages_left_to_assign.items():
+        ages_left[a] = count
+    matrix = np.ascontiguousarray(household_matrix, dtype=np.float64)
+
+    # go through every household and assign the ages of the other household members from those left to place
+    ages = _fill_households_fixed_ages(sizes, heads, head_brackets, ages_left, matrix, bracket_min, bracket_max, int(seed))
+    household_matrix[:] = matrix
+    for a in ages_left_to_assign:
+        ages_left_to_assign[a] = int(ages_left[a])
+
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
     for hs in homes_dic:
-        homes_dic[hs] = np.array(homes_dic[hs]).astype(int)
+        if hs > 1:
+            homes_dic[hs] = ages[offsets[sizes == hs][:, None] + np.arange(hs)].astype(int).reshape((-1, hs))
 
     # at this point everyone should have been placed into a home
     sum_remaining = sum(ages_left_to_assign.values())
@@ -404,7 +475,7 @@ def generate_larger_households_fixed_ages(larger_hh_size_array, larger_hha_chose
     return homes_dic, ages_left_to_assign
 
 
-def generate_all_households_fixed_ages(n_remaining, hh_sizes, hha_by_size, hha_brackets, cm_age_brackets, cm_age_by_brackets, contact_matrices, ages_left_to_assign):
+def generate_all_households_fixed_ages(n_remaining, hh_sizes, hha_by_size, hha_brackets, cm_age_brackets, cm_age_by_brackets, contact_matrices, ages_left_to_assign, rng=None):
     """
     Generate the ages of those living in households together. First create
     households of people living alone, then larger households. For households
@@ -425,6 +496,7 @@ def generate_all_households_fixed_ages(n_remaining, hh_sizes, hha_by_size, hha_b
         cm_age_by_brackets (dict) : The dictionary mapping age to the age bracket range it falls within matching the household contact matrix.
         contact_matrices (dict)     : The dictionary of the age-specific contact matrix for different physical contact settings.
         ages_left_to_assign (dict)    : Age count of people left to place in households larger than one person.
+        rng (np.random.Generator)     : random number generator for this stage; see sp.get_rng()
 
     Returns:
         An array of all households where each household is a row and the values
@@ -433,10 +505,11 @@ def generate_all_households_fixed_ages(n_remaining, hh_sizes, hha_by_size, hha_b
         shuffled by size.
     """
     log.debug('generate_all_households_fixed_ages()')
-    household_sizes = generate_household_sizes(hh_sizes)
+    rng = spsamp.get_rng(rng)
+    household_sizes = generate_household_sizes(hh_sizes, rng=rng)
 
     # generate the ages for heads of households or reference persons conditional on the household size and the age distribution
-    household_head_ages, ages_left_to_assign = generate_household_head_ages(household_sizes, hha_by_size, hha_brackets, ages_left_to_assign)
+    household_head_ages, ages_left_to_assign = generate_household_head_ages(household_sizes, hha_by_size, hha_brackets, ages_left_to_assign, rng=rng)
 
     homes_dic = dict()
 
@@ -454,19 +527,20 @@ def generate_all_households_fixed_ages(n_remaining, hh_sizes, hha_by_size, hha_b
     # work off a copy of the household mixing matrix
     household_matrix = sc.dcp(contact_matrices['H'])
 
-    homes_dic, ages_left_to_assign = generate_larger_households_fixed_ages(larger_household_sizes, heads_of_larger_households, hha_brackets, cm_age_brackets, cm_age_by_brackets, household_matrix, ages_left_to_assign, homes_dic)
-    homes = get_all_households(homes_dic)
+    homes_dic, ages_left_to_assign = generate_larger_households_fixed_ages(larger_household_sizes, heads_of_larger_households, hha_brackets, cm_age_brackets, cm_age_by_brackets, household_matrix, ages_left_to_assign, homes_dic, rng=rng)
+    homes = get_all_households(homes_dic, rng=rng)
 
     return homes_dic, homes
 
 
-def generate_larger_households_infer_ages(size, larger_household_sizes, heads_of_larger_households, hha_brackets, cm_age_brackets, cm_age_by_brackets, household_matrix, adjusted_age_dist, p=0.15):
+def generate_larger_households_infer_ages(size, larger_household_sizes, heads_of_larger_households, hha_brackets, cm_age_brackets, cm_age_by_brackets, household_matrix, adjusted_age_dist, p=0.15, rng=None):
     """
     Generate ages of those living in households of greater than one individual.
     Reference individual is sampled conditional on the household size. All other
     household members have their ages sampled conditional on the reference
     person's age and the age mixing contact matrix in households for the
-    population under study.
+    population under study. The ages of all members of all households of size
+    ``size`` are sampled at once.
 
     Args:
         size (int)                   : The household size.
@@ -477,6 +551,7 @@ def generate_larger_households_infer_ages(size, larger_household_sizes, heads_of
         cm_age_by_brackets (dict)    : The dictionary mapping age to the age bracket range it falls within matching the household contact matrix.
         household_matrix (dict)      : Age-specific contact matrix for contacts in the household setting.
         single_year_age_distr (dict) : The age distribution.
+        rng (np.random.Generator)    : random number generator to draw from; see sp.get_rng()
 
     Returns:
         An array of households for size ``size`` where each household is a row
@@ -484,6 +559,7 @@ def generate_larger_households_infer_ages(size, larger_household_sizes, heads_of
         first age in the row is the age of the reference individual.
     """
     log.debug('generate_larger_households_infer_ages()')
+    rng = spsamp.get_rng(rng)
     # calibrated to work for Seattle metro - use fixed_ages method for other populations
     # p = 0.15  # This is a placeholder value. Users will need to change this to fit whatever population they are working with if using this method
 
@@ -492,33 +568,36 @@ def generate_larger_households_infer_ages(size, larger_household_sizes, heads_of
     heads_of_this_size = heads_of_larger_households[household_size_mask]
 
     homes = np.zeros((len(households_of_this_size), size), dtype=int)
+    if len(households_of_this_size) == 0:
+        return homes
 
-    for nh in range(len(households_of_this_size)):
-
-        hha = heads_of_this_size[nh]
-
-        homes[nh][0] = hha
+    homes[:, 0] = heads_of_this_size
 
-        b = cm_age_by_brackets[hha]
-        b = min(b, household_matrix.shape[0] - 1)  # Ensure it doesn't go past the end of the array - likely not needed
-        b_prob = household_matrix[b, :]
+    # sample the age bracket of every other household member conditional on the age bracket of the reference person
+    b = np.array([cm_age_by_brackets[hha] for hha in heads_of_this_size])
+    b = np.minimum(b, household_matrix.shape[0] - 1)  # Ensure it doesn't go past the end of the array - likely not needed
+    b = np.repeat(b, size - 1)
+    bi = spsamp.sample_from_cdfs(spsamp.get_cdfs(list(household_matrix)), b, rng=rng)
 
-        for n in range(1, size):
-            bi = spsamp.sample_single_arr(b_prob)
-            ai = spsamp.sample_from_range(adjusted_age_dist, cm_age_brackets[bi][0], cm_age_brackets[bi][-1])  # sample from a range, defining the probabilities of the distribution and the minimum and maximum of the range
+    # sample ages within each bracket from the adjusted age distribution
+    bracket_min = np.array([cm_age_brackets[k][0] for k in sorted(cm_age_brackets.keys())])
+    bracket_cdfs = spsamp.get_cdfs([adjusted_age_dist[cm_age_brackets[k][0]:cm_age_brackets[k][-1] + 1] for k in sorted(cm_age_brackets.keys())])
+    ai = bracket_min[bi] + spsamp.sample_from_cdfs(bracket_cdfs, bi, rng=rng)
 
-            if ai > 5 and ai <= 20:  # This is a placeholder range. Users will need to change this to fit their whatever population they are working with if using this method
-                if np.random.binomial(1, p):
-                    ai = spsamp.sample_from_range(adjusted_age_dist, 25, 32)
+    # This is a placeholder range. Users will need to change this to fit their whatever population they are working with if using this method
+    young = (ai > 5) & (ai <= 20) & (rng.random(len(ai)) < p)
+    if young.any():
+        young_adult_cdfs = spsamp.get_cdfs([adjusted_age_dist[25:32 + 1]])
+        ai[young] = 25 + spsamp.sample_from_cdfs(young_adult_cdfs, np.zeros(young.sum(), dtype=int), rng=rng)
 
-            ai = spltcf.ltcf_resample_age(adjusted_age_dist, ai)
+    ai = spltcf.ltcf_resample_age_batch(adjusted_age_dist, ai, rng=rng)
 
-            homes[nh][n] = ai
+    homes[:, 1:] = ai.reshape((len(households_of_this_size), size - 1))
 
     return homes
 
 
-def generate_all_households_infer_ages(n, n_remaining, hh_sizes, hha_by_size, hha_brackets, cm_age_brackets, cm_age_by_brackets, contact_matrices, adjusted_age_dist, ages_left_to_assign):
+def generate_all_households_infer_ages(n, n_remaining, hh_sizes, hha_by_size, hha_brackets, cm_age_brackets, cm_age_by_brackets, contact_matrices, adjusted_age_dist, ages_left_to_assign, rng=None):
     """
     Generate the ages of those living in households together. First create
     households of people living alone, then larger households. For households
@@ -537,6 +616,7 @@ def generate_all_households_infer_ages(n, n_remaining, hh_sizes, hha_by_size, hh
         cm_age_by_brackets (dict)   : The dictionary mapping age to the age bracket range it falls within matching the household contact matrix.
         contact_matrices (dict)     : The dictionary of the age-specific contact matrix for different physical contact settings.
         ages_left_to_assign (dict)  : Age count of people left to place in households larger than one person.
+        rng (np.random.Generator)   : random number generator for this stage; see sp.get_rng()
 
     Returns:
         An array of all households where each household is a row and the values
@@ -572,10 +652,11 @@ def generate_all_households_infer_ages(n, n_remaining, hh_sizes, hha_by_size, hh
         in the overview documentation for more information.
     """
     log.debug('generate_all_households_infer_ages()')
-    household_sizes = generate_household_sizes(hh_sizes)
+    rng = spsamp.get_rng(rng)
+    household_sizes = generate_household_sizes(hh_sizes, rng=rng)
 
     # generate the ages for heads of households or reference persons conditional on the household size and the age distribution
-    household_head_ages, ages_left_to_assign = generate_household_head_ages(household_sizes, hha_by_size, hha_brackets, ages_left_to_assign)
+    household_head_ages, ages_left_to_assign = generate_household_head_ages(household_sizes, hha_by_size, hha_brackets, ages_left_to_assign, rng=rng)
 
     homes_dic = dict()
 
@@ -602,19 +683,20 @@ def generate_all_households_infer_ages(n, n_remaining, hh_sizes, hha_by_size, hh
 
     # generate the large households and ages of those people
     for size in range(2, len(hh_sizes) + 1):
-        homes_dic[size] = generate_larger_households_infer_ages(size, larger_household_sizes, heads_of_larger_households, hha_brackets, cm_age_brackets, cm_age_by_brackets, household_matrix, adjusted_age_dist_values)
+        homes_dic[size] = generate_larger_households_infer_ages(size, larger_household_sizes, heads_of_larger_households, hha_brackets, cm_age_brackets, cm_age_by_brackets, household_matrix, adjusted_age_dist_values, rng=rng)
 
-    homes = get_all_households(homes_dic)
+    homes = get_all_households(homes_dic, rng=rng)
 
     return homes_dic, homes
 
 
-def get_all_households(homes_dic):
+def get_all_households(homes_dic, rng=None):
     """
     Get all households in a list, randomly assorted.
 
     Args:
-        homes_dic (dict): A dictionary of households by age indexed by household size
+        homes_dic (dict)          : A dictionary of households by age indexed by household size
+        rng (np.random.Generator) : random number generator to draw from; see sp.get_rng()
 
     Returns:
         list: A random ordering of households with the ages of the individuals.
@@ -623,7 +705,7 @@ def get_all_households(homes_dic):
     for hs in homes_dic:
         homes.extend(homes_dic[hs])
 
-    np.random.shuffle(homes)
+    spsamp.get_rng(rng).shuffle(homes)
     return homes
 
 
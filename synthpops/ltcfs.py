@@ -11,9 +11,10 @@ from . import defaults as spd
 from . import sampling as spsamp
 from . import data_distributions as spdata
 from . import base as spb
+from . import arrays as sparr
 
 
-def generate_ltcfs(n, with_facilities, loc_pars, expected_age_dist, ages_left_to_assign):
+def generate_ltcfs(n, with_facilities, loc_pars, expected_age_dist, ages_left_to_assign, rng=None):
     """
     Generate residents living in long term care facilities and their ages.
 
@@ -23,8 +24,10 @@ def generate_ltcfs(n, with_facilities, loc_pars, expected_age_dist, ages_left_to
         loc_pars (dict)           : A dictionary of location parameters
         expected_age_dist (dict)  : The expected age distribution
         ages_left_to_assign (dic) : The counter of ages for the generated population left to place in a residence
+        rng (np.random.Generator) : random number generator for this stage; see sp.get_rng()
     """
     log.debug('generate_ltcfs()')
+    rng = spsamp.get_rng(rng)
     # initialize an empty list for facilities
     facilities = []
 
@@ -40,11 +43,11 @@ def generate_ltcfs(n, with_facilities, loc_pars, expected_age_dist, ages_left_to
         # make a list of all resident ages
         all_residents = []
         for a in expected_users_by_age:
-            expected_users_by_age[a] = np.random.binomial(ages_left_to_assign[a], ltcf_rates_by_age[a])  # use the rates to sample the number of ltcf residents by age
+            expected_users_by_age[a] = rng.binomial(ages_left_to_assign[a], ltcf_rates_by_age[a])  # use the rates to sample the number of ltcf residents by age
             all_residents.extend([a] * expected_users_by_age[a])
 
         # shuffle resident ages
-        np.random.shuffle(all_residents)
+        rng.shuffle(all_residents)
 
         # how big are long term care facilities
         resident_size_dist = spb.norm_dic(spdata.get_long_term_care_facility_residents_distr(**loc_pars))
@@ -56,8 +59,8 @@ def generate_ltcfs(n, with_facilities, loc_pars, expected_age_dist, ages_left_to
         # create facilities
         while len(all_residents) > 0:
 
-            b = spsamp.fast_choice(size_dist)
-            size = np.random.choice(resident_size_brackets[b])
+            b = spsamp.fast_choice(size_dist, rng=rng)
+            size = rng.choice(resident_size_brackets[b])
 
             if size > len(all_residents):
                 size = len(all_residents)
@@ -84,7 +87,7 @@ def generate_ltcfs(n, with_facilities, loc_pars, expected_age_dist, ages_left_to
     return n_nonltcf, ltcf_adjusted_age_dist, ltcf_adjusted_age_dist_values, ages_left_to_assign, facilities
 
 
-def assign_facility_staff(datadir, location, state_location, country_location, ltcf_staff_age_min, ltcf_staff_age_max, facilities, workers_by_age_to_assign_count, potential_worker_uids_by_age, potential_worker_uids, facilities_by_uids, age_by_uid, use_default=False):
+def assign_facility_staff(datadir, location, state_location, country_location, ltcf_staff_age_min, ltcf_staff_age_max, facilities, workers_by_age_to_assign_count, potential_worker_uids_by_age, potential_worker_uids, facilities_by_uids, age_by_uid, use_default=False, rng=None):
     """
     Assign Long Term Care Facility staff to the generated facilities with residents.
 
@@ -101,41 +104,41 @@ def assign_facility_staff(datadir, location, state_location, country_location, l
         facilities (list)                     : A list of lists where each sublist is a facility with the resident IDs
         age_by_uid (dict)                     : dictionary mapping id to age for all individuals in the population
         use_default (bool)                    : If True, try to first use the other parameters to find data specific to the location under study; otherwise, return default data drawing from default_location, default_state, default_country.
+        rng (np.random.Generator)             : random number generator for this stage; see sp.get_rng()
 
     Returns:
         list: A list of lists with the facility staff IDs for each facility.
     """
     log.debug('assign_facility_staff()')
+    rng = spsamp.get_rng(rng)
     resident_to_staff_ratio_distr = spdata.get_long_term_care_facility_resident_to_staff_ratios_distr(datadir, location=location, state_location=state_location, country_location=country_location, use_default=use_default)
     resident_to_staff_ratio_distr = spb.norm_dic(resident_to_staff_ratio_distr)
     resident_to_staff_ratio_brackets = spdata.get_long_term_care_facility_resident_to_staff_ratios_brackets(datadir, location=location, state_location=state_location, country_location=country_location, use_default=use_default)
 
     facilities_staff = []
     facilities_staff_uids = []
+    potential_worker_uids_by_age = spsamp.make_draw_pools(potential_worker_uids_by_age)
+    worker_sampler = spsamp.CountSampler(workers_by_age_to_assign_count)  # updates workers_by_age_to_assign_count as staff are placed
 
     sorted_ratio_keys = sorted([k for k in resident_to_staff_ratio_distr.keys()])
     ratio_array = [resident_to_staff_ratio_distr[k] for k in sorted_ratio_keys]
 
-    staff_age_range = np.arange(ltcf_staff_age_min, ltcf_staff_age_max + 1)
     for nf, fc in enumerate(facilities):
         n_residents = len(fc)
 
-        s = spsamp.fast_choice(ratio_array)
+        s = spsamp.fast_choice(ratio_array, rng=rng)
         s_range = resident_to_staff_ratio_brackets[s]
-        resident_staff_ratio = s_range[spsamp.fast_choice(s_range)]
+        resident_staff_ratio = s_range[spsamp.fast_choice(s_range, rng=rng)]
 
         n_staff = int(np.ceil(n_residents / resident_staff_ratio))
         new_staff, new_staff_uids = [], []
 
         for i in range(n_staff):
-            a_prob = np.array([workers_by_age_to_assign_count[a] for a in staff_age_range])
-            a_prob = a_prob / np.sum(a_prob)
-            aindex = np.random.choice(a=staff_age_range, p=a_prob)
+            aindex = worker_sampler.draw_range(ltcf_staff_age_min, ltcf_staff_age_max, rng.random())
 
-            uid = potential_worker_uids_by_age[aindex][0]
-            potential_worker_uids_by_age[aindex].remove(uid)
+            uid = potential_worker_uids_by_age[aindex].draw()
             potential_worker_uids.pop(uid, None)
-            workers_by_age_to_assign_count[aindex] -= 1
+            worker_sampler.decrement(aindex)
 
             new_staff.append(aindex)
             new_staff_uids.append(uid)
@@ -162,6 +165,7 @@ def remove_ltcf_residents_from_potential_workers(facilities_by_uids, potential_w
         ids mapped to age, and the number of workers left to assign by age.
     """
     log.debug('remove_ltcf_residents_from_potential_workers()')
+    potential_worker_uids_by_age = spsamp.make_draw_pools(potential_worker_uids_by_age)
     for nf, fc in enumerate(facilities_by_uids):
         for uid in fc:
             aindex = age_by_uid[uid]
@@ -221,6 +225,28 @@ def ltcf_resample_age(exp_age_distr, a):
     return a
 
 
+def ltcf_resample_age_batch(exp_age_distr, ages, rng=None):
+    """
+    Resampling younger ages to better match data, for an array of ages at once.
+    The vectorized equivalent of ltcf_resample_age().
+
+    Args:
+        exp_age_distr (np.ndarray) : age distribution
+        ages (np.ndarray)          : ages as integers
+        rng (np.random.Generator)  : random number generator to draw from; see sp.get_rng()
+
+    Returns:
+        np.ndarray: Resampled ages.
+    """
+    rng = spsamp.get_rng(rng)
+    ages = spsamp.resample_age_batch(exp_age_distr, ages, rng=rng)
+    for a, p in [(7, 0.25), (6, 0.25), (5, 0.2), (0, 0.0), (1, 0.1), (2, 0.0), (4, 0.1)]:
+        resample = (ages == a) & (rng.random(len(ages)) < p)
+        if resample.any():
+            ages[resample] = spsamp.resample_age_batch(exp_age_distr, ages[resample], rng=rng)
+    return ages
+
+
 def get_ltcf_sizes(popdict, keys_to_exclude=[]):
     """
     Get long term care facility sizes, including both residents and staff.
@@ -412,22 +438,16 @@ def populate_ltcfs(pop, resident_lists, staff_lists):
         pop (sp.Pop)          : population
         residents_list (list) : list of lists where each sublist represents a ltcf and contains the ids of the residents
         staff_lists (list)    : list of lists where each sublist represents a ltcf and contains the ids of the staff
-    """
-    initialize_empty_ltcfs(pop, len(resident_lists))
 
+    Notes:
+        The ltcfs are stored as a sp.GroupTable; each sp.LongTermCareFacility
+        object is only created when it is first accessed. Any existing ltcfs are
+        replaced.
+    """
     log.debug("Populating ltcfs.")
 
-    # now populate ltcfs
-    for nl, residents in enumerate(resident_lists):
-        lf = []
-        lf.extend(residents)
-        lf.extend(staff_lists[nl])
-        kwargs = dict(ltcfid=nl,
-                      resident_uids=residents,
-                      staff_uids=staff_lists[nl],
-                      )
-        ltcf = LongTermCareFacility()
-        ltcf.set_layer_group(**kwargs)
-        pop.ltcfs[ltcf['ltcfid']] = sc.dcp(ltcf)
-
+    pop.ltcfs = sparr.GroupTable.from_lists(LongTermCareFacility, len(resident_lists),
+                                            ragged=dict(resident_uids=resident_lists, staff_uids=staff_lists),
+                                            columns=dict(ltcfid=np.arange(len(resident_lists))))
+    pop.n_ltcfs = len(pop.ltcfs)
     return
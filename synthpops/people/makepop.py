@@ -12,10 +12,10 @@ from . import loaders as spl
 # Specify all externally visible functions this file defines
 __all__ = ['make_people', 'make_randpop', 'make_random_contacts',
            'make_microstructured_contacts', 'make_hybrid_contacts',
-           'parse_synthpop']
+           'parse_synthpop', 'parse_arrays']
 
 
-def make_people(n=None, popdict=None, rand_seed=1, pop_type='synthpops', location=None, save_pop=False, popfile=None, die=True, verbose=None, **kwargs):
+def make_people(n=None, popdict=None, rand_seed=1, pop_type='synthpops', location=None, save_pop=False, popfile=None, die=True, verbose=None, arrays=None, **kwargs):
     '''
     Make the actual people for the simulation. Usually called via sim.initialize(),
     but can be called directly by the user.
@@ -23,6 +23,7 @@ def make_people(n=None, popdict=None, rand_seed=1, pop_type='synthpops', locatio
     Args:
         n        (int)  : the number of people to create
         popdict  (dict) : if supplied, use this population dictionary instead of generating a new one
+        arrays   (obj)  : if supplied, use this columnar population (sp.PopulationArrays) instead, without copying it into a population dictionary
         save_pop (bool) : whether to save the population to disk
         popfile  (bool) : if so, the filename to save to
         die      (bool) : whether or not to fail if synthetic populations are requested but not available
@@ -37,6 +38,8 @@ def make_people(n=None, popdict=None, rand_seed=1, pop_type='synthpops', locatio
     if popdict is not None:
         popdict = sc.dcp(popdict) # Otherwise, modifies in place
         n = len(popdict)
+    elif arrays is not None:
+        n = len(arrays)
 
     pars = dict(
             pop_size   = n,
@@ -54,7 +57,9 @@ def make_people(n=None, popdict=None, rand_seed=1, pop_type='synthpops', locatio
         verbose = pars['verbose']
 
     # Actually create the population
-    if popdict is None: # Main use case: no popdict is supplied
+    if arrays is not None:
+        popdict = parse_arrays(arrays)
+    elif popdict is None: # Main use case: no popdict is supplied
         # Create the population
         if pop_type in ['random', 'clustered', 'hybrid']:
             popdict = make_randpop(pars, microstructure=pop_type, **kwargs)
@@ -361,4 +366,57 @@ def parse_synthpop(population, layer_mapping=None, community_contacts=0):
     popdict['contacts']   = sc.dcp(contacts)
     popdict['layer_keys'] = list(layer_mapping.values())
 
-    return popdict
\ No newline at end of file
+    return popdict
+
+
+def parse_arrays(arrays, layer_mapping=None, community_contacts=0):
+    '''
+    Transform a columnar SynthPops population (sp.PopulationArrays) into the
+    format used by People. Unlike parse_synthpop(), this reads the edges of each
+    layer straight from its compressed sparse row (CSR) arrays, so no population
+    dictionary is built or copied.
+
+    Args:
+        arrays (PopulationArrays): a pre-generated SynthPops population in columnar form
+        layer_mapping (dict): a custom mapping from SynthPops layers to Covasim layers
+        community_contacts (int): create this many community contacts on average
+    '''
+    # Handle layer mapping
+    default_layer_mapping = {'H':'h', 'S':'s', 'W':'w', 'C':'c', 'LTCF':'l'} # Remap keys from old names to new names
+    layer_mapping = sc.mergedicts(default_layer_mapping, layer_mapping)
+
+    pop_size = len(arrays)
+    uids = np.arange(pop_size, dtype=spu.default_int)
+    layers = {}
+    for spkey in arrays.layer_keys:
+        try:
+            lkey = layer_mapping[spkey] # Map the SynthPops key into a Covasim layer key
+        except KeyError: # pragma: no cover
+            errormsg = f'Could not find key "{spkey}" in layer mapping "{layer_mapping}"'
+            raise sc.KeyNotFoundError(errormsg)
+        csr = arrays.contacts[spkey]
+        p1 = np.repeat(uids, np.diff(csr.indptr)) # Person 1 of each directed edge in the CSR arrays
+        keep = csr.indices > p1 # Don't add duplicate contacts
+        layers[lkey] = spp.Layer(label=lkey, p1=p1[keep], p2=csr.indices[keep])
+
+    # Add community contacts -- present for everyone
+    c_contacts, _ = make_random_contacts(pop_size, {'c':community_contacts})
+    n_c = [len(c['c']) for c in c_contacts]
+    layers['c'] = spp.Layer(label='c', p1=np.repeat(uids, n_c), p2=np.concatenate([c['c'] for c in c_contacts] + [np.zeros(0)]))
+
+    # Order the layers as People would: the default layers first, then the rest in mapping order
+    lkeys = [lkey for lkey in ['h', 's', 'w', 'c'] + list(layer_mapping.values()) if lkey in layers]
+    contacts = spp.Contacts()
+    for lkey in lkeys:
+        if lkey not in contacts:
+            contacts[lkey] = layers[lkey]
+
+    # Finalize
+    popdict = {}
+    popdict['uid']        = uids
+    popdict['age']        = np.array(arrays.age, dtype=spu.default_int)
+    popdict['sex']        = np.array(arrays.sex, dtype=spu.default_int)
+    popdict['contacts']   = contacts
+    popdict['layer_keys'] = list(layer_mapping.values())
+
+    return popdict
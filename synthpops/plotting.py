@@ -24,11 +24,12 @@ from . import households as sphh
 from . import schools as spsch
 from . import workplaces as spw
 from . import contact_networks as spcnx
+from . import arrays as sparr
 from . import pop as sppop
 from . import people as spp
 
 
-__all__ = ['plotting_kwargs', 'calculate_contact_matrix', 'plot_contacts',
+__all__ = ['plotting_kwargs', 'calculate_contact_matrix', 'calculate_contact_matrices', 'plot_contacts',
            'plot_array', 'plot_ages',
            'plot_household_sizes',
            # 'plot_household_head_ages',
@@ -298,27 +299,102 @@ def calculate_contact_matrix(population, density_or_frequency='density', layer='
         H for households, S for schools, W for workplaces, C for community or
         other, and 'LTCF' for long term care facilities.
     """
-    if density_or_frequency not in ['density', 'frequency']:
-        raise ValueError(f"The parameter density_or_frequency must be either 'density' or 'frequency'. Other input values are not supported at this time. Please try again.")
-    uids = population.keys()
-    uids = [uid for uid in uids]
+    return calculate_contact_matrices(population, layers=layer, density_or_frequency=density_or_frequency)[layer][density_or_frequency]
 
-    num_ages = 101
-    M = np.zeros((num_ages, num_ages))
 
-    for n, uid in enumerate(uids):
-        age = population[uid]['age']
-        contact_ages = [population[c]['age'] for c in population[uid]['contacts'][layer]]
-        contact_ages = np.array([int(a) for a in contact_ages])
+def get_contact_edges(population, layers):
+    """
+    Get the ages of people and the directed edges of their contacts in each
+    layer as arrays of indices into the ages, reading the CSR arrays directly
+    when the population is a view over sp.PopulationArrays.
+
+    Args:
+        population (dict) : A dictionary of a population with attributes, or a PopDictView.
+        layers (list)     : names of the physical contact settings
+
+    Returns:
+        tuple: The array of ages, and a dictionary of (source, target) index
+        arrays by layer, with an entry for each contact of each person.
+    """
+    if isinstance(population, sparr.PopDictView):
+        arrays = population.arrays
+        edges = {}
+        for layer in layers:
+            csr = arrays.contacts[layer]
+            edges[layer] = (np.repeat(np.arange(arrays.n), np.diff(csr.indptr)), np.asarray(csr.indices, dtype=np.int64))
+        return np.asarray(arrays.age, dtype=np.int64), edges
+
+    uids = list(population.keys())
+    people = [population[uid] for uid in uids]
+    ages = np.fromiter((p['age'] for p in people), dtype=np.int64, count=len(people))
+    index = None if uids == list(range(len(uids))) else {uid: i for i, uid in enumerate(uids)}  # map uids to positions if they are not 0 to n-1
+
+    edges = {}
+    for layer in layers:
+        layer_contacts = [p['contacts'][layer] for p in people]
+        degree = np.fromiter((len(c) for c in layer_contacts), dtype=np.int64, count=len(people))
+        contacts = itertools.chain.from_iterable(layer_contacts)
+        if index is not None:
+            contacts = (index[c] for c in contacts)
+        edges[layer] = (np.repeat(np.arange(len(people)), degree), np.fromiter(contacts, dtype=np.int64, count=degree.sum()))
+    return ages, edges
+
+
+def calculate_contact_matrices(population, layers=None, density_or_frequency=None, age_by_brackets=None):
+    """
+    Calculate the symmetric age-specific contact matrices for several layers
+    and both definitions of contact (see calculate_contact_matrix()) in one
+    pass over the population, by counting the age pairs of all edges at once.
+
+    Args:
+        population (dict)            : A dictionary of a population with attributes, or a PopDictView.
+        layers (list)                : names of the physical contact settings; by default, all layers in the population
+        density_or_frequency (list)  : types of contact matrices to calculate, 'density' and / or 'frequency'; by default, both
+        age_by_brackets (dict)       : If given, a dictionary mapping age to age bracket, used to aggregate the matrices to age brackets directly
+
+    Returns:
+        sc.objdict: A dictionary of contact matrices by layer, each a dictionary
+        of np.ndarray matrices by type.
+
+    **Example**::
+
+        matrices = sp.calculate_contact_matrices(pop.popdict, layers=['H', 'S'], age_by_brackets=pop.age_by_brackets)
+        matrices['H']['density']
+    """
+    methods = sc.tolist(density_or_frequency) if density_or_frequency is not None else ['density', 'frequency']
+    for method in methods:
+        if method not in ['density', 'frequency']:
+            raise ValueError(f"The parameter density_or_frequency must be either 'density' or 'frequency'. Other input values are not supported at this time. Please try again.")
+
+    if layers is None:
+        layers = list(population[next(iter(population))]['contacts'].keys()) if len(population) else []
+    layers = sc.tolist(layers)
 
-        if len(contact_ages) > 0:
-            if density_or_frequency == 'frequency':
-                for ca in contact_ages:
-                    M[age, ca] += 1.0 / len(contact_ages)
-            elif density_or_frequency == 'density': # pragma: no cover
-                for ca in contact_ages:
-                    M[age, ca] += 1.0
-    return M
+    num_ages = 101
+    if age_by_brackets is None:
+        num_bins = num_ages
+        bin_by_age = np.arange(num_ages)
+    else:
+        num_bins = len(set(age_by_brackets.values()))
+        bin_by_age = np.array([age_by_brackets[a] for a in range(num_ages)])
+
+    ages, edges = get_contact_edges(population, layers)
+    bins = bin_by_age[ages]
+
+    matrices = sc.objdict()
+    for layer in layers:
+        source, target = edges[layer]
+        codes = bins[source] * num_bins + bins[target]  # age pair code of each edge
+        matrices[layer] = sc.objdict()
+        for method in methods:
+            if method == 'frequency':
+                degree = np.bincount(source, minlength=len(ages))
+                weights = 1.0 / degree[source]
+            else:
+                weights = None
+            M = np.bincount(codes, weights=weights, minlength=num_bins * num_bins).astype(float)
+            matrices[layer][method] = M.reshape(num_bins, num_bins)
+    return matrices
 
 
 def plot_contact_matrix(matrix, age_count, aggregate_age_count, age_brackets, age_by_brackets, **kwargs):
@@ -521,13 +597,13 @@ def plot_contacts(pop, **kwargs):
     plkwargs.set_default_pop_pars()
 
     if isinstance(pop, sppop.Pop):
-        population = pop.to_dict()
+        population = pop.popdict
         age_brackets = pop.age_brackets
         age_by_brackets = pop.age_by_brackets
         age_count = pop.information.age_count
 
     elif isinstance(pop, dict):
-        population = sc.dcp(pop)
+        population = pop
         age_count = spb.count_ages(population)
         age_brackets = spdata.get_census_age_brackets(**plkwargs.loc_pars)
         age_by_brackets = spb.get_age_by_brackets(age_brackets)
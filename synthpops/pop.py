@@ -2,6 +2,7 @@
 This module provides the main class for interacting with SynthPops, the Pop class.
 """
 
+import os
 import numpy as np
 import sciris as sc
 from .config import logger as log
@@ -16,11 +17,30 @@ from . import households as sphh
 from . import schools as spsch
 from . import workplaces as spw
 from . import contact_networks as spcnx
+from . import arrays as sparr
+from . import sharding as spsh
+from . import profiling as spprof
 from . import plotting as sppl
 from . import people as spp
 
 
-__all__ = ['Pop', 'make_population', 'generate_synthetic_population']
+__all__ = ['Pop', 'make_population', 'make_populations', 'generate_synthetic_population']
+
+
+# Pop attributes stored in the header by Pop.save_arrays()
+header_attrs = ['n', 'max_contacts', 'with_industry_code', 'rand_seed', 'country_location',
+                'state_location', 'location', 'sheet_name', 'use_default', 'n_workers',
+                'smooth_ages', 'window_length', 'household_method', 'shards', 'loc_pars', 'school_pars',
+                'ltcf_pars', 'layers', 'layer_mappings', 'max_age', 'datadir',
+                'expected_age_dist', 'expected_age_dist_values', 'age_brackets', 'age_by_brackets',
+                'contact_matrices', 'cm_age_brackets', 'cm_age_by_brackets', 'average_class_size',
+                'n_households', 'n_workplaces', 'n_schools', 'n_ltcfs',
+                'version', 'created', 'git_info']
+
+
+def intkeys(dic):
+    """Convert the digit string keys of a dictionary read from JSON back into ints."""
+    return {int(k) if isinstance(k, str) and k.isdigit() else k: intkeys(v) if isinstance(v, dict) else v for k, v in dic.items()}
 
 
 class Pop(sc.prettyobj):
@@ -58,6 +78,11 @@ class Pop(sc.prettyobj):
                  household_method='infer_ages',
                  smooth_ages=False,
                  window_length=7,
+                 use_arrays=False,
+                 n_workers=None,
+                 shards=None,
+                 precompute_information=False,
+                 trace_memory=False,
                  do_make=True
                  ):
         '''
@@ -101,7 +126,7 @@ class Pop(sc.prettyobj):
             average_additional_staff_degree (float) : The average number of contacts per additional non teaching staff in schools.
             staff_age_min (int)                     : The minimum age for non teaching staff.
             staff_age_max (int)                     : The maximum age for non teaching staff.
-            rand_seed (int)                         : Start point random sequence is generated from.
+            rand_seed (int)                         : Start point random sequence is generated from. Each generation stage (households, schools, workplaces, ltcfs, contacts) draws from its own stream spawned from this seed, stored in pop.rng.
             country_location (string)               : name of the country the location is in
             state_location (string)                 : name of the state the location is in
             location (string)                       : name of the location
@@ -109,7 +134,12 @@ class Pop(sc.prettyobj):
             household_method (string)               : name of household generation method used; for details see above.
             smooth_ages (bool)                      : If True, use smoothed out age distribution.
             window_length (int)                     : length of window over which to average or smooth out age distribution
-            do_make (bool)                          : whether to make the population
+            use_arrays (bool)                       : If True, generate the population straight into a columnar sp.PopulationArrays object (pop.arrays), without building the per-person popdict, and make pop.popdict a read-only view over it.
+            n_workers (int)                         : If given, generate the contacts in each school, and in chunks of the workplaces, with their own random number streams across this many worker processes. With shards, generate the shards across this many worker processes instead.
+            shards (int or list)                    : If given, generate the population as independent shards and stitch them together: either the number of equal shards to split n into, or a list of dictionaries of the parameters of each shard (e.g. dict(n=50000, location='Kent')) whose sizes add up to n. Each shard draws from its own random number stream spawned from rand_seed; see Pop.generate_sharded().
+            precompute_information (bool)           : If True, compute pop.information and pop.summary during construction instead of on first access.
+            trace_memory (bool)                     : If True, also trace memory allocations with tracemalloc for the per-stage profile in pop.profile. This slows down generation.
+            do_make (bool)                          : whether to make the population; if False, only the parameters are set up, e.g. to call pop.load_data()
 
         Returns:
             network (dict): A dictionary of the full population with ages, connections, and other attributes.
@@ -117,6 +147,9 @@ class Pop(sc.prettyobj):
         log.debug('Pop()')
 
         # General parameters
+        if shards is not None and not isinstance(shards, (int, np.integer)):
+            n = sum(shard['n'] for shard in shards)
+
         if n is None:
             log.warning(f"Pop size n not given, generating a population with a default size of {defaults.default_pop_size} people.")
             n = defaults.default_pop_size
@@ -138,6 +171,9 @@ class Pop(sc.prettyobj):
         self.location           = location
         self.sheet_name         = sheet_name
         self.use_default        = use_default
+        self.use_arrays         = use_arrays
+        self.n_workers          = n_workers
+        self.shards             = shards
 
         # Age distribution parameters
         self.smooth_ages                                 = smooth_ages
@@ -182,6 +218,7 @@ class Pop(sc.prettyobj):
         # Handle the seed
         if self.rand_seed is not None:
             spsamp.set_seed(self.rand_seed)
+        self.seed_sequence, self.rng = spsamp.get_stage_rngs(self.rand_seed)
 
         # Handle data
         if self.country_location is None:
@@ -210,16 +247,25 @@ class Pop(sc.prettyobj):
         self.loc_pars.datadir          = self.datadir
         self.loc_pars.use_default      = self.use_default
 
+        # Record the time and memory used by each stage of generation
+        self.profile = spprof.Profile(trace_memory=trace_memory,
+                                      meta=dict(n=self.n, rand_seed=self.rand_seed, location=self.location,
+                                                state_location=self.state_location, country_location=self.country_location,
+                                                sheet_name=self.sheet_name, n_workers=self.n_workers, use_arrays=self.use_arrays,
+                                                shards=self.shards))
+
         # Heavy lift: make the contacts and their connections
-        log.debug('Generating a new population...')
-        population = self.generate()
+        if do_make:
+            log.debug('Generating a new population...')
+            population = self.generate_sharded() if self.shards is not None else self.generate()
 
-        self.popdict = population
-        log.debug('Pop(): done.')
+            self.popdict = population
+            log.debug('Pop(): done.')
 
-        # Add summaries post hoc  --- TBD: summaries during generation
-        self.compute_information()  # compute full information
-        self.compute_summary()  # then compute condensed summary
+            # Add summaries post hoc  --- TBD: summaries during generation; otherwise they are computed on first access
+            if precompute_information:
+                self.compute_information()  # compute full information
+                self.compute_summary()  # then compute condensed summary
 
         # Plotting defaults
         self.plkwargs = sppl.plotting_kwargs()
@@ -237,6 +283,8 @@ class Pop(sc.prettyobj):
             network (dict): A dictionary of the full population with ages, connections, and other attributes.
         """
         log.debug('generate()')
+        profile = self.profile
+        profile.start()
 
         # TODO: unpack variables -- to be refactored to pass parameters directly
 
@@ -280,56 +328,41 @@ class Pop(sc.prettyobj):
         staff_age_min                   = self.school_pars.staff_age_min
         staff_age_max                   = self.school_pars.staff_age_max
 
-        # Load and store the expected age distribution of the population
-        age_bracket_dist = spdata.read_age_bracket_distr(**loc_pars)  # age distribution defined by bins or age brackets
-        expected_age_dist = spdata.get_smoothed_single_year_age_distr(**loc_pars, window_length=self.window_length)
-        self.expected_age_dist = expected_age_dist
-        expected_age_dist_values = [expected_age_dist[a] for a in expected_age_dist]
-        self.expected_age_dist_values = expected_age_dist_values
-
-        # Load and store the age brackets
-        age_brackets = spdata.get_census_age_brackets(**loc_pars)
-        self.age_brackets = age_brackets
-        # mapping
-        age_by_brackets = spb.get_age_by_brackets(age_brackets)
-        self.age_by_brackets = age_by_brackets
-
-        # Load the contact matrix
-        contact_matrices = spdata.get_contact_matrices(datadir, sheet_name=sheet_name)
-        # Store expected contact matrices
-        self.contact_matrices = contact_matrices
-
-        # Load age brackets, and mapping dictionary that matches contact matrices
-        contact_matrix_shape = contact_matrices[list(contact_matrices.keys())[0]].shape
-        contact_matrix_row = contact_matrix_shape[0]
-
-        cm_age_brackets = spdata.get_census_age_brackets(**loc_pars, nbrackets=contact_matrix_row)
-        self.cm_age_brackets = cm_age_brackets
-        cm_age_by_brackets = spb.get_age_by_brackets(cm_age_brackets)
-        self.cm_age_by_brackets = cm_age_by_brackets
+        # Load and store the data shared by the whole population
+        self.load_data()
+        expected_age_dist               = self.expected_age_dist
+        expected_age_dist_values        = self.expected_age_dist_values
+        contact_matrices                = self.contact_matrices
+        cm_age_brackets                 = self.cm_age_brackets
+        cm_age_by_brackets              = self.cm_age_by_brackets
+        profile.lap('data')
 
         # Generate an age count for the population --- this will get passed around to methods generating the different layers where people live: long term care facilities, households, agricultural living quarters, other group living arrangements
-        age_count = sphh.generate_age_count_multinomial(n, expected_age_dist_values)
+        age_count = sphh.generate_age_count_multinomial(n, expected_age_dist_values, rng=self.rng.households)
 
         # Ages left to assign to a residence
         ages_left_to_assign = sc.dcp(age_count)
+        profile.lap('ages', n_people=n)
 
         # Generate LTCFs and remove some people from the age count of people left to place in a resident by age
-        n_nonltcf, ltcf_adjusted_age_dist, ltcf_adjusted_age_dist_values, ages_left_to_assign, facilities = spltcf.generate_ltcfs(n, with_facilities, loc_pars, expected_age_dist, ages_left_to_assign)
+        n_nonltcf, ltcf_adjusted_age_dist, ltcf_adjusted_age_dist_values, ages_left_to_assign, facilities = spltcf.generate_ltcfs(n, with_facilities, loc_pars, expected_age_dist, ages_left_to_assign, rng=self.rng.ltcfs)
+        profile.lap('ltcfs', n_ltcfs=len(facilities), n_residents=n - n_nonltcf)
 
         # Generate households
         household_size_dist = spdata.get_household_size_distr(**loc_pars)
-        hh_sizes = sphh.generate_household_size_count_from_fixed_pop_size(n_nonltcf, household_size_dist)
+        hh_sizes = sphh.generate_household_size_count_from_fixed_pop_size(n_nonltcf, household_size_dist, rng=self.rng.households)
         hha_brackets = spdata.get_head_age_brackets(**loc_pars)
         hha_by_size = spdata.get_head_age_by_size_distr(**loc_pars)
 
         if household_method == 'fixed_ages':
 
-            homes_dic, homes = sphh.generate_all_households_fixed_ages(n_nonltcf, hh_sizes, hha_by_size, hha_brackets, cm_age_brackets, cm_age_by_brackets, contact_matrices, ages_left_to_assign)
+            homes_dic, homes = sphh.generate_all_households_fixed_ages(n_nonltcf, hh_sizes, hha_by_size, hha_brackets, cm_age_brackets, cm_age_by_brackets, contact_matrices, ages_left_to_assign, rng=self.rng.households)
 
         else:
             log.debug("defaulting to 'infer_ages' household generation method. See method notes for description.")
-            homes_dic, homes = sphh.generate_all_households_infer_ages(n, n_nonltcf, hh_sizes, hha_by_size, hha_brackets, cm_age_brackets, cm_age_by_brackets, contact_matrices, ltcf_adjusted_age_dist, ages_left_to_assign)
+            homes_dic, homes = sphh.generate_all_households_infer_ages(n, n_nonltcf, hh_sizes, hha_by_size, hha_brackets, cm_age_brackets, cm_age_by_brackets, contact_matrices, ltcf_adjusted_age_dist, ages_left_to_assign, rng=self.rng.households)
+
+        profile.lap('households', n_households=len(homes))
 
         # Handle homes and facilities
         homes = facilities + homes
@@ -338,13 +371,15 @@ class Pop(sc.prettyobj):
         self.age_by_uid = age_by_uid_arr
 
         facilities_by_uid_lists = homes_by_uids[0:len(facilities)]
+        profile.lap('uids', n_people=len(age_by_uid))
 
         # Generate school sizes
         school_sizes_dist_by_brackets = spdata.get_school_size_distr_by_brackets(**loc_pars)  # without school type
         school_size_brackets = spdata.get_school_size_brackets(**loc_pars)  # for right now the size distribution for all school types will use the same brackets or bins
 
         # Figure out who's going to school as a student with enrollment rates (gets called inside sp.get_uids_in_school)
-        uids_in_school, uids_in_school_by_age, ages_in_school_count = spsch.get_uids_in_school(datadir, n_nonltcf, location, state_location, country_location, age_by_uid, homes_by_uids, use_default=use_default)  # this will call in school enrollment rates
+        uids_in_school, uids_in_school_by_age, ages_in_school_count = spsch.get_uids_in_school(datadir, n_nonltcf, location, state_location, country_location, age_by_uid, homes_by_uids, use_default=use_default, rng=self.rng.schools)  # this will call in school enrollment rates
+        profile.lap('school_enrollment', n_students=len(uids_in_school))
 
         if with_school_types:
             school_size_distr_by_type = spdata.get_school_size_distr_by_type(**loc_pars)
@@ -360,11 +395,12 @@ class Pop(sc.prettyobj):
                                                                                                                  uids_in_school_by_age,
                                                                                                                  ages_in_school_count,
                                                                                                                  school_types_distr_by_age,
-                                                                                                                 school_type_age_ranges)
+                                                                                                                 school_type_age_ranges,
+                                                                                                                 rng=self.rng.schools)
 
         else:
             # Get school sizes
-            school_sizes = spsch.generate_school_sizes(school_sizes_dist_by_brackets, school_size_brackets, uids_in_school)
+            school_sizes = spsch.generate_school_sizes(school_sizes_dist_by_brackets, school_size_brackets, uids_in_school, rng=self.rng.schools)
 
             # Assign students to school using contact matrix method - generic schools
             student_age_lists, student_uid_lists, school_types = spsch.send_students_to_school(school_sizes,
@@ -373,9 +409,11 @@ class Pop(sc.prettyobj):
                                                                                                ages_in_school_count,
                                                                                                cm_age_brackets,
                                                                                                cm_age_by_brackets,
-                                                                                               contact_matrices)
+                                                                                               contact_matrices,
+                                                                                               rng=self.rng.schools)
 
             school_type_by_age = None
+        profile.lap('school_assignment', n_schools=len(student_uid_lists))
 
         # Get employment rates
         employment_rates = spdata.get_employment_rates(**loc_pars)
@@ -384,7 +422,8 @@ class Pop(sc.prettyobj):
         uids_by_age = spb.get_ids_by_age(age_by_uid)  # Make a dictionary listing out uids of people by their age
         potential_worker_uids, potential_worker_uids_by_age, potential_worker_ages_left_count = spw.get_uids_potential_workers(student_uid_lists,
                                                                                                                                employment_rates,
-                                                                                                                               age_by_uid)
+                                                                                                                               age_by_uid,
+                                                                                                                               rng=self.rng.workplaces)
         workers_by_age_to_assign_count = spw.get_workers_by_age_to_assign(employment_rates, potential_worker_ages_left_count, uids_by_age)
 
         # Removing facilities residents from potential workers
@@ -393,6 +432,7 @@ class Pop(sc.prettyobj):
                                                                                                                                                   potential_worker_uids_by_age,
                                                                                                                                                   workers_by_age_to_assign_count,
                                                                                                                                                   age_by_uid)
+        profile.lap('potential_workers', n_potential_workers=len(potential_worker_uids))
 
         # Assign teachers and update school lists
         teacher_age_lists, teacher_uid_lists, potential_worker_uids, potential_worker_uids_by_age, workers_by_age_to_assign_count = spsch.assign_teachers_to_schools(student_age_lists,
@@ -404,7 +444,10 @@ class Pop(sc.prettyobj):
                                                                                                                                                                      potential_worker_ages_left_count,
                                                                                                                                                                      average_student_teacher_ratio=average_student_teacher_ratio,
                                                                                                                                                                      teacher_age_min=teacher_age_min,
-                                                                                                                                                                     teacher_age_max=teacher_age_max)
+                                                                                                                                                                     teacher_age_max=teacher_age_max,
+                                                                                                                                                                     rng=self.rng.schools)
+        profile.lap('teachers', n_teachers=sum(len(t) for t in teacher_uid_lists))
+
         # Assign non teaching staff and update who's available to work at other places
         non_teaching_staff_uid_lists, potential_worker_uids, potential_worker_uids_by_age, workers_by_age_to_assign_count = spsch.assign_additional_staff_to_schools(student_uid_lists,
                                                                                                                                                                      teacher_uid_lists,
@@ -416,7 +459,9 @@ class Pop(sc.prettyobj):
                                                                                                                                                                      average_student_all_staff_ratio=average_student_all_staff_ratio,
                                                                                                                                                                      staff_age_min=staff_age_min,
                                                                                                                                                                      staff_age_max=staff_age_max,
-                                                                                                                                                                     with_non_teaching_staff=with_non_teaching_staff)
+                                                                                                                                                                     with_non_teaching_staff=with_non_teaching_staff,
+                                                                                                                                                                     rng=self.rng.schools)
+        profile.lap('staff', n_staff=sum(len(t) for t in non_teaching_staff_uid_lists))
 
         # Get facility staff
         if with_facilities:
@@ -432,13 +477,16 @@ class Pop(sc.prettyobj):
                                                                       potential_worker_uids,
                                                                       facilities_by_uid_lists,
                                                                       age_by_uid,
-                                                                      use_default=use_default)
+                                                                      use_default=use_default,
+                                                                      rng=self.rng.ltcfs)
         else:
             facilities_staff_uid_lists = []
+        profile.lap('ltcf_staff', n_ltcf_staff=sum(len(t) for t in facilities_staff_uid_lists))
+
         # Generate non-school workplace sizes needed to send everyone to work
         workplace_size_brackets = spdata.get_workplace_size_brackets(**loc_pars)
         workplace_size_distr_by_brackets = spdata.get_workplace_size_distr_by_brackets(**loc_pars)
-        workplace_sizes = spw.generate_workplace_sizes(workplace_size_distr_by_brackets, workplace_size_brackets, workers_by_age_to_assign_count)
+        workplace_sizes = spw.generate_workplace_sizes(workplace_size_distr_by_brackets, workplace_size_brackets, workers_by_age_to_assign_count, rng=self.rng.workplaces)
 
         # Assign all workers who are not staff at schools to workplaces
         workplace_age_lists, workplace_uid_lists, potential_worker_uids, potential_worker_uids_by_age, workers_by_age_to_assign_count = spw.assign_rest_of_workers(workplace_sizes,
@@ -448,7 +496,9 @@ class Pop(sc.prettyobj):
                                                                                                                                                                    age_by_uid,
                                                                                                                                                                    cm_age_brackets,
                                                                                                                                                                    cm_age_by_brackets,
-                                                                                                                                                                   contact_matrices)
+                                                                                                                                                                   contact_matrices,
+                                                                                                                                                                   rng=self.rng.workplaces)
+        profile.lap('workplaces', n_workplaces=len(workplace_uid_lists), n_workers=sum(len(w) for w in workplace_uid_lists))
 
         # remove facilities from homes --- have already assigned each person a uid
         homes_by_uids = homes_by_uids[len(facilities_by_uid_lists):]
@@ -474,12 +524,21 @@ class Pop(sc.prettyobj):
                                          average_student_all_staff_ratio=average_student_all_staff_ratio,
                                          average_additional_staff_degree=average_additional_staff_degree,
                                          school_type_by_age=school_type_by_age,
-                                         max_contacts=max_contacts)
+                                         max_contacts=max_contacts,
+                                         n_workers=self.n_workers,
+                                         use_arrays=self.use_arrays,
+                                         rng=self.rng.contacts)
+        profile.lap('contacts', n_people=len(population))
 
         # Change types
-        for key, person in population.items():
-            for layerkey in population[key]['contacts'].keys():
-                population[key]['contacts'][layerkey] = list(population[key]['contacts'][layerkey])
+        if self.use_arrays:
+            self.arrays = population
+            population = sparr.PopDictView(self.arrays)
+        else:
+            for key, person in population.items():
+                for layerkey in population[key]['contacts'].keys():
+                    population[key]['contacts'][layerkey] = list(population[key]['contacts'][layerkey])
+        profile.lap('convert')
 
         school_mixing_types = [self.schools_in_groups[ns]['school_mixing_type'] for ns in range(len(self.schools_in_groups))]
 
@@ -503,6 +562,83 @@ class Pop(sc.prettyobj):
 
         self.set_layer_classes()
         self.clean_up_layer_info()
+        profile.lap('layer_classes', n_households=len(self.households), n_schools=len(self.schools), n_workplaces=len(self.workplaces))
+        profile.stop()
+
+        return population
+
+    def load_data(self):
+        """
+        Load the data shared by the whole population: the expected age
+        distribution, the age brackets, and the contact matrices. These are
+        loaded once per process and location, see sp.get_population_inputs().
+        """
+        inputs = spdata.get_population_inputs(**self.loc_pars, sheet_name=self.sheet_name, window_length=self.window_length)
+        for key, value in sc.dcp(inputs).items():  # copied, as the inputs are cached and shared by every population of this location
+            setattr(self, key, value)
+        return
+
+    def generate_sharded(self):
+        """
+        Generate the population as independent shards and stitch them together.
+        Each shard is a population of its own, generated with its own random
+        number stream in a worker process (across n_workers processes), so the
+        memory each worker needs is bounded by the shard size. The people of
+        each shard take the next range of uids, and its households, schools,
+        workplaces, and long term care facilities follow on from those of the
+        shards before it.
+
+        Returns:
+            network (dict): A dictionary of the full population with ages, connections, and other attributes.
+
+        Notes:
+            People only have contacts within their own shard, so shards should
+            be large enough to hold whole schools and workplaces, or be split by
+            sub-location. Each worker inherits the data settings of this process.
+        """
+        log.debug('generate_sharded()')
+        profile = self.profile
+        profile.start()
+
+        self.load_data()
+        profile.lap('data')
+
+        # Shards resolve their location exactly as this population did, and are generated as columnar arrays
+        base_pars = dict(max_contacts=self.max_contacts, ltcf_pars=dict(self.ltcf_pars), school_pars=dict(self.school_pars),
+                         with_industry_code=self.with_industry_code, use_default=self.use_default, sheet_name=self.sheet_name,
+                         household_method=self.household_method, smooth_ages=self.smooth_ages, window_length=self.window_length)
+        if (self.country_location, self.state_location, self.location) != (defaults.settings.country_location, defaults.settings.state_location, defaults.settings.location):
+            base_pars.update(country_location=self.country_location, state_location=self.state_location, location=self.location)
+        shard_pars = [sc.mergedicts(base_pars, pars, dict(use_arrays=True, n_workers=None)) for pars in spsh.get_shard_pars(self.shards, self.n, self.rand_seed)]
+
+        n_workers = self.n_workers or 1
+        shards = sc.parallelize(_make_shard, iterarg=shard_pars, ncpus=n_workers, serial=n_workers <= 1)
+        profile.lap('shards', n_shards=len(shards), n_people=sum(shard.arrays.n for shard in shards))
+
+        stitched = spsh.stitch_shards(shards)
+        del shards
+        self.age_by_uid = stitched.arrays.age.astype(int)
+        if self.use_arrays:
+            self.arrays = stitched.arrays
+            population = sparr.PopDictView(self.arrays)
+        else:
+            population = stitched.arrays.to_popdict()
+        profile.lap('stitch', n_people=len(population))
+
+        self.households = sparr.GroupTable(stitched.groups.households, sphh.Household)
+        self.workplaces = sparr.GroupTable(stitched.groups.workplaces, spw.Workplace)
+        self.schools = sparr.GroupTable(stitched.groups.schools, spsch.School, child_classes={'classrooms': spsch.Classroom})
+        self.n_households, self.n_workplaces, self.n_schools = len(self.households), len(self.workplaces), len(self.schools)
+        if self.ltcf_pars.with_facilities:
+            if stitched.groups.ltcfs.n:
+                self.ltcfs = sparr.GroupTable(stitched.groups.ltcfs, spltcf.LongTermCareFacility)
+                self.n_ltcfs = len(self.ltcfs)
+            else:
+                log.warning(f"Heads up: Population size and long term care facility use rates were too low, no facilities were created in any shard of this population. Changing pop.with_facilities to False.")
+                self.layers.remove('LTCF')
+                self.ltcf_pars.with_facilities = False
+        profile.lap('layer_classes', n_households=len(self.households), n_schools=len(self.schools), n_workplaces=len(self.workplaces))
+        profile.stop()
 
         return population
 
@@ -548,47 +684,158 @@ class Pop(sc.prettyobj):
 
             popdict = pop.to_dict()
         """
+        if isinstance(self.popdict, sparr.PopDictView):
+            return self.popdict.to_dict()
         return sc.dcp(self.popdict)
 
-    def to_json(self, filename, indent=2, **kwargs):
+    def to_json(self, filename, indent=2, format='json', **kwargs):
         """
         Export to a JSON file.
 
-        **Example**::
+        Args:
+            filename (str) : the name or path of the file to write
+            indent (int)   : indentation for the 'json' format
+            format (str)   : 'json' to write the popdict as a single JSON object, or 'ndjson' or 'array' to stream one person record at a time with sp.save_json()
+            kwargs         : passed to sc.savejson() for the 'json' format, and to sp.save_json() otherwise, e.g. compress, separate_layers, or chunk_size
+
+        **Examples**::
 
             pop.to_json('my-pop.json')
+            pop.to_json('my-pop.ndjson.gz', format='ndjson', separate_layers=True)
         """
-        return sc.savejson(filename, self.popdict, indent=indent, **kwargs)
+        if format != 'json':
+            return sparr.save_json(filename, self.popdict, format=format, **kwargs)
+
+        popdict = self.popdict
+        if isinstance(popdict, sparr.PopDictView):
+            popdict = popdict.to_dict()
+        return sc.savejson(filename, popdict, indent=indent, **kwargs)
 
-    def save(self, filename, **kwargs):
+    def save(self, filename, format='obj', **kwargs):
         """
-        Save population to an binary, gzipped object file.
+        Save population to a binary, gzipped object file, or to a directory of
+        NumPy arrays with a JSON header that Pop.load() can memory map.
 
-        **Example**::
+        Args:
+            filename (str) : the name or path of the file or directory to save to
+            format (str)   : 'obj' for a gzipped pickle, or 'arrays' for the directory format written by sp.save_arrays()
+            kwargs         : passed to sc.saveobj()
+
+        **Examples**::
 
             pop.save('my-pop.pop')
+            pop.save('my-pop', format='arrays')
         """
+        if format == 'arrays':
+            return self.save_arrays(filename)
+        elif format != 'obj':
+            errormsg = f"format must be 'obj' or 'arrays', not {format}."
+            raise ValueError(errormsg)
         return sc.saveobj(filename, self, **kwargs)
 
+    def save_arrays(self, dirname):
+        """
+        Save population to a directory of NumPy arrays: person attributes,
+        per layer CSR contacts, and packed tables of households, schools,
+        workplaces, and long term care facilities, plus a JSON header holding
+        the population parameters and summary.
+
+        Args:
+            dirname (str) : the directory to write to
+
+        Returns:
+            str: The path to the header file.
+
+        **Example**::
+
+            pop.save_arrays('my-pop')
+        """
+        arrays = self.arrays if self.use_arrays else sparr.PopulationArrays.from_popdict(self.popdict)
+        groups = sc.objdict(households=sparr.pack_groups(self.households),
+                            workplaces=sparr.pack_groups(self.workplaces),
+                            schools=sparr.pack_groups(self.schools))
+        if self.ltcf_pars.with_facilities:
+            groups.ltcfs = sparr.pack_groups(self.ltcfs)
+
+        header = dict(pop={key: self.__dict__[key] for key in header_attrs if key in self.__dict__})
+        header['pop']['summary'] = self.__dict__.get('_summary')  # only stored if it has already been computed
+        return sparr.save_arrays(dirname, arrays, groups=groups, header=header)
+
     @staticmethod
-    def load(filename, *args, **kwargs):
+    def load(filename, *args, mmap=False, **kwargs):
         """
-        Load from disk from a gzipped pickle.
+        Load from disk from a gzipped pickle, or from a directory written by
+        Pop.save(..., format='arrays').
 
         Args:
-            filename (str): the name or path of the file to load from
+            filename (str): the name or path of the file or directory to load from
+            mmap (bool): If True and loading from a directory, memory map the arrays read-only instead of reading them into memory
             kwargs: passed to sc.loadobj()
 
-        **Example**::
+        **Examples**::
 
             pop = sp.Pop.load('my-pop.pop')
+            pop = sp.Pop.load('my-pop', mmap=True)
         """
+        if os.path.isdir(filename):
+            return Pop.load_arrays(filename, mmap=mmap)
+
         pop = sc.loadobj(filename, *args, **kwargs)
         if not isinstance(pop, Pop):
             errormsg = f'Cannot load object of {type(pop)} as a Pop object'
             raise TypeError(errormsg)
         return pop
 
+    @staticmethod
+    def load_arrays(dirname, mmap=False):
+        """
+        Load from a directory written by Pop.save_arrays(). The population is
+        stored in pop.arrays with pop.popdict as a read-only view over it, and
+        the layer groups are read-only views over their packed tables, so
+        nothing is copied when memory mapped.
+
+        Args:
+            dirname (str) : the directory to load from
+            mmap (bool)   : If True, memory map the arrays read-only instead of reading them into memory
+
+        Returns:
+            sp.Pop: The loaded population.
+
+        Notes:
+            pop.information is not stored on disk; it is recomputed on first
+            access.
+        """
+        arrays, groups, header = sparr.load_arrays(dirname, mmap=mmap)
+
+        pop = Pop.__new__(Pop)
+        pop.__dict__.update(header['pop'])
+        for key in ['expected_age_dist', 'age_by_brackets', 'cm_age_by_brackets']:
+            setattr(pop, key, intkeys(getattr(pop, key)))
+        for key in ['age_brackets', 'cm_age_brackets', 'contact_matrices']:
+            setattr(pop, key, {k: np.array(v) for k, v in intkeys(getattr(pop, key)).items()})
+        for key in ['loc_pars', 'school_pars', 'ltcf_pars']:
+            setattr(pop, key, sc.objdict(intkeys(getattr(pop, key))))
+        summary = pop.__dict__.pop('summary')
+        pop.summary = None if summary is None else sc.objdict(intkeys(summary))
+        pop.created = sc.readdate(pop.created)
+
+        pop.use_arrays = True
+        pop.arrays = arrays
+        pop.popdict = sparr.PopDictView(arrays)
+        pop.age_by_uid = arrays.age
+        pop.seed_sequence, pop.rng = spsamp.get_stage_rngs(pop.rand_seed)
+
+        pop.households = sparr.GroupTable(groups.households, sphh.Household)
+        pop.workplaces = sparr.GroupTable(groups.workplaces, spw.Workplace)
+        pop.schools = sparr.GroupTable(groups.schools, spsch.School, child_classes={'classrooms': spsch.Classroom})
+        if 'ltcfs' in groups:
+            pop.ltcfs = sparr.GroupTable(groups.ltcfs, spltcf.LongTermCareFacility)
+
+        pop.information = None
+        pop.profile = None
+        pop.plkwargs = sppl.plotting_kwargs()
+        return pop
+
     def initialize_households_list(self):
         """Initialize a new households list."""
         self.households = []
@@ -602,6 +849,7 @@ class Pop(sc.prettyobj):
             n_households (int) : the number of households to initialize
         """
         sphh.initialize_empty_households(self, n_households)
+        self.invalidate_information()
         return
 
     def populate_households(self, households, age_by_uid):
@@ -613,6 +861,7 @@ class Pop(sc.prettyobj):
             age_by_uid (dict) : dictionary mapping each person's id to their age
         """
         sphh.populate_households(self, households, age_by_uid)
+        self.invalidate_information()
         return
 
     def get_household(self, hhid):
@@ -635,6 +884,7 @@ class Pop(sc.prettyobj):
             household (sp.Household): household with at minimum the hhid, member_uids, member_ages, reference_uid, and reference_age.
         """
         sphh.add_household(self, household)
+        self.invalidate_information()
         return
 
     def initialize_workplaces_list(self):
@@ -650,6 +900,7 @@ class Pop(sc.prettyobj):
             n_households (int) : the number of workplaces to initialize
         """
         sphh.initialize_empty_workplaces(self, n_workplaces)
+        self.invalidate_information()
         return
 
     def populate_workplaces(self, workplaces):
@@ -661,6 +912,7 @@ class Pop(sc.prettyobj):
             age_by_uid (dict) : dictionary mapping each person's id to their age
         """
         spw.populate_workplaces(self, workplaces)
+        self.invalidate_information()
         return
 
     def get_workplace(self, wpid):
@@ -683,6 +935,7 @@ class Pop(sc.prettyobj):
             workplace (sp.Workplace): workplace with at minimum the wpid, member_uids, member_ages, reference_uid, and reference_age.
         """
         spw.add_workplace(self, workplace)
+        self.invalidate_information()
         return
 
     def initialize_ltcfs_list(self):
@@ -698,6 +951,7 @@ class Pop(sc.prettyobj):
             n_ltcfs (int) : the number of ltcfs to initialize
         """
         spltcf.initialize_empty_ltcfs(self, n_ltcfs)
+        self.invalidate_information()
         return
 
     def populate_ltcfs(self, resident_lists, staff_lists):
@@ -709,6 +963,7 @@ class Pop(sc.prettyobj):
             staff_lists (list)    : list of lists where each sublist represents a ltcf and contains the ids of the staff
         """
         spltcf.populate_ltcfs(self, resident_lists, staff_lists)
+        self.invalidate_information()
         return
 
     def get_ltcf(self, ltcfid):
@@ -731,6 +986,7 @@ class Pop(sc.prettyobj):
             ltcf (sp.LongTermCareFacility): ltcf with at minimum the ltcfid, resident_uids, staff_uids, resident_ages, staff_ages, reference_uid, and reference_age.
         """
         spltcf.add_ltcf(self, ltcf)
+        self.invalidate_information()
 
     def initialize_schools_list(self):
         """Initialize a new schools list."""
@@ -745,6 +1001,7 @@ class Pop(sc.prettyobj):
             n_schools (int) : the number of schools to initialize
         """
         spsch.initialize_empty_schools(self, n_schools)
+        self.invalidate_information()
         return
 
     def populate_schools(self, student_lists, teacher_lists, non_teaching_staff_lists, age_by_uid, school_types=None, school_mixing_types=None):
@@ -760,6 +1017,7 @@ class Pop(sc.prettyobj):
             school_mixing_types (list)      : list of the school mixing types
         """
         spsch.populate_schools(self, student_lists, teacher_lists, non_teaching_staff_lists, age_by_uid, school_types, school_mixing_types)
+        self.invalidate_information()
         return
 
     def get_school(self, scid):
@@ -782,6 +1040,7 @@ class Pop(sc.prettyobj):
             school (sp.School): school
         """
         spsch.add_school(self, school)
+        self.invalidate_information()
         return
 
     def populate_all_classrooms(self, schools_in_groups):
@@ -793,9 +1052,7 @@ class Pop(sc.prettyobj):
         Args:
             schools_in_groups (dict) : a dictionary representing each school in terms of student_groups and teacher_groups corresponding to classrooms
         """
-        for ns in range(self.n_schools):
-            spsch.initialize_empty_classrooms(self.schools[ns], len(schools_in_groups[ns]['student_groups']))
-            spsch.populate_classrooms(self.schools[ns], schools_in_groups[ns]['student_groups'], schools_in_groups[ns]['teacher_groups'], self.age_by_uid)
+        spsch.populate_all_classrooms(self, schools_in_groups, self.age_by_uid)
         return
 
     def get_classroom(self, scid, clid):
@@ -811,10 +1068,41 @@ class Pop(sc.prettyobj):
         """
         return spsch.get_classroom(self, scid, clid)
 
+    @property
+    def information(self):
+        """An advanced description of the population, computed on first access and cached until invalidated."""
+        if self.__dict__.get('_information') is None:
+            self.compute_information()
+        return self._information
+
+    @information.setter
+    def information(self, value):
+        self._information = value
+
+    @property
+    def summary(self):
+        """A condensed summary of the population, computed on first access and cached until invalidated."""
+        if self.__dict__.get('_summary') is None:
+            self.compute_summary()
+        return self._summary
+
+    @summary.setter
+    def summary(self, value):
+        self._summary = value
+
+    def invalidate_information(self):
+        """Clear the cached information and summary so they are recomputed on next access, e.g. after the population changes."""
+        self._information = None
+        self._summary = None
+        return
+
     def compute_information(self):
         """Computing an advanced description of the population."""
+        arrays = self.arrays if self.use_arrays else sparr.PopulationArrays.from_popdict(self.popdict, layer_keys=[], columns=sparr.statistics_keys)
+        stats = sparr.compute_statistics(arrays)  # all size, enrollment, employment, and head of household tables in one pass
+
         self.information = sc.objdict()
-        self.information.age_count = self.count_pop_ages()
+        self.information.age_count = stats.age_count
         self.information.layer_degrees = dict()
         self.information.layer_stats = dict()
         self.information.layer_degree_description = dict()
@@ -824,22 +1112,22 @@ class Pop(sc.prettyobj):
             self.information.layer_stats[layer] = self.information.layer_degrees[layer].describe()[['age', 'degree']]
             self.information.layer_degree_description[layer] = self.information.layer_degrees[layer].groupby('age')['degree'].describe(percentiles=[0.05, 0.25, 0.5, 0.75, 0.95])  # default percentiles to include
 
-        self.information.household_sizes = self.get_household_sizes()
+        self.information.household_sizes = stats.household_sizes
         self.information.household_size_count = self.count_household_sizes()
 
-        self.information.household_heads = self.get_household_heads()
-        self.information.household_head_ages = self.get_household_head_ages()
+        self.information.household_heads = stats.household_heads
+        self.information.household_head_ages = stats.household_head_ages
         self.information.household_head_age_count = self.count_household_head_ages()
         self.information.household_head_ages_by_size_count = self.get_household_head_ages_by_size()
 
-        self.information.ltcf_sizes = self.get_ltcf_sizes()
-        self.information.ltcf_size_count = self.count_ltcf_sizes()
+        self.information.ltcf_sizes = stats.ltcf_sizes
+        self.information.ltcf_size_count = spb.count_values(self.information.ltcf_sizes)
 
-        self.information.enrollment_by_age = self.count_enrollment_by_age()
-        self.information.enrollment_by_school_type = self.count_enrollment_by_school_type()
+        self.information.enrollment_by_age = stats.enrollment_by_age
+        self.information.enrollment_by_school_type = stats.enrollment_by_school_type
 
-        self.information.employment_by_age = self.count_employment_by_age()
-        self.information.workplace_sizes = self.get_workplace_sizes()
+        self.information.employment_by_age = stats.employment_by_age
+        self.information.workplace_sizes = stats.workplace_sizes
         self.information.workplace_size_count = self.count_workplace_sizes()
 
         return
@@ -1090,8 +1378,15 @@ class Pop(sc.prettyobj):
         return spcnx.get_contact_counts_by_layer(self.popdict, layer, **kwargs)
 
     def to_people(self):
-        ''' Convert to the alternative People representation of a population '''
-        ppl = spp.make_people(popdict=self.popdict, rand_seed=self.rand_seed)  # Create the corresponding population
+        """
+        Convert to the alternative People representation of a population,
+        building its contact layers straight from the CSR arrays. Only a
+        population made with use_arrays=True skips the popdict entirely, since
+        it is generated straight into pop.arrays; otherwise the popdict is
+        first packed into arrays with sp.PopulationArrays.from_popdict().
+        """
+        arrays = self.arrays if self.use_arrays else sparr.PopulationArrays.from_popdict(self.popdict)
+        ppl = spp.make_people(arrays=arrays, rand_seed=self.rand_seed)  # Create the corresponding population
         return ppl
 
     def plot_people(self, *args, **kwargs):
@@ -1253,6 +1548,22 @@ class Pop(sc.prettyobj):
         return fig, ax
 
 
+def _make_shard(pars):
+    """
+    Generate one shard of a sharded population; run in a worker process by
+    Pop.generate_sharded().
+
+    Args:
+        pars (dict) : the Pop parameters of the shard
+
+    Returns:
+        sc.objdict: The columnar population (arrays) and packed layer group tables (groups) of the shard.
+    """
+    shard = Pop(**pars)
+    groups = sc.objdict({name: sparr.pack_groups(getattr(shard, name, [])) for name in spsh.shard_group_keys})
+    return sc.objdict(arrays=shard.arrays, groups=groups)
+
+
 def make_population(*args, **kwargs):
     '''
     Interface to sp.Pop().to_dict(). Included for backwards compatibility.
@@ -1275,6 +1586,73 @@ def make_population(*args, **kwargs):
     return population
 
 
+def _make_replicate(index, seed, pars, filename=None, format='obj'):
+    """
+    Generate one replicate for make_populations(), and save it as soon as it is
+    finished if a filename is given.
+
+    Returns:
+        sp.Pop or str: The replicate, or the path it was saved to.
+    """
+    pop = Pop(**pars, rand_seed=seed)
+    log.debug(f'Replicate {index} (rand_seed={seed}) finished.')
+    if filename is None:
+        return pop
+    path = filename.format(i=index, seed=seed)
+    pop.save(path, format=format)
+    return path
+
+
+def make_populations(n_replicates=None, seeds=None, n_workers=None, filename=None, format='obj', **kwargs):
+    """
+    Generate stochastic replicates of a population, each with the same
+    parameters and its own random seed. The inputs derived from the location
+    data (see sp.get_population_inputs()) are loaded once in this process
+    before the replicates are generated, and are inherited read-only by the
+    worker processes where processes are forked.
+
+    Args:
+        n_replicates (int) : number of replicates; defaults to the number of seeds
+        seeds (list)       : the rand_seed of each replicate; by default spawned from the rand_seed in kwargs
+        n_workers (int)    : number of worker processes to generate the replicates across; if None, generate them one at a time in this process
+        filename (str)     : If given, save each replicate as soon as it is finished instead of returning it, to this file name with {i} replaced by the replicate index and {seed} by its seed, e.g. 'seattle_{i}.pop'
+        format (str)       : format to save the replicates in, passed to Pop.save()
+        **kwargs           : parameters of every replicate, passed to sp.Pop
+
+    Returns:
+        list: The replicates (sp.Pop objects), or the paths they were saved to if a filename is given.
+
+    **Examples**::
+
+        pops = sp.make_populations(10, rand_seed=1, n=20e3)
+        paths = sp.make_populations(seeds=range(100), n_workers=8, filename='pops/seattle_{seed}.pop')
+    """
+    log.debug('make_populations()')
+    if seeds is None:
+        if n_replicates is None:
+            errormsg = 'Either n_replicates or seeds must be given.'
+            raise ValueError(errormsg)
+        seeds = spsamp.spawn_seeds(kwargs.pop('rand_seed', None), n_replicates)
+    else:
+        seeds = [int(seed) for seed in seeds]
+        if n_replicates is not None and n_replicates != len(seeds):
+            errormsg = f'{len(seeds)} seeds were given for {n_replicates} replicates.'
+            raise ValueError(errormsg)
+        kwargs.pop('rand_seed', None)
+    if filename is not None and len(seeds) > 1 and '{i}' not in filename and '{seed}' not in filename:
+        errormsg = f'The filename {filename} must include {{i}} or {{seed}} so that the replicates do not overwrite each other.'
+        raise ValueError(errormsg)
+
+    # Load the inputs once; replicates generate their contacts serially within each worker
+    pars = sc.mergedicts(kwargs, dict(n_workers=None))
+    Pop(**pars, do_make=False).load_data()
+
+    n_workers = n_workers or 1
+    iterkwargs = [dict(index=i, seed=seed) for i, seed in enumerate(seeds)]
+    return sc.parallelize(_make_replicate, iterkwargs=iterkwargs, kwargs=dict(pars=pars, filename=filename, format=format),
+                          ncpus=n_workers, serial=n_workers <= 1)
+
+
 def generate_synthetic_population(*args, **kwargs):
     ''' For backwards compatibility only. '''
     log.warning('This function is deprecated and may be removed in future releases')
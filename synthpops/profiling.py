@@ -0,0 +1,164 @@
+"""
+This module provides structured timing and memory profiling of the stages of
+population generation.
+"""
+
+import time
+import tracemalloc
+import sciris as sc
+from .config import logger as log, checkmem
+from . import version as spv
+
+
+__all__ = ['Profile']
+
+
+class Profile(sc.prettyobj):
+    """
+    A record of the wall time, CPU time, memory use, and item counts of each
+    stage of a computation. Stages are recorded as laps: each call to lap()
+    closes the stage that started at the previous lap (or at start()).
+
+    Args:
+        trace_memory (bool) : If True, also trace Python memory allocations with tracemalloc; this gives the peak memory of each stage but slows the computation down
+        meta (dict)         : metadata stored with the profile, e.g. the population size and location
+
+    **Example**::
+
+        profile = sp.Profile()
+        profile.start()
+        homes = make_homes()
+        profile.lap('households', n_households=len(homes))
+        profile.stop()
+        profile.to_json('profile.json')
+
+    Notes:
+        CPU time is the CPU time of this process only; work done in worker
+        processes is not included. Memory is reported in MB. tracemalloc
+        cannot reset its peak before Python 3.9, so there the traced peak of
+        each stage is the peak since tracing started rather than within the
+        stage.
+    """
+
+    def __init__(self, trace_memory=False, meta=None):
+        """Class constructor for an empty profile."""
+        self.trace_memory = trace_memory
+        self.meta = sc.objdict(sc.mergedicts(dict(version=spv.__version__), meta))
+        self.stages = []
+        self._last = None
+        self._started_tracing = False
+        return
+
+    def _checkpoint(self):
+        """Take a snapshot of the clocks and memory use."""
+        checkpoint = sc.objdict(wall=time.perf_counter(), cpu=time.process_time(), rss=checkmem(to_string=False))
+        if self.trace_memory:
+            checkpoint.traced = tracemalloc.get_traced_memory()[0] / 1e6
+            if hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+
+                tracemalloc.reset_peak()
+        return checkpoint
+
+    def start(self):
+        """Start profiling; the first stage starts now."""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._last = self._checkpoint()
+        return
+
+    def lap(self, name, **counts):
+        """
+        Record the stage that ends now.
+
+        Args:
+            name (str)     : name of the stage
+            **counts (int) : number of items produced by the stage, e.g. n_households=1000
+        """
+        if self._last is None:
+            errormsg = 'The profile has not been started; call profile.start() before profile.lap().'
+            raise RuntimeError(errormsg)
+
+        if self.trace_memory:
+            traced_peak = tracemalloc.get_traced_memory()[1] / 1e6  # read before _checkpoint() resets the peak
+        now = self._checkpoint()
+        stage = sc.objdict(name=name,
+                           wall=now.wall - self._last.wall,
+                           cpu=now.cpu - self._last.cpu,
+                           rss=now.rss,
+                           rss_delta=now.rss - self._last.rss,
+                           counts={k: int(v) for k, v in counts.items()})
+        if self.trace_memory:
+            stage.traced_delta = now.traced - self._last.traced
+            stage.traced_peak = traced_peak - self._last.traced
+        self.stages.append(stage)
+        self._last = now
+        log.debug(f'{name}: {stage.wall:0.3f} s, {stage.rss:0.2f} MB')
+        return
+
+    def stop(self):
+        """Stop profiling, and stop tracing memory if this profile started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self._last = None
+        return
+
+    @property
+    def total(self):
+        """The wall and CPU time summed over all stages, and the final memory use."""
+        return sc.objdict(wall=sum(s.wall for s in self.stages),
+                          cpu=sum(s.cpu for s in self.stages),
+                          rss=self.stages[-1].rss if self.stages else None)
+
+    def __getitem__(self, name):
+        """Return the stage called name."""
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        raise KeyError(name)
+
+    def to_dict(self):
+        """
+        Export the profile to a dictionary of plain types.
+
+        Returns:
+            dict: Dictionary with the metadata, the total, and a list of stages.
+        """
+        return dict(meta=dict(self.meta), total=dict(self.total), stages=[dict(s) for s in self.stages])
+
+    def to_df(self):
+        """
+        Export the stages to a dataframe.
+
+        Returns:
+            pandas.DataFrame: A row per stage, with a column for each measure and each count.
+        """
+        import pandas as pd
+        rows = [sc.mergedicts({k: v for k, v in stage.items() if k != 'counts'}, stage.counts) for stage in self.stages]
+        return pd.DataFrame(rows)
+
+    def to_json(self, filename=None, indent=2):
+        """
+        Export the profile to JSON.
+
+        Args:
+            filename (str) : If given, write to this file; otherwise return the JSON string
+            indent (int)   : indentation of the JSON
+
+        Returns:
+            str: The JSON string if no filename is given.
+        """
+        if filename is None:
+            return sc.jsonify(self.to_dict(), tostring=True, indent=indent)
+        sc.savejson(filename, self.to_dict(), indent=indent)
+        return
+
+    def disp(self):
+        """Print a table of the stages."""
+        print(f'{"stage":<20s} {"wall (s)":>10s} {"cpu (s)":>10s} {"rss (MB)":>10s} {"delta (MB)":>11s}  counts')
+        for s in self.stages:
+            counts = ', '.join(f'{k}={v}' for k, v in s.counts.items())
+            print(f'{s.name:<20s} {s.wall:>10.3f} {s.cpu:>10.3f} {s.rss:>10.2f} {s.rss_delta:>11.2f}  {counts}')
+        total = self.total
+        print(f'{"total":<20s} {total.wall:>10.3f} {total.cpu:>10.3f}')
+        return
@@ -36,55 +36,120 @@ def set_seed(seed=None):
     return
 
 
-def fast_choice(weights):
+# Generation stages that each draw from their own random number stream
+rng_stages = ['households', 'schools', 'workplaces', 'ltcfs', 'contacts']
+
+
+def get_stage_rngs(seed=None, stages=None):
+    """
+    Get independent random number generators for the stages of population
+    generation, spawned from a single seed.
+
+    Args:
+        seed (int or np.random.SeedSequence) : seed; if None, fresh entropy is used
+        stages (list)                        : names of the stages; defaults to rng_stages
+
+    Returns:
+        np.random.SeedSequence, sc.objdict: The seed sequence and a dictionary of np.random.Generator objects by stage.
+    """
+    if stages is None:
+        stages = rng_stages
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    children = seed_sequence.spawn(len(stages))
+    rngs = sc.objdict({stage: np.random.default_rng(child) for stage, child in zip(stages, children)})
+    return seed_sequence, rngs
+
+
+def spawn_seeds(seed=None, n=1):
+    """
+    Spawn independent integer seeds from a single seed, e.g. for the shards or
+    replicates of a population.
+
+    Args:
+        seed (int) : seed; if None, fresh entropy is used
+        n (int)    : number of seeds
+
+    Returns:
+        list: The seeds.
+    """
+    children = np.random.SeedSequence(seed).spawn(n)
+    return [int(child.generate_state(1)[0]) for child in children]
+
+
+def get_rng(rng=None):
+    """
+    Get the random number generator for a generation stage to draw from. The
+    global random number streams (NumPy, Numba and Python's random) are never
+    reseeded, so stages can draw from their own generators side by side.
+
+    Args:
+        rng (np.random.Generator or int) : random number generator of the stage, or a seed for one; if None, a new generator is seeded from NumPy's global stream, so that set_seed() still makes the draws reproducible
+
+    Returns:
+        np.random.Generator: The random number generator.
+    """
+    if rng is None:
+        rng = np.random.randint(2**31)
+    return np.random.default_rng(rng)  # returns rng unaltered if it is already a Generator
+
+
+def fast_choice(weights, rng=None):
     """
     Choose an option -- quickly -- from the provided weights. Weights do not need
     to be normalized.
 
     Reimplementation of random.choices(), removing everything inessential.
 
+    Args:
+        weights (list or np.ndarray) : weights of the options
+        rng (np.random.Generator)    : random number generator to draw from; if None, use Python's random
+
     Example:
         fast_choice([0.1,0.2,0.3,0.2,0.1]) # might return 2
     """
     cum_weights = list(itertools.accumulate(weights))
-    return bisect.bisect(cum_weights, random.random()*(cum_weights[-1]), 0, len(cum_weights)-1)
+    u = random.random() if rng is None else rng.random()
+    return bisect.bisect(cum_weights, u*(cum_weights[-1]), 0, len(cum_weights)-1)
 
 
 # @nb.njit(cache=True)
-def sample_single_dict(distr_keys, distr_vals):
+def sample_single_dict(distr_keys, distr_vals, rng=None):
     """
     Sample from a distribution.
 
     Args:
         distr (dict or np.ndarray): distribution
+        rng (np.random.Generator) : random number generator to draw from; see fast_choice()
 
     Returns:
         A single sampled value from a distribution.
 
     """
-    return distr_keys[fast_choice(distr_vals)]
+    return distr_keys[fast_choice(distr_vals, rng=rng)]
 
 
-def sample_single_arr(distr):
+def sample_single_arr(distr, rng=None):
     """
     Sample from a distribution.
 
     Args:
         distr (dict or np.ndarray): distribution
+        rng (np.random.Generator) : random number generator to draw from; see fast_choice()
 
     Returns:
         A single sampled value from a distribution.
     """
-    return fast_choice(distr)
+    return fast_choice(distr, rng=rng)
 
 
-def resample_age(age_dist_vals, age):
+def resample_age(age_dist_vals, age, rng=None):
     """
     Resample age from single year age distribution.
 
     Args:
         single_year_age_distr (arr) : age distribution, ordered by age
         age (int)                   : age as an integer
+        rng (np.random.Generator)   : random number generator to draw from; see fast_choice()
     Returns:
         Resampled age as an integer.
     """
@@ -106,24 +171,348 @@ def resample_age(age_dist_vals, age):
 
     age_distr = age_dist_vals[age_min:age_max + 1]  # create an array of the values, not yet normalized
     age_range = np.arange(age_min, age_max + 1)
-    return age_range[fast_choice(age_distr)]
+    return age_range[fast_choice(age_distr, rng=rng)]
+
+
+def get_cdfs(weights):
+    """
+    Get the normalized cumulative distributions for a list of weight arrays,
+    padded into a single array for vectorized sampling with sample_from_cdfs().
+
+    Args:
+        weights (list) : list of 1D arrays of weights, which do not need to be normalized or of equal length
+
+    Returns:
+        np.ndarray: An array with one row per weight array. Entries from the last
+        position of each weight array on are set above 1 so that sampling never
+        goes past it, matching fast_choice().
+    """
+    ncols = max(len(w) for w in weights)
+    cdfs = np.full((len(weights), ncols), 1.5)
+    for r, w in enumerate(weights):
+        cum = np.cumsum(np.asarray(w, dtype=np.float64))
+        if cum[-1] > 0:
+            cdfs[r, :len(cum) - 1] = cum[:-1] / cum[-1]
+        else:
+            cdfs[r, :len(cum) - 1] = 0  # like fast_choice(), choose the last entry if all weights are 0
+    return cdfs
+
+
+def sample_from_cdfs(cdfs, rows, u=None, rng=None):
+    """
+    Sample an index from the distribution in each of the given rows of cdfs,
+    all at once.
+
+    Args:
+        cdfs (np.ndarray)         : cumulative distributions from get_cdfs()
+        rows (np.ndarray)         : the row of cdfs to sample from for each draw
+        u (np.ndarray)            : uniform random numbers in [0, 1) to use for each draw; if None, drawn from rng
+        rng (np.random.Generator) : random number generator to draw u from; if None, use np.random
+
+    Returns:
+        np.ndarray: The sampled index within each row.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    if u is None:
+        u = (np.random if rng is None else rng).random(len(rows))
+    nrows, ncols = cdfs.shape
+    offsets = 2 * np.arange(nrows)  # shift each row so that all rows can be searched at once
+    flat_cdfs = (cdfs + offsets[:, None]).ravel()
+    inds = np.searchsorted(flat_cdfs, u + offsets[rows], side='right')
+    return inds - rows * ncols
+
+
+def get_resample_age_ranges(max_age=100):
+    """
+    Get the range of ages that resample_age() samples from for each age.
+
+    Args:
+        max_age (int) : the maximum age
+
+    Returns:
+        Two arrays with the minimum and maximum age of the range for each age from 0 to max_age.
+    """
+    ages = np.arange(max_age + 1)
+    min_vals, max_vals = ages - 2, ages + 2
+    min_vals[[0, 1]], max_vals[[0, 1]] = 0, [1, 2]
+    min_vals[[-2, -1]], max_vals[[-2, -1]] = [max_age - 3, max_age - 2], [max_age - 1, max_age]
+    return min_vals, max_vals
 
 
-def sample_from_range(distr, min_val, max_val):
+def resample_age_batch(age_dist_vals, ages, rng=None):
+    """
+    Resample ages from single year age distribution, for an array of ages at
+    once. The vectorized equivalent of resample_age().
+
+    Args:
+        age_dist_vals (arr)       : age distribution, ordered by age
+        ages (np.ndarray)         : ages as integers
+        rng (np.random.Generator) : random number generator to draw from; see sample_from_cdfs()
+
+    Returns:
+        np.ndarray: Resampled ages.
+    """
+    min_vals, max_vals = get_resample_age_ranges(len(age_dist_vals) - 1)
+    cdfs = get_cdfs([age_dist_vals[min_vals[a]:max_vals[a] + 1] for a in range(len(age_dist_vals))])
+    ages = np.asarray(ages, dtype=np.int64)
+    return min_vals[ages] + sample_from_cdfs(cdfs, ages, rng=rng)
+
+
+def sample_from_range(distr, min_val, max_val, rng=None):
     """
     Sample from a distribution from min_val to max_val, inclusive.
 
     Args:
-        distr (dict)  : distribution with integer keys
-        min_val (int) : minimum of the range to sample from
-        max_val (int) : maximum of the range to sample from
+        distr (dict)              : distribution with integer keys
+        min_val (int)             : minimum of the range to sample from
+        max_val (int)             : maximum of the range to sample from
+        rng (np.random.Generator) : random number generator to draw from; see fast_choice()
     Returns:
         A sampled number from the range min_val to max_val in the distribution distr.
     """
     new_distr = spb.norm_age_group(distr, min_val, max_val)
     distr_keys = np.array(list(new_distr.keys()), dtype=np.int64)
     distr_vals = np.array(list(new_distr.values()), dtype=np.float64)
-    return sample_single_dict(distr_keys, distr_vals)
+    return sample_single_dict(distr_keys, distr_vals, rng=rng)
+
+
+class DrawPool:
+    """
+    A pool of ids to draw from, such as the potential workers or students of a
+    given age. Drawing the next id in line and removing any id are both O(1),
+    whereas list.remove() is O(n) and makes assignment quadratic in the
+    population size.
+
+    Args:
+        uids (list or iterable) : ids in the order they should be drawn
+
+    Notes:
+        Removed ids are marked in place with a position index and skipped when
+        drawing, so the pool keeps the order of the ids it was created with and
+        draws the same ids as the list-based methods it replaces.
+    """
+
+    def __init__(self, uids=None):
+        """Class constructor for a pool of ids."""
+        self.uids = list(uids) if uids is not None else []
+        self.index = {uid: i for i, uid in enumerate(self.uids)}
+        self.head = 0
+        self.n = len(self.index)
+        return
+
+    def __len__(self):
+        """Return the number of ids left in the pool."""
+        return self.n
+
+    def __contains__(self, uid):
+        """Return True if uid is still in the pool."""
+        return uid in self.index
+
+    def __iter__(self):
+        """Iterate over the ids left in the pool, in order."""
+        return (uid for uid in self.uids[self.head:] if uid is not None)
+
+    def __getitem__(self, key):
+        """Return the id (or list of ids) at position key among the ids left in the pool."""
+        if key == 0 and self.n:
+            return self.uids[self.head]
+        return self.tolist()[key]
+
+    def __eq__(self, other):
+        """Compare the ids left in the pool with another pool or list."""
+        return self.tolist() == list(other)
+
+    def __repr__(self):
+        """Represent the pool as the list of ids left in it."""
+        return f'{self.__class__.__name__}({self.tolist()})'
+
+    def tolist(self):
+        """Return the ids left in the pool as a list."""
+        return list(self)
+
+    def append(self, uid):
+        """Add uid to the end of the pool."""
+        self.index[uid] = len(self.uids)
+        self.uids.append(uid)
+        self.n += 1
+        return
+
+    def remove(self, uid):
+        """Remove uid from the pool; raises a ValueError if uid is not in the pool."""
+        try:
+            i = self.index.pop(uid)
+        except KeyError:
+            raise ValueError(f'{uid} is not in the pool.')
+        self.uids[i] = None
+        self.n -= 1
+        while self.head < len(self.uids) and self.uids[self.head] is None:
+            self.head += 1
+
+        # compact if most of the remaining slots are holes left by removals
+        if len(self.uids) - self.head > 2 * self.n + 64:
+            self.uids = self.tolist()
+            self.index = {uid: i for i, uid in enumerate(self.uids)}
+            self.head = 0
+        return
+
+    def draw(self):
+        """Remove and return the next id in the pool."""
+        if self.n == 0:
+            raise IndexError('Cannot draw from an empty pool.')
+        uid = self.uids[self.head]
+        self.remove(uid)
+        return uid
+
+
+def make_draw_pools(uids_by_key):
+    """
+    Convert a dictionary of lists of ids, for example mapping age to the list
+    of ids with that age, into a dictionary of DrawPools. The dictionary is
+    updated in place so that callers holding it see the pools, and values that
+    are already DrawPools are left as they are.
+
+    Args:
+        uids_by_key (dict) : dictionary mapping keys to lists of ids
+
+    Returns:
+        dict: The same dictionary with each list of ids replaced by a DrawPool.
+    """
+    for k, uids in uids_by_key.items():
+        if not isinstance(uids, DrawPool):
+            uids_by_key[k] = DrawPool(uids)
+    return uids_by_key
+
+
+class CountSampler:
+    """
+    A weighted sampler over counts, such as the number of people left to place
+    by age, backed by a Fenwick (binary indexed) tree. Updating a count and
+    drawing a key with probability proportional to its count, optionally
+    restricted to a range of keys, are O(log n) instead of renormalizing the
+    whole dictionary of counts for every draw.
+
+    Args:
+        counts (dict) : dictionary mapping sortable keys (e.g. ages) to non negative counts
+
+    Notes:
+        The sampler writes through to counts: updates made with decrement() or
+        set() are also made to the dictionary it was created with. Draws use
+        random.random() by default, like fast_choice(), and return the same
+        key as fast_choice() on the corresponding weights.
+    """
+
+    def __init__(self, counts):
+        """Class constructor for the sampler."""
+        self.counts = counts
+        self.keys = sorted(counts.keys())
+        self.index = {k: i for i, k in enumerate(self.keys)}
+        self.n = len(self.keys)
+        self.tree = [0] * (self.n + 1)
+        for i, k in enumerate(self.keys, 1):
+            self.tree[i] += counts[k].item() if isinstance(counts[k], np.generic) else counts[k]
+            j = i + (i & -i)
+            if j <= self.n:
+                self.tree[j] += self.tree[i]
+        return
+
+    def __getitem__(self, key):
+        """Return the count for key."""
+        return self.counts[key]
+
+    def __len__(self):
+        """Return the number of keys."""
+        return self.n
+
+    def _add(self, i, delta):
+        """Add delta to the weight at position i."""
+        i += 1
+        while i <= self.n:
+            self.tree[i] += delta
+            i += i & -i
+        return
+
+    def _prefix(self, i):
+        """Return the sum of the weights of the first i positions."""
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def _find(self, target):
+        """Return the first position whose cumulative weight is greater than target."""
+        pos, acc = 0, 0
+        step = 1 << (self.n.bit_length() - 1) if self.n else 0
+        while step:
+            if pos + step <= self.n and acc + self.tree[pos + step] <= target:
+                pos += step
+                acc += self.tree[pos]
+            step >>= 1
+        return pos
+
+    def _range(self, min_key, max_key):
+        """Return the positions from the first key >= min_key to the last key <= max_key."""
+        return bisect.bisect_left(self.keys, min_key), bisect.bisect_right(self.keys, max_key)
+
+    @property
+    def total(self):
+        """The sum of all counts."""
+        return self._prefix(self.n)
+
+    def range_total(self, min_key, max_key):
+        """Return the sum of the counts for keys from min_key to max_key, inclusive."""
+        lo, hi = self._range(min_key, max_key)
+        return self._prefix(hi) - self._prefix(lo) if hi > lo else 0
+
+    def set(self, key, count):
+        """Set the count for key."""
+        self._add(self.index[key], count - self.counts[key])
+        self.counts[key] = count
+        return
+
+    def decrement(self, key, n=1):
+        """Decrease the count for key by n."""
+        self._add(self.index[key], -n)
+        self.counts[key] -= n
+        return
+
+    def draw(self, u=None):
+        """
+        Draw a key with probability proportional to its count.
+
+        Args:
+            u (float) : uniform random number in [0, 1) to use; if None, use random.random()
+
+        Returns:
+            The sampled key.
+        """
+        if u is None:
+            u = random.random()
+        pos = self._find(u * self.total)
+        return self.keys[min(pos, self.n - 1)]
+
+    def draw_range(self, min_key, max_key, u=None):
+        """
+        Draw a key from min_key to max_key, inclusive, with probability
+        proportional to its count.
+
+        Args:
+            min_key (int) : minimum key of the range to sample from
+            max_key (int) : maximum key of the range to sample from
+            u (float)     : uniform random number in [0, 1) to use; if None, use random.random()
+
+        Returns:
+            The sampled key.
+        """
+        lo, hi = self._range(min_key, max_key)
+        if hi <= lo:
+            errormsg = f'No keys in the range {min_key} to {max_key} to sample from.'
+            raise ValueError(errormsg)
+        if u is None:
+            u = random.random()
+        base = self._prefix(lo)
+        pos = self._find(base + u * (self._prefix(hi) - base))
+        return self.keys[min(max(pos, lo), hi - 1)]
 
 
 def check_dist(actual, expected, std=None, dist='norm', check='dist', label=None, alpha=0.05, size=10000, verbose=True, die=False, stats=False):
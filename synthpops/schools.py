@@ -26,6 +26,7 @@ from . import defaults
 from . import base as spb
 from . import sampling as spsamp
 from . import contact_networks as spcnx
+from . import arrays as sparr
 from .config import logger as log
 
 
@@ -396,35 +397,29 @@ def populate_schools(pop, student_lists, teacher_lists, non_teaching_staff_lists
         age_by_uid (dict)               : dictionary mapping each person's id to their age
         school_types (list)             : list of the school types
         school_mixing_types (list)      : list of the school mixing types
-    """
-    initialize_empty_schools(pop, len(student_lists))
 
+    Notes:
+        The schools are stored as a sp.GroupTable; each sp.School object is
+        only created when it is first accessed. Any existing schools are
+        replaced.
+    """
     log.debug("Populating schools.")
 
+    n_schools = len(student_lists)
     if school_types is None:
-        school_types = [None for ns in range(len(student_lists))]
+        school_types = [None for ns in range(n_schools)]
 
     if school_mixing_types is None:
-        school_mixing_types = [None for ns in range(len(student_lists))]
-
-    for ns in range(len(student_lists)):
-        students = student_lists[ns]
-        teachers = teacher_lists[ns]
-        non_teaching_staff = non_teaching_staff_lists[ns]
-        sc_type = school_types[ns]
-        school_mixing_type = school_mixing_types[ns]
-
-        kwargs = dict(scid=ns,
-                      sc_type=sc_type,
-                      school_mixing_type=school_mixing_type,
-                      student_uids=students,
-                      teacher_uids=teachers,
-                      non_teaching_staff_uids=non_teaching_staff,
-                      )
-        school = School()
-        school.set_layer_group(**kwargs)
-        pop.schools[school['scid']] = sc.dcp(school)
-
+        school_mixing_types = [None for ns in range(n_schools)]
+
+    pop.schools = sparr.GroupTable.from_lists(School, n_schools,
+                                              ragged=dict(student_uids=student_lists,
+                                                          teacher_uids=teacher_lists,
+                                                          non_teaching_staff_uids=non_teaching_staff_lists),
+                                              columns=dict(scid=np.arange(n_schools)),
+                                              labels=dict(sc_type=school_types,
+                                                          school_mixing_type=school_mixing_types))
+    pop.n_schools = len(pop.schools)
     return
 
 
@@ -461,6 +456,48 @@ def populate_classrooms(school, student_lists, teacher_lists, age_by_uid):
     return
 
 
+def populate_all_classrooms(pop, schools_in_groups, age_by_uid=None):
+    """
+    Populate the classrooms of every school with school_mixing_type equal to
+    'age_and_class_clustered'. Each classroom will be indexed at id clid.
+
+    Args:
+        pop (sp.Pop)             : population
+        schools_in_groups (dict) : a dictionary representing each school in terms of student_groups and teacher_groups corresponding to classrooms
+        age_by_uid (dict)        : dictionary mapping each person's id to their age
+
+    Notes:
+        If the schools are a sp.GroupTable none of whose schools have been
+        accessed yet, the classrooms are added to it as a nested table of
+        classrooms, without creating any objects. Otherwise the classrooms of
+        each school are populated in place.
+    """
+    if not isinstance(pop.schools, sparr.GroupTable) or not pop.schools.is_packed:
+        for ns in range(pop.n_schools):
+            initialize_empty_classrooms(pop.schools[ns], len(schools_in_groups[ns]['student_groups']))
+            populate_classrooms(pop.schools[ns], schools_in_groups[ns]['student_groups'], schools_in_groups[ns]['teacher_groups'], age_by_uid)
+        return
+
+    log.debug("Populating classrooms.")
+
+    clustered = np.array([mixing_type == 'age_and_class_clustered' for mixing_type in pop.schools.column('school_mixing_type')], dtype=bool)
+    counts = np.zeros(pop.n_schools, dtype=int)
+    student_lists, teacher_lists, clids = [], [], []
+    for ns in np.flatnonzero(clustered):
+        student_groups = schools_in_groups[ns]['student_groups']
+        counts[ns] = len(student_groups)
+        student_lists.extend(student_groups)
+        teacher_lists.extend(schools_in_groups[ns]['teacher_groups'][:len(student_groups)])
+        clids.extend(range(len(student_groups)))
+
+    classrooms = sparr.GroupTable.from_lists(Classroom, len(clids),
+                                             ragged=dict(student_uids=student_lists, teacher_uids=teacher_lists),
+                                             columns=dict(clid=clids))
+    pop.schools.set_column('n_classrooms', counts, present=clustered)
+    pop.schools.set_children('classrooms', counts, classrooms, present=clustered)
+    return
+
+
 def get_school_type_labels():
     school_type_labels = {'pk': 'Pre-school', 'es': 'Elementary School',
                           'ms': 'Middle School', 'hs': 'High School',
@@ -468,7 +505,7 @@ def get_school_type_labels():
     return school_type_labels
 
 
-def get_uids_in_school(datadir, n, location, state_location, country_location, age_by_uid=None, homes_by_uids=None, folder_name=None, use_default=False):
+def get_uids_in_school(datadir, n, location, state_location, country_location, age_by_uid=None, homes_by_uids=None, folder_name=None, use_default=False, rng=None):
     """
     Identify who in the population is attending school based on enrollment rates
     by age.
@@ -483,6 +520,7 @@ def get_uids_in_school(datadir, n, location, state_location, country_location, a
         homes_by_uids (list)      : A list of lists where each sublist is a household and the IDs of the household members.
         folder_name (string)      : The name of the folder the location is in, e.g. 'contact_networks'
         use_default (bool)        : If True, try to first use the other parameters to find data specific to the location under study; otherwise, return default data drawing from default_location, default_state, default_country.
+        rng (np.random.Generator) : random number generator for this stage; see sp.get_rng()
 
     Returns:
         A dictionary of students in schools mapping their ID to their age, a
@@ -490,6 +528,7 @@ def get_uids_in_school(datadir, n, location, state_location, country_location, a
         that age, and a dictionary mapping age to the number of students with
         that age.
     """
+    rng = spsamp.get_rng(rng)
     uids_in_school = {}
     uids_in_school_by_age = {}
     ages_in_school_count = dict.fromkeys(np.arange(101), 0)
@@ -505,7 +544,7 @@ def get_uids_in_school(datadir, n, location, state_location, country_location, a
 
             a = age_by_uid[uid]
             if rates[a] > 0:
-                b = np.random.binomial(1, rates[a])  # ask each person if they'll be a student - probably could be done in a faster, more aggregate way.
+                b = rng.binomial(1, rates[a])  # ask each person if they'll be a student - probably could be done in a faster, more aggregate way.
                 if b:
                     uids_in_school[uid] = a
                     uids_in_school_by_age[a].append(uid)
@@ -514,7 +553,7 @@ def get_uids_in_school(datadir, n, location, state_location, country_location, a
     return uids_in_school, uids_in_school_by_age, ages_in_school_count
 
 
-def send_students_to_school_with_school_types(school_size_distr_by_type, school_size_brackets, uids_in_school, uids_in_school_by_age, ages_in_school_count, school_types_distr_by_age, school_type_age_ranges):
+def send_students_to_school_with_school_types(school_size_distr_by_type, school_size_brackets, uids_in_school, uids_in_school_by_age, ages_in_school_count, school_types_distr_by_age, school_type_age_ranges, rng=None):
     """
     A method to send students to school together. This method uses the
     dictionaries school_types_distr_by_age, school_type_age_ranges, and
@@ -537,6 +576,7 @@ def send_students_to_school_with_school_types(school_size_distr_by_type, school_
         ages_in_school_count (dict)      : A dictionary mapping age to the number of students with that age.
         school_types_distr_by_age (dict) : A dictionary of the school type for each age.
         school_type_age_ranges (dict)    : A dictionary of the age range for each school type.
+        rng (np.random.Generator)        : random number generator for this stage; see sp.get_rng()
 
     Returns:
         Two lists of lists and third flat list, the first where each sublist is
@@ -545,6 +585,7 @@ def send_students_to_school_with_school_types(school_size_distr_by_type, school_
         list of the school types for each school, where each school has a single
         string to represent it's school type.
     """
+    rng = spsamp.get_rng(rng)
 
     student_age_lists = []
     student_uid_lists = []
@@ -560,7 +601,7 @@ def send_students_to_school_with_school_types(school_size_distr_by_type, school_
         new_student_ages = []
         new_student_uids = []
 
-        aindex = age_keys[spsamp.fast_choice(ages_in_school_distr.values())]
+        aindex = age_keys[spsamp.fast_choice(ages_in_school_distr.values(), rng=rng)]
 
         uid = uids_in_school_by_age[aindex][0]
         uids_in_school_by_age[aindex].remove(uid)
@@ -573,14 +614,14 @@ def send_students_to_school_with_school_types(school_size_distr_by_type, school_
 
         school_types_possible = sorted(school_types_distr_by_age[aindex].keys())
         prob = [school_types_distr_by_age[aindex][s] for s in school_types_possible]
-        school_type = np.random.choice(school_types_possible, p=prob, size=1)[0]
+        school_type = rng.choice(school_types_possible, p=prob, size=1)[0]
         school_type_age_range = school_type_age_ranges[school_type]
 
         school_size_distr = school_size_distr_by_type[school_type]
 
         prob_by_sorted_size_brackets = [school_size_distr[b] for b in sorted_size_brackets]
-        size_bracket = np.random.choice(sorted_size_brackets, p=prob_by_sorted_size_brackets)
-        size = np.random.choice(school_size_brackets[size_bracket])
+        size_bracket = rng.choice(sorted_size_brackets, p=prob_by_sorted_size_brackets)
+        size = rng.choice(school_size_brackets[size_bracket])
         size -= 1
 
         potential_student_ages = []
@@ -598,7 +639,7 @@ def send_students_to_school_with_school_types(school_size_distr_by_type, school_
                 log.debug(f'School size ({size + 1}) smaller than minimum school size {school_size_brackets[0][0]}. Will try now to merge with another school of the same type already made.')
 
                 # another random school of the same type
-                rns = other_schools[spsamp.fast_choice(np.ones(len(other_schools)))]
+                rns = other_schools[spsamp.fast_choice(np.ones(len(other_schools)), rng=rng)]
 
                 for n, a in enumerate(school_type_age_range):
                     count = len(uids_in_school_by_age[a])
@@ -626,7 +667,7 @@ def send_students_to_school_with_school_types(school_size_distr_by_type, school_
                 school_types.append(school_type)
 
         else:
-            chosen = np.random.choice(potential_student_ages, size=size, replace=False)
+            chosen = rng.choice(potential_student_ages, size=size, replace=False)
             school_age_count = Counter(chosen)
 
             for n, a in enumerate(school_type_age_range):
@@ -697,7 +738,7 @@ def add_contacts_from_group(popdict, group, setting):
     return popdict
 
 
-def generate_random_contacts_for_additional_school_members(school_uids, additional_school_member_uids, average_additional_school_members_degree=20):
+def generate_random_contacts_for_additional_school_members(school_uids, additional_school_member_uids, average_additional_school_members_degree=20, rng=None):
     """
     Generate random contacts for additional school members. This might be people
     like non teaching staff such as principals, administrative staff, cleaning
@@ -707,25 +748,27 @@ def generate_random_contacts_for_additional_school_members(school_uids, addition
         school_uids (list)                               : list of uids of individuals already in the school
         additional_school_member_uids (list)             : list of uids of the additional school member who do not have contacts yet or for whom more contacts are needed
         average_additional_school_members_degree (float) : average degree for the additional school members
+        rng (np.random.Generator)                        : random number generator to draw from; see sp.get_rng()
 
     Returns:
         List of edges for the additional school members in school.
 
     """
+    rng = spsamp.get_rng(rng)
     edges = []
     all_school_uids = school_uids.copy() + additional_school_member_uids.copy()
     for uid in additional_school_member_uids:
-        k = np.random.poisson(average_additional_school_members_degree)
+        k = rng.poisson(average_additional_school_members_degree)
         possible_neighbors = all_school_uids.copy()
         possible_neighbors.remove(uid)
-        new_neighbours = np.random.choice(possible_neighbors, k)
+        new_neighbours = rng.choice(possible_neighbors, k)
         for j in new_neighbours:
             e = (uid, j)
             edges.append(e)
     return edges
 
 
-def generate_random_classes_by_grade_in_school(student_uids, student_ages, age_by_uid, grade_age_mapping, age_grade_mapping, average_class_size=20, inter_grade_mixing=0.1):
+def generate_random_classes_by_grade_in_school(student_uids, student_ages, age_by_uid, grade_age_mapping, age_grade_mapping, average_class_size=20, inter_grade_mixing=0.1, rng=None):
     """
     Generate edges for contacts mostly within the same age/grade. Edges are
     randomly distributed so that clustering is roughly average_class_size/size
@@ -740,11 +783,13 @@ def generate_random_classes_by_grade_in_school(student_uids, student_ages, age_b
         age_grade_mapping (dict)   : dict mapping age to a grade
         average_class_size (float) : average class size
         inter_grade_mixing (float) : percent of edges that rewired to create edges across grades in schools when school_mixing_type is 'age_clustered'
+        rng (np.random.Generator)  : random number generator to draw from; see sp.get_rng()
 
     Returns:
         List of edges between students in school.
 
     """
+    rng = spsamp.get_rng(rng)
     # what are the ages in the school
     age_counter = Counter(student_ages)
     age_keys = sorted(age_counter.keys())
@@ -767,15 +812,11 @@ def generate_random_classes_by_grade_in_school(student_uids, student_ages, age_b
     # create a graph of contacts in the school
     G = nx.Graph()
 
-    for a in uids_in_school_by_age:
-
-        # for Erdos Renyi graph of N nodes and average degree k, p is essentially the density of all possible edges --> p = # edges / # all possible edges. With average degree k, # of edges is roughly N * k / 2 and # of all possible edges is N * (N-1) / 2, which leads us to k = (N - 1) * p or, in Stirling's Approx. k = N * p, that is p = k / N
-        Ga = spcnx.random_graph_model(uids_in_school_by_age[a], average_class_size)
-        for e in Ga.edges():
-            i, j = e
-
-            # add each edge to the overall school graph
-            G.add_edge(uids_in_school_by_age[a][i], uids_in_school_by_age[a][j])
+    # for Erdos Renyi graph of N nodes and average degree k, p is essentially the density of all possible edges --> p = # edges / # all possible edges. With average degree k, # of edges is roughly N * k / 2 and # of all possible edges is N * (N-1) / 2, which leads us to k = (N - 1) * p or, in Stirling's Approx. k = N * p, that is p = k / N
+    # generate the random graph of each age/grade at once and add each edge to the overall school graph
+    uids_by_age = np.array([uid for a in uids_in_school_by_age for uid in uids_in_school_by_age[a]], dtype=int)
+    edges = spcnx.get_random_graph_edges([len(uids_in_school_by_age[a]) for a in uids_in_school_by_age], average_class_size, seed=rng)
+    G.add_edges_from(uids_by_age[edges].tolist())
 
     # make sure all students are in the graph by adding those without an edge yet
     missing_uids = set(student_uids) - set(G.nodes())
@@ -784,17 +825,17 @@ def generate_random_classes_by_grade_in_school(student_uids, student_ages, age_b
     # flag was turned on to indicate that the average degree is too low. How can we add more edges? do the following: create a second random graph across the entire school. Loop over everyone and grab edges as necessary. Loop again to remove edges if it's too many.
     if age_groups_smaller_than_degree:
 
-        G = add_random_contacts_from_graph(G, average_class_size)
+        G = add_random_contacts_from_graph(G, average_class_size, rng=rng)
 
     # rewire some edges between people within the same grade/age to now being edges across grades/ages
     E = list(G.edges())
-    np.random.shuffle(E)
+    rng.shuffle(E)
 
     nE = int(len(E) / 2.)  # we'll loop over edges in pairs so only need to loop over half the length
     missed_rewiring = 0
 
     for n in range(nE):
-        if np.random.binomial(1, p=inter_grade_mixing):
+        if rng.binomial(1, p=inter_grade_mixing):
 
             i = 2 * n
             j = 2 * n + 1
@@ -843,7 +884,7 @@ def generate_random_classes_by_grade_in_school(student_uids, student_ages, age_b
     return list(G.edges())
 
 
-def generate_clustered_classes_by_grade_in_school(student_uids, student_ages, age_by_uid, grade_age_mapping, age_grade_mapping, average_class_size=20, return_edges=False):
+def generate_clustered_classes_by_grade_in_school(student_uids, student_ages, age_by_uid, grade_age_mapping, age_grade_mapping, average_class_size=20, return_edges=False, rng=None):
     """
     Generate edges for contacts mostly within the same age/grade. Edges are
     randomly distributed so that clustering is roughly average_class_size/size
@@ -859,11 +900,13 @@ def generate_clustered_classes_by_grade_in_school(student_uids, student_ages, ag
         age_grade_mapping (dict)   : dict mapping age to a grade
         average_class_size (float) : average class size
         return_edges (bool)        : If True, return edges, else return two groups of contacts - students and teachers for each class
+        rng (np.random.Generator)  : random number generator to draw from; see sp.get_rng()
 
     Returns:
         List of edges between students in school or groups of contacts.
 
     """
+    rng = spsamp.get_rng(rng)
     # what are the ages in the school
     age_counter = Counter(student_ages)
     age_keys = sorted(age_counter.keys())
@@ -885,10 +928,10 @@ def generate_clustered_classes_by_grade_in_school(student_uids, student_ages, ag
 
     for a in uids_in_school_by_age:
         nodes = sc.dcp(uids_in_school_by_age[a])
-        np.random.shuffle(nodes)
+        rng.shuffle(nodes)
 
         while len(nodes) > 0:
-            cluster_size = np.random.poisson(average_class_size)
+            cluster_size = rng.poisson(average_class_size)
 
             if cluster_size > len(nodes):
                 # gather the last group of nodes into a pool to choose from afterwards
@@ -901,10 +944,10 @@ def generate_clustered_classes_by_grade_in_school(student_uids, student_ages, ag
             nodes = nodes[cluster_size:]
 
     # shuffle the students left over to place into classrooms
-    np.random.shuffle(nodes_left)
+    rng.shuffle(nodes_left)
 
     while len(nodes_left) > 0:
-        cluster_size = np.random.poisson(average_class_size)
+        cluster_size = rng.poisson(average_class_size)
 
         if cluster_size > len(nodes_left):
             cluster_size = len(nodes_left)
@@ -922,7 +965,7 @@ def generate_clustered_classes_by_grade_in_school(student_uids, student_ages, ag
 
     else:
         for i in nodes_left:
-            ng = spsamp.fast_choice(np.ones(len(groups)))  # choose one of the other classes to add to
+            ng = spsamp.fast_choice(np.ones(len(groups)), rng=rng)  # choose one of the other classes to add to
             groups[ng].append(i)
 
     if return_edges: # pragma: no cover
@@ -960,36 +1003,33 @@ def generate_clustered_classes_by_grade_in_school(student_uids, student_ages, ag
         return groups
 
 
-def generate_edges_between_teachers(teacher_uids, average_teacher_teacher_degree):
+def generate_edges_between_teachers(teacher_uids, average_teacher_teacher_degree, rng=None):
     """
     Generate edges between teachers.
 
     Args:
         teachers (list)                      : a list of teachers
         average_teacher_teacher_degree (int) : average number of contacts with other teachers
+        rng (np.random.Generator)            : random number generator to draw from; see sp.get_rng()
 
     Return:
         List of edges between teachers.
 
     """
+    rng = spsamp.get_rng(rng)
     edges = []
     if average_teacher_teacher_degree > len(teacher_uids):
         eiter = combinations(teacher_uids, 2)
         edges = [e for e in eiter]
 
     else:
-        G = spcnx.random_graph_model(teacher_uids, average_teacher_teacher_degree)
-        for e in G.edges():
-            i, j = e
-            teacher_i = teacher_uids[i]
-            teacher_j = teacher_uids[j]
-            e = (teacher_i, teacher_j)
-            edges.append(e)
+        teacher_edges = spcnx.random_graph_edges(len(teacher_uids), average_teacher_teacher_degree, seed=rng)
+        edges = [(teacher_uids[i], teacher_uids[j]) for i, j in teacher_edges.tolist()]
 
     return edges
 
 
-def generate_edges_for_teachers_in_random_classes(student_uids, student_ages, teacher_uids, age_by_uid, average_student_teacher_ratio=20, average_teacher_teacher_degree=4):
+def generate_edges_for_teachers_in_random_classes(student_uids, student_ages, teacher_uids, age_by_uid, average_student_teacher_ratio=20, average_teacher_teacher_degree=4, rng=None):
     """
     Generate edges for teachers, including to both students and other teachers
     at the same school. Well mixed contacts within the same age/grade, some
@@ -1004,11 +1044,13 @@ def generate_edges_for_teachers_in_random_classes(student_uids, student_ages, te
         age_grade_mapping (dict)               : dict mapping age to a grade
         average_student_teacher_ratio (float)  : average number of students per teacher
         average_teacher_teacher_degree (float) : average number of contacts with other teachers
+        rng (np.random.Generator)              : random number generator to draw from; see sp.get_rng()
 
     Return:
         List of edges connected to teachers.
 
     """
+    rng = spsamp.get_rng(rng)
     age_keys = list(set(student_ages))
 
     # create a dictionary with the list of uids for each age/grade
@@ -1036,29 +1078,29 @@ def generate_edges_for_teachers_in_random_classes(student_uids, student_ages, te
         elif n_teachers_needed > len(available_teachers):
             selected_teachers = available_teachers
             n_teachers_needed = n_teachers_needed - len(available_teachers)
-            selected_teachers += list(np.random.choice(teachers_assigned, replace=False, size=n_teachers_needed))
+            selected_teachers += list(rng.choice(teachers_assigned, replace=False, size=n_teachers_needed))
 
         else:
-            selected_teachers = np.random.choice(available_teachers, replace=False, size=n_teachers_needed)
+            selected_teachers = rng.choice(available_teachers, replace=False, size=n_teachers_needed)
             for t in selected_teachers:
                 available_teachers.remove(t)
                 teachers_assigned.append(t)
 
         # only adds one teacher per student
         for student in uids_in_school_by_age[a]:
-            teacher = np.random.choice(selected_teachers)
+            teacher = rng.choice(selected_teachers)
             e = (student, teacher)
             edges.append(e)
 
     # some teachers left so add them as contacts to other students
     for teacher in available_teachers:
 
-        n_students = max(1, np.random.poisson(average_student_teacher_ratio))
+        n_students = max(1, rng.poisson(average_student_teacher_ratio))
 
         if n_students > len(student_uids):
             n_students = len(student_uids)
 
-        selected_students = np.random.choice(student_uids, replace=False, size=n_students)
+        selected_students = rng.choice(student_uids, replace=False, size=n_students)
 
         for student in selected_students:
             e = (student, teacher)
@@ -1068,7 +1110,7 @@ def generate_edges_for_teachers_in_random_classes(student_uids, student_ages, te
 
     available_teachers = []
 
-    teacher_teacher_edges = generate_edges_between_teachers(teachers_assigned, average_teacher_teacher_degree)
+    teacher_teacher_edges = generate_edges_between_teachers(teachers_assigned, average_teacher_teacher_degree, rng=rng)
     edges += teacher_teacher_edges
 
     G = nx.Graph()
@@ -1083,7 +1125,7 @@ def generate_edges_for_teachers_in_random_classes(student_uids, student_ages, te
     return edges
 
 
-def generate_edges_for_teachers_in_clustered_classes(groups, teacher_uids, average_teacher_teacher_degree=4, return_edges=False):
+def generate_edges_for_teachers_in_clustered_classes(groups, teacher_uids, average_teacher_teacher_degree=4, return_edges=False, rng=None):
     """
     Generate edges for teachers, including to both students and other teachers
     at the same school. Students and teachers are clustered into disjoint
@@ -1094,14 +1136,16 @@ def generate_edges_for_teachers_in_clustered_classes(groups, teacher_uids, avera
         teacher_uids (list)                    : list of teachers in the school
         average_teacher_teacher_degree (float) : average number of contacts with other teachers
         return_edges (bool)                    : If True, return edges, else return two groups of contacts - students and teachers for each class
+        rng (np.random.Generator)              : random number generator to draw from; see sp.get_rng()
 
     Return:
         List of edges connected to teachers.
 
     """
+    rng = spsamp.get_rng(rng)
     edges = []
     teacher_groups = []
-    np.random.shuffle(groups)  # shuffle the clustered groups of students / classes so that the classes aren't ordered from youngest to oldest
+    rng.shuffle(groups)  # shuffle the clustered groups of students / classes so that the classes aren't ordered from youngest to oldest
 
     available_teachers = sc.dcp(teacher_uids)
 
@@ -1120,7 +1164,7 @@ def generate_edges_for_teachers_in_clustered_classes(groups, teacher_uids, avera
             group_to_break = groups[-1]
 
             for student in group_to_break:
-                ng = np.random.randint(len(groups) - 1)  # find another class to join
+                ng = rng.integers(len(groups) - 1)  # find another class to join
                 groups[ng].append(student)
             groups = groups[:-1]
 
@@ -1137,7 +1181,7 @@ def generate_edges_for_teachers_in_clustered_classes(groups, teacher_uids, avera
 
         # spread extra teachers among the classes
         for t in available_teachers:
-            ng = np.random.randint(len(groups))
+            ng = rng.integers(len(groups))
             teacher_groups[ng].append(t)
         available_teachers = []
 
@@ -1151,7 +1195,7 @@ def generate_edges_for_teachers_in_clustered_classes(groups, teacher_uids, avera
     if return_edges:
         teacher_teacher_edges = []
         for ng, teacher_group in enumerate(teacher_groups):
-            teacher_teacher_edges += generate_edges_between_teachers(teacher_group, average_teacher_teacher_degree)
+            teacher_teacher_edges += generate_edges_between_teachers(teacher_group, average_teacher_teacher_degree, rng=rng)
         edges += teacher_teacher_edges
         # not returning student-student contacts
         return edges
@@ -1159,7 +1203,7 @@ def generate_edges_for_teachers_in_clustered_classes(groups, teacher_uids, avera
         return groups, teacher_groups
 
 
-def generate_random_contacts_across_school(all_school_uids, average_class_size):
+def generate_random_contacts_across_school(all_school_uids, average_class_size, rng=None):
     """
     Generate edges for contacts in a school where everyone mixes randomly.
     Assuming class and thus class size determines effective contacts.
@@ -1167,20 +1211,21 @@ def generate_random_contacts_across_school(all_school_uids, average_class_size):
     Args:
         all_school_uids (list)   : list of uids of individuals in the school
         average_class_size (int) : average class size or number of contacts in school
+        rng (np.random.Generator) : random number generator to draw from; see sp.get_rng()
 
     Returns:
         List of edges between individuals in school.
     """
-    edges = []
-    G = spcnx.random_graph_model(all_school_uids, average_class_size)  # undirected graph
-    for u, uid in enumerate(all_school_uids):
-        es = [(uid, all_school_uids[v]) for v in G.neighbors(u)]
-        edges.extend(es)
+    rng = spsamp.get_rng(rng)
+    if len(all_school_uids) == 0:
+        raise ValueError(f"Expected all_school_uids to be a non-empty list. Instead, the length of all_school_uids is {len(all_school_uids)}.")
+    school_edges = spcnx.random_graph_edges(len(all_school_uids), average_class_size, seed=rng)
+    edges = [(all_school_uids[i], all_school_uids[j]) for i, j in school_edges.tolist()]
 
     return edges
 
 
-def add_school_edges(popdict, student_uids, student_ages, teacher_uids, non_teaching_staff_uids, age_by_uid, grade_age_mapping, age_grade_mapping, average_class_size=20, inter_grade_mixing=0.1, average_student_teacher_ratio=20, average_teacher_teacher_degree=3, average_additional_staff_degree=20, school_mixing_type='random'):
+def add_school_edges(popdict, student_uids, student_ages, teacher_uids, non_teaching_staff_uids, age_by_uid, grade_age_mapping, age_grade_mapping, average_class_size=20, inter_grade_mixing=0.1, average_student_teacher_ratio=20, average_teacher_teacher_degree=3, average_additional_staff_degree=20, school_mixing_type='random', rng=None):
     """
     Generate edges for teachers, including to both students and other teachers
     at the same school. When school_mixing_type is 'age_clustered' then
@@ -1204,6 +1249,7 @@ def add_school_edges(popdict, student_uids, student_ages, teacher_uids, non_teac
         average_teacher_teacher_degree (float)  : average number of contacts with other teachers
         average_additional_staff_degree (float) : The average number of contacts per additional non teaching staff in schools.
         school_mixing_type(str)                 : 'random' for well mixed schools, 'age_clustered' for well mixed within the same grade and some intermixing with other grades, 'age_and_class_clustered' for disjoint classes in a school by age or grade
+        rng (np.random.Generator)               : random number generator to draw from; see sp.get_rng()
 
     Return:
         Updated popdict with edges generated in schools.
@@ -1211,38 +1257,99 @@ def add_school_edges(popdict, student_uids, student_ages, teacher_uids, non_teac
     Notes:
         average_teacher_teacher_degree will not be used in school_mixing_type == 'random' scenario.
     """
+    rng = spsamp.get_rng(rng)
+    edges, groups, student_groups, teacher_groups = get_school_edges(student_uids, student_ages, teacher_uids, non_teaching_staff_uids, age_by_uid,
+                                                                     grade_age_mapping, age_grade_mapping, average_class_size=average_class_size,
+                                                                     inter_grade_mixing=inter_grade_mixing,
+                                                                     average_student_teacher_ratio=average_student_teacher_ratio,
+                                                                     average_teacher_teacher_degree=average_teacher_teacher_degree,
+                                                                     average_additional_staff_degree=average_additional_staff_degree,
+                                                                     school_mixing_type=school_mixing_type, rng=rng)
+    add_school_edges_from_lists(popdict, edges, groups)
+
+    return popdict, student_groups, teacher_groups
+
+
+def add_school_edges_from_lists(popdict, edges, groups):
+    """
+    Add the school contacts returned by get_school_edges() to popdict.
+
+    Args:
+        popdict (dict) : dictionary of people
+        edges (list)   : list of lists of edges, added in order
+        groups (list)  : list of fully connected groups such as classes, added before the edges in edges[1:]
+
+    Returns:
+        Updated popdict.
+    """
+    add_contacts_from_edgelist(popdict, edges[0], 'S')
+    for group in groups:
+        add_contacts_from_group(popdict, group, 'S')
+    for edgelist in edges[1:]:
+        add_contacts_from_edgelist(popdict, edgelist, 'S')
+    return popdict
+
+
+def get_school_edges(student_uids, student_ages, teacher_uids, non_teaching_staff_uids, age_by_uid, grade_age_mapping, age_grade_mapping, average_class_size=20, inter_grade_mixing=0.1, average_student_teacher_ratio=20, average_teacher_teacher_degree=3, average_additional_staff_degree=20, school_mixing_type='random', seed=None, rng=None):
+    """
+    Generate the contacts in a school without adding them to a popdict, so that
+    schools can be generated independently of each other. See
+    add_school_edges() for details of each school mixing type.
+
+    Args:
+        student_uids (list)                     : list of uids of students in the school
+        student_ages (list)                     : list of the ages of the students in the school
+        teacher_uids (list)                     : list of teachers in the school
+        non_teaching_staff_uids (list)          : list of non teaching staff in the school
+        age_by_uid (dict)                       : dict mapping uid to age
+        grade_age_mapping (dict)                : dict mapping grade to an age
+        age_grade_mapping (dict)                : dict mapping age to a grade
+        average_class_size (float)              : average class size
+        inter_grade_mixing (float)              : percent of edges that rewired to create edges across grades in schools when school_mixing_type is 'age_clustered'
+        average_student_teacher_ratio (float)   : average number of students per teacher
+        average_teacher_teacher_degree (float)  : average number of contacts with other teachers
+        average_additional_staff_degree (float) : The average number of contacts per additional non teaching staff in schools.
+        school_mixing_type(str)                 : 'random' for well mixed schools, 'age_clustered' for well mixed within the same grade and some intermixing with other grades, 'age_and_class_clustered' for disjoint classes in a school by age or grade
+        seed (int)                              : If given, seed a new random number generator for the school; see sp.get_rng()
+        rng (np.random.Generator)               : random number generator to draw from if seed is not given; see sp.get_rng()
+
+    Return:
+        A list of lists of edges, a list of fully connected groups, and the
+        student and teacher groups of the school. Use
+        add_school_edges_from_lists() to add the edges and groups to a popdict.
+    """
+    rng = spsamp.get_rng(rng if seed is None else seed)
+
     # completely random contacts across the school, no guarantee of contact with a teacher, much like universities
     available_school_mixing_types = ['random', 'age_clustered', 'age_and_class_clustered']
 
     if school_mixing_type not in available_school_mixing_types:
         print(f"school_mixing_type: {school_mixing_type} 'does not exist. Please change this to one of: {available_school_mixing_types}")
 
+    edges = [[]]
+    groups = []
+    student_groups = [student_uids]
+    teacher_groups = [teacher_uids]
+
     if school_mixing_type == 'random':
         school_uids = []
         school_uids.extend(student_uids)
         school_uids.extend(teacher_uids)
-        edges = generate_random_contacts_across_school(school_uids, average_class_size)
-        add_contacts_from_edgelist(popdict, edges, 'S')
-        student_groups = [student_uids]
-        teacher_groups = [teacher_uids]
+        edges[0] = generate_random_contacts_across_school(school_uids, average_class_size, rng=rng)
 
     # random contacts across a grade in the school, most edges will across the same age group, much like middle schools or high schools, the inter_grade_mixing parameter is a tuning parameter, students get at least one teacher as a contact
     elif school_mixing_type == 'age_clustered':
-        edges = generate_random_classes_by_grade_in_school(student_uids, student_ages, age_by_uid, grade_age_mapping, age_grade_mapping, average_class_size, inter_grade_mixing)
-
-        teacher_edges = generate_edges_for_teachers_in_random_classes(student_uids, student_ages, teacher_uids, age_by_uid, average_student_teacher_ratio, average_teacher_teacher_degree)
-        edges += teacher_edges
+        edges[0] = generate_random_classes_by_grade_in_school(student_uids, student_ages, age_by_uid, grade_age_mapping, age_grade_mapping, average_class_size, inter_grade_mixing, rng=rng)
 
-        add_contacts_from_edgelist(popdict, edges, 'S')
-        student_groups = [student_uids]
-        teacher_groups = [teacher_uids]
+        teacher_edges = generate_edges_for_teachers_in_random_classes(student_uids, student_ages, teacher_uids, age_by_uid, average_student_teacher_ratio, average_teacher_teacher_degree, rng=rng)
+        edges[0] += teacher_edges
 
     # completely clustered into classes by age, one teacher per class at least
     elif school_mixing_type == 'age_and_class_clustered':
 
-        student_groups = generate_clustered_classes_by_grade_in_school(student_uids, student_ages, age_by_uid, grade_age_mapping, age_grade_mapping, average_class_size=average_class_size, return_edges=False)
+        student_groups = generate_clustered_classes_by_grade_in_school(student_uids, student_ages, age_by_uid, grade_age_mapping, age_grade_mapping, average_class_size=average_class_size, return_edges=False, rng=rng)
         student_groups_2 = sc.dcp(student_groups)
-        student_groups, teacher_groups = generate_edges_for_teachers_in_clustered_classes(student_groups, teacher_uids, average_teacher_teacher_degree=average_teacher_teacher_degree)
+        student_groups, teacher_groups = generate_edges_for_teachers_in_clustered_classes(student_groups, teacher_uids, average_teacher_teacher_degree=average_teacher_teacher_degree, rng=rng)
 
         sum_diff = sum([len(group) for group in student_groups]) - sum([len(group) for group in student_groups_2])
         assert sum_diff == 0, f'Check failed. sum of the differences between student groups is not zero. Total school enrollment changed between the step of creating student groups and assigning teachers to each group. sum is {sum_diff}'
@@ -1253,21 +1360,21 @@ def add_school_edges(popdict, student_uids, student_ages, teacher_uids, non_teac
             group = student_group
             group += teacher_group
 
-            add_contacts_from_group(popdict, group, 'S')
+            groups.append(group)
 
         log.debug(f"average_class_size, {average_class_size}, 'class_group sizes', {[len(group) for group in student_groups]}")
 
         # additional edges between teachers in different classes - makes distinct clusters connected - this may add edges again between teachers in the same class
-        teacher_edges = generate_edges_between_teachers(teacher_uids, average_teacher_teacher_degree)
-        add_contacts_from_edgelist(popdict, teacher_edges, 'S')
+        teacher_edges = generate_edges_between_teachers(teacher_uids, average_teacher_teacher_degree, rng=rng)
+        edges.append(teacher_edges)
 
     all_school_uids = []
     all_school_uids.extend(student_uids)
     all_school_uids.extend(teacher_uids)
-    additional_staff_edges = generate_random_contacts_for_additional_school_members(all_school_uids, non_teaching_staff_uids, average_additional_staff_degree)
-    add_contacts_from_edgelist(popdict, additional_staff_edges, 'S')
+    additional_staff_edges = generate_random_contacts_for_additional_school_members(all_school_uids, non_teaching_staff_uids, average_additional_staff_degree, rng=rng)
+    edges.append(additional_staff_edges)
 
-    return popdict, student_groups, teacher_groups
+    return edges, groups, student_groups, teacher_groups
 
 
 def get_school_types_distr_by_age(school_type_age_ranges):
@@ -1338,7 +1445,7 @@ def get_school_type_data(datadir, location, state_location, country_location, us
     return school_size_distr_by_type, school_size_brackets, school_type_age_ranges
 
 
-def assign_teachers_to_schools(student_age_lists, student_uid_lists, employment_rates, workers_by_age_to_assign_count, potential_worker_uids, potential_worker_uids_by_age, potential_worker_ages_left_count, average_student_teacher_ratio=20, teacher_age_min=25, teacher_age_max=75):
+def assign_teachers_to_schools(student_age_lists, student_uid_lists, employment_rates, workers_by_age_to_assign_count, potential_worker_uids, potential_worker_uids_by_age, potential_worker_ages_left_count, average_student_teacher_ratio=20, teacher_age_min=25, teacher_age_max=75, rng=None):
     """
     Assign teachers to each school according to the average student-teacher
     ratio.
@@ -1354,6 +1461,7 @@ def assign_teachers_to_schools(student_age_lists, student_uid_lists, employment_
         average_student_teacher_ratio (float)   : The average number of students per teacher
         teacher_age_min (int)                   : The minimum age for teachers
         teacher_age_max (int)                   : The maximum age for teachers
+        rng (np.random.Generator)               : random number generator for this stage; see sp.get_rng()
 
     Returns:
         List of lists of schools with the ages of individuals in each, lists of
@@ -1364,12 +1472,15 @@ def assign_teachers_to_schools(student_age_lists, student_uid_lists, employment_
     """
 
     log.debug('assign_teachers_to_schools()')
+    rng = spsamp.get_rng(rng)
+    potential_worker_uids_by_age = spsamp.make_draw_pools(potential_worker_uids_by_age)
     # matrix method will already get some teachers into schools so student_teacher_ratio should be higher
 
     all_teachers = dict.fromkeys(np.arange(101), 0)
 
     teacher_age_lists = []
     teacher_uid_lists = []
+    worker_sampler = spsamp.CountSampler(workers_by_age_to_assign_count)  # updates workers_by_age_to_assign_count as teachers are placed
 
     for n in range(len(student_age_lists)):
         student_ages = student_age_lists[n]
@@ -1387,13 +1498,12 @@ def assign_teachers_to_schools(student_age_lists, student_uid_lists, employment_
 
         for nt in range(nteachers):
 
-            a = spsamp.sample_from_range(workers_by_age_to_assign_count, teacher_age_min, teacher_age_max)
-            uid = potential_worker_uids_by_age[a][0]
+            a = worker_sampler.draw_range(teacher_age_min, teacher_age_max, rng.random())
+            uid = potential_worker_uids_by_age[a].draw()
             teacher_ages.append(a)
             all_teachers[a] += 1
 
-            potential_worker_uids_by_age[a].remove(uid)
-            workers_by_age_to_assign_count[a] -= 1
+            worker_sampler.decrement(a)
             potential_worker_ages_left_count[a] -= 1
             potential_worker_uids.pop(uid, None)
 
@@ -1412,7 +1522,7 @@ def assign_teachers_to_schools(student_age_lists, student_uid_lists, employment_
     return teacher_age_lists, teacher_uid_lists, potential_worker_uids, potential_worker_uids_by_age, workers_by_age_to_assign_count
 
 
-def assign_additional_staff_to_schools(student_uid_lists, teacher_uid_lists, workers_by_age_to_assign_count, potential_worker_uids, potential_worker_uids_by_age, potential_worker_ages_left_count, average_student_teacher_ratio=20, average_student_all_staff_ratio=15, staff_age_min=20, staff_age_max=75, with_non_teaching_staff=False):
+def assign_additional_staff_to_schools(student_uid_lists, teacher_uid_lists, workers_by_age_to_assign_count, potential_worker_uids, potential_worker_uids_by_age, potential_worker_ages_left_count, average_student_teacher_ratio=20, average_student_all_staff_ratio=15, staff_age_min=20, staff_age_max=75, with_non_teaching_staff=False, rng=None):
     """
     Assign additional staff to each school according to the average student to
     all staff ratio.
@@ -1429,6 +1539,7 @@ def assign_additional_staff_to_schools(student_uid_lists, teacher_uid_lists, wor
         staff_age_min (int)                     : The minimum age for non teaching staff.
         staff_age_max (int)                     : The maximum age for non teaching staff.
         with_non_teaching_staff (bool)          : If True, includes non teaching staff.
+        rng (np.random.Generator)               : random number generator for this stage; see sp.get_rng()
 
     Returns:
         List of lists of schools with the ids of non teaching staff for each
@@ -1438,6 +1549,7 @@ def assign_additional_staff_to_schools(student_uid_lists, teacher_uid_lists, wor
         teachers have been assigned.
     """
     log.debug('assign_additional_staff_to_schools()')
+    rng = spsamp.get_rng(rng)
 
     # with_non_teaching_staff is False so this method will not select anyone to be a non teaching staff member at schools - thus return empty lists for non_teaching_staff_uids
     if not with_non_teaching_staff:
@@ -1473,18 +1585,19 @@ def assign_additional_staff_to_schools(student_uid_lists, teacher_uid_lists, wor
     n_non_teaching_staff_list = [i if i > 0 else 1 for i in n_non_teaching_staff_list]  # force one extra staff member beyond teachers
 
     non_teaching_staff_uid_lists = []
+    potential_worker_uids_by_age = spsamp.make_draw_pools(potential_worker_uids_by_age)
+    worker_sampler = spsamp.CountSampler(workers_by_age_to_assign_count)  # updates workers_by_age_to_assign_count as staff are placed
 
     for i in range(len(n_non_teaching_staff_list)):
         n_non_teaching_staff = n_non_teaching_staff_list[i]  # how many non teaching staff for the school
         non_teaching_staff_uids_in_this_school = []
 
         for j in range(n_non_teaching_staff):
-            a = spsamp.sample_from_range(workers_by_age_to_assign_count, staff_age_min, staff_age_max)
-            uid = potential_worker_uids_by_age[a][0]
-            workers_by_age_to_assign_count[a] -= 1
+            a = worker_sampler.draw_range(staff_age_min, staff_age_max, rng.random())
+            uid = potential_worker_uids_by_age[a].draw()
+            worker_sampler.decrement(a)
             potential_worker_ages_left_count[a] -= 1
             potential_worker_uids.pop(uid, None)
-            potential_worker_uids_by_age[a].remove(uid)
 
             non_teaching_staff_uids_in_this_school.append(uid)
 
@@ -1493,7 +1606,7 @@ def assign_additional_staff_to_schools(student_uid_lists, teacher_uid_lists, wor
     return non_teaching_staff_uid_lists, potential_worker_uids, potential_worker_uids_by_age, workers_by_age_to_assign_count
 
 
-def add_random_contacts_from_graph(G, average_degree):
+def add_random_contacts_from_graph(G, average_degree, rng=None):
     """
     Add additional edges at random to achieve the expected or desired average
     degree.
@@ -1501,11 +1614,13 @@ def add_random_contacts_from_graph(G, average_degree):
     Args:
         G (networkx Graph)   : networkx Graph object
         average_degree (int) : expected or desired average degree
+        rng (np.random.Generator) : random number generator to draw from; see sp.get_rng()
 
     Returns:
         Updated networkx Graph object with additional edges added at random.
 
     """
+    rng = spsamp.get_rng(rng)
     nodes = G.nodes()
 
     ordered_node_ids = {node: node_id for node_id, node in enumerate(nodes)}
@@ -1516,16 +1631,17 @@ def add_random_contacts_from_graph(G, average_degree):
 
     p = average_degree / len(nodes)
 
-    G2 = spcnx.random_graph_model(nodes, average_degree)
+    indptr, indices = sparr.edges_to_csr(len(nodes), spcnx.random_graph_edges(len(nodes), average_degree, seed=rng))
+    degree2 = np.diff(indptr)
 
     for node in nodes:
         ordered_node_id = ordered_node_ids[node]
 
-        extra_neighbors = list(G2.neighbors(ordered_node_id))
+        extra_neighbors = indices[indptr[ordered_node_id]:indptr[ordered_node_id + 1]]
         extra_edges_needed = len(extra_neighbors) - G.degree(node)
 
         if extra_edges_needed > 0:
-            extra_neighbors_to_add = np.random.choice(extra_neighbors, extra_edges_needed)
+            extra_neighbors_to_add = rng.choice(extra_neighbors, extra_edges_needed)
             for j in extra_neighbors_to_add:
                 neighbor = ids_to_ordered_nodes[j]
                 G.add_edge(node, neighbor)
@@ -1533,11 +1649,11 @@ def add_random_contacts_from_graph(G, average_degree):
     # in case you've added too many edges, let's remove a few - likely to not be hit
     for node in nodes:
         ordered_node_id = ordered_node_ids[node]
-        extra_edges_to_remove = G.degree(node) - G2.degree(ordered_node_id)
+        extra_edges_to_remove = G.degree(node) - degree2[ordered_node_id]
         extra_edges_to_remove = int(extra_edges_to_remove / 2.)
 
         if extra_edges_to_remove > 0:
-            extra_neighbors_to_remove = np.random.choice(extra_neighbors, extra_edges_to_remove)
+            extra_neighbors_to_remove = rng.choice(extra_neighbors, extra_edges_to_remove)
             for j in extra_neighbors_to_remove:
                 neighbor = ids_to_ordered_nodes[j]
                 if G.has_edge(node, neighbor):
@@ -1548,7 +1664,7 @@ def add_random_contacts_from_graph(G, average_degree):
 
 # %% Things added to enable not-by-type and random
 
-def generate_school_sizes(school_size_distr_by_bracket, school_size_brackets, uids_in_school):
+def generate_school_sizes(school_size_distr_by_bracket, school_size_brackets, uids_in_school, rng=None):
     """
     Given a number of students in school, generate a list of school sizes to
     place everyone in a school.
@@ -1557,10 +1673,12 @@ def generate_school_sizes(school_size_distr_by_bracket, school_size_brackets, ui
         school_size_distr_by_bracket (dict) : The distribution of binned school sizes.
         school_size_brackets (dict)         : A dictionary of school size brackets.
         uids_in_school (dict)               : A dictionary of students in school mapping ID to age.
+        rng (np.random.Generator)           : random number generator for this stage; see sp.get_rng()
 
     Returns:
         A list of school sizes whose sum is the length of ``uids_in_school``.
     """
+    rng = spsamp.get_rng(rng)
     ns = len(uids_in_school)
     sorted_brackets = sorted(school_size_brackets.keys())
     prob_by_sorted_brackets = [school_size_distr_by_bracket[b] for b in sorted_brackets]
@@ -1568,18 +1686,18 @@ def generate_school_sizes(school_size_distr_by_bracket, school_size_brackets, ui
     school_sizes = []
 
     while ns > 0:
-        size_bracket = np.random.choice(sorted_brackets, p=prob_by_sorted_brackets)
+        size_bracket = rng.choice(sorted_brackets, p=prob_by_sorted_brackets)
         # size = np.random.choice(school_size_brackets[size_bracket])  # creates some schools that are much smaller than expected so use average instead
         size = int(np.mean(school_size_brackets[size_bracket]))  # use average school size to avoid schools with very small sizes
         ns -= size
         school_sizes.append(size)
     if ns < 0:
         school_sizes[-1] = school_sizes[-1] + ns
-    np.random.shuffle(school_sizes)
+    rng.shuffle(school_sizes)
     return school_sizes
 
 
-def send_students_to_school(school_sizes, uids_in_school, uids_in_school_by_age, ages_in_school_count, age_brackets, age_by_brackets, contact_matrices): 
+def send_students_to_school(school_sizes, uids_in_school, uids_in_school_by_age, ages_in_school_count, age_brackets, age_by_brackets, contact_matrices, rng=None): 
     """
     A method to send students to school together. Using the matrices to
     construct schools is not a perfect method so some things are more forced
@@ -1594,6 +1712,7 @@ def send_students_to_school(school_sizes, uids_in_school, uids_in_school_by_age,
         age_brackets (dict)          : A dictionary mapping age bracket keys to age bracket range.
         age_by_brackets(dict)        : A dictionary mapping age to the age bracket range it falls within.
         contact_matrices (dict)      : A dictionary of age specific contact matrix for different physical contact settings.
+        rng (np.random.Generator)    : random number generator for this stage; see sp.get_rng()
 
     Returns:
         Two lists of lists and third flat list, the first where each sublist is
@@ -1603,37 +1722,35 @@ def send_students_to_school(school_sizes, uids_in_school, uids_in_school_by_age,
         string to represent it's school type.
     """
     log.debug('send_students_to_school()')
+    rng = spsamp.get_rng(rng)
+    uids_in_school_by_age = spsamp.make_draw_pools(uids_in_school_by_age)
     school_age_lists = []
     school_uid_lists = []
     school_types = []
 
-    ages_in_school_distr = spb.norm_dic(ages_in_school_count)
     left_in_bracket = spb.get_aggregate_ages(ages_in_school_count, age_by_brackets)
+    student_sampler = spsamp.CountSampler(ages_in_school_count)  # updates ages_in_school_count as students are placed
 
     for n, size in enumerate(school_sizes):
 
         if len(uids_in_school) == 0:  # no more students left to send to school!
             break
 
-        ages_in_school_distr = spb.norm_dic(ages_in_school_count)
-
         new_school = []
         new_school_uids = []
 
-        aindex = spsamp.fast_choice(ages_in_school_distr.values())
+        aindex = student_sampler.draw(rng.random())
         bindex = age_by_brackets[aindex]
 
         # reference students under 20 to prevent older adults from being reference students (otherwise we end up with schools with too many adults and kids mixing because the matrices represent the average of the patterns and not the bimodal mixing of adult students together at school and a small number of teachers at school with their students)
         if bindex >= 4:
-            if np.random.binomial(1, p=0.7):
+            if rng.binomial(1, p=0.7):
 
-                aindex = spsamp.fast_choice(ages_in_school_distr.values())
+                aindex = student_sampler.draw(rng.random())
 
-        uid = uids_in_school_by_age[aindex][0]
-        uids_in_school_by_age[aindex].remove(uid)
+        uid = uids_in_school_by_age[aindex].draw()
         uids_in_school.pop(uid, None)
-        ages_in_school_count[aindex] -= 1
-        ages_in_school_distr = spb.norm_dic(ages_in_school_count)
+        student_sampler.decrement(aindex)
 
         new_school.append(aindex)
         new_school_uids.append(uid)
@@ -1652,7 +1769,7 @@ def send_students_to_school(school_sizes, uids_in_school, uids_in_school_by_age,
                 new_school.append(int(ai))
                 new_school_uids.append(uid)
                 uids_in_school_by_age[ai].remove(uid)
-                ages_in_school_count[ai] -= 1
+                student_sampler.decrement(ai)
                 left_in_bracket[age_by_brackets[ai]] -= 1
             uids_in_school = {}
 
@@ -1670,22 +1787,20 @@ def send_students_to_school(school_sizes, uids_in_school, uids_in_school_by_age,
                 if sum([left_in_bracket[bi] for bi in range(bi_min, bi_max+1)]) == 0:
                     break
 
-                bi = spsamp.sample_single_arr(b_prob)
+                bi = spsamp.sample_single_arr(b_prob, rng=rng)
 
                 while left_in_bracket[bi] == 0 or np.abs(bindex - bi) > 1:
-                    bi = spsamp.sample_single_arr(b_prob)
+                    bi = spsamp.sample_single_arr(b_prob, rng=rng)
 
-                ai = spsamp.sample_from_range(ages_in_school_distr, age_brackets[bi][0], age_brackets[bi][-1])
-                uid = uids_in_school_by_age[ai][0]  # grab the next student in line
+                ai = student_sampler.draw_range(age_brackets[bi][0], age_brackets[bi][-1], rng.random())
+                uid = uids_in_school_by_age[ai].draw()  # grab the next student in line
 
                 new_school.append(ai)
                 new_school_uids.append(uid)
 
-                uids_in_school_by_age[ai].remove(uid)
                 uids_in_school.pop(uid, None)
 
-                ages_in_school_count[ai] -= 1
-                ages_in_school_distr = spb.norm_dic(ages_in_school_count)
+                student_sampler.decrement(ai)
                 left_in_bracket[bi] -= 1
 
         school_age_lists.append(new_school)
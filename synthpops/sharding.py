@@ -0,0 +1,104 @@
+"""
+This module provides the tools to generate a very large population as
+independent shards, each with its own random number stream and range of uids,
+and to stitch the shards back together into one population. See the shards
+parameter of sp.Pop.
+"""
+
+import numpy as np
+import sciris as sc
+from . import sampling as spsamp
+from . import arrays as sparr
+
+
+__all__ = ['split_population', 'get_shard_seeds', 'get_shard_pars', 'stitch_shards']
+
+
+# Layer group tables of each shard and the column holding their group id
+shard_group_keys = dict(households='hhid', schools='scid', workplaces='wpid', ltcfs='ltcfid')
+
+
+def split_population(n, n_shards):
+    """
+    Split a population size into shard sizes that differ by at most one.
+
+    Args:
+        n (int)        : population size
+        n_shards (int) : number of shards
+
+    Returns:
+        list: The size of each shard.
+    """
+    n, n_shards = int(n), int(n_shards)
+    if n_shards < 1 or n_shards > n:
+        errormsg = f'n_shards must be between 1 and the population size {n}, not {n_shards}.'
+        raise ValueError(errormsg)
+    size, remainder = divmod(n, n_shards)
+    return [size + 1 if i < remainder else size for i in range(n_shards)]
+
+
+def get_shard_seeds(rand_seed, n_shards):
+    """
+    Get a seed for each shard, spawned from a single seed so that the shards
+    draw from independent random number streams.
+
+    Args:
+        rand_seed (int) : seed of the whole population; if None, fresh entropy is used
+        n_shards (int)  : number of shards
+
+    Returns:
+        list: The seed of each shard.
+    """
+    return spsamp.spawn_seeds(rand_seed, n_shards)
+
+
+def get_shard_pars(shards, n=None, rand_seed=None):
+    """
+    Get the Pop parameters of each shard.
+
+    Args:
+        shards (int or list) : number of equal shards to split n into, or a list of dictionaries of the Pop parameters of each shard, e.g. dict(n=50000, location='Kent'); each must include n
+        n (int)              : population size, if shards is an int
+        rand_seed (int)      : seed of the whole population, used to spawn the seed of each shard that does not set its own rand_seed
+
+    Returns:
+        list: A dictionary of the Pop parameters of each shard, including n and rand_seed.
+    """
+    if isinstance(shards, (int, np.integer)):
+        shards = [dict(n=size) for size in split_population(n, shards)]
+    else:
+        shards = [dict(shard) for shard in shards]
+        for i, shard in enumerate(shards):
+            if 'n' not in shard:
+                errormsg = f'Shard {i} must give its population size n.'
+                raise ValueError(errormsg)
+
+    seeds = get_shard_seeds(rand_seed, len(shards))
+    for shard, seed in zip(shards, seeds):
+        shard.setdefault('rand_seed', seed)
+    return shards
+
+
+def stitch_shards(shards):
+    """
+    Stitch the shards of a population into one. The people of each shard take
+    the next range of uids, and the households, schools, workplaces, and long
+    term care facilities of each shard follow on from those of the shards
+    before it, with their ids re-based.
+
+    Args:
+        shards (list) : for each shard, a dictionary with its sp.PopulationArrays (arrays) and its packed layer group tables (groups), keyed as in shard_group_keys
+
+    Returns:
+        sc.objdict: The stitched sp.PopulationArrays (arrays) and packed group tables (groups).
+    """
+    id_offsets = [{}]
+    for shard in shards[:-1]:
+        id_offsets.append({id_key: id_offsets[-1].get(id_key, 0) + shard['groups'][name].n for name, id_key in shard_group_keys.items()})
+    uid_offsets = np.cumsum([0] + [shard['arrays'].n for shard in shards[:-1]])
+
+    arrays = sparr.PopulationArrays.concatenate([shard['arrays'] for shard in shards], id_offsets=id_offsets)
+    groups = sc.objdict()
+    for name, id_key in shard_group_keys.items():
+        groups[name] = sparr.concatenate_tables([shard['groups'][name] for shard in shards], uid_offsets, id_key=id_key)
+    return sc.objdict(arrays=arrays, groups=groups)
@@ -6,6 +6,7 @@ from . import base as spb
 from . import sampling as spsamp
 from .config import logger as log
 from . import defaults
+from . import arrays as sparr
 
 
 __all__ = ['count_employment_by_age', 'get_workplace_sizes',
@@ -112,27 +113,20 @@ def populate_workplaces(pop, workplaces):
         workplaces (list) : list of lists where each sublist represents a workplace and contains the ids of the workplace members
 
     Notes:
-        If number of workplaces (n) is fewer than existing workplaces, it will only replace the first n workplaces. Otherwise the
-        existing workplaces will be overwritten by the input workplaces.
+        The workplaces are stored as a sp.GroupTable; each sp.Workplace object
+        is only created when it is first accessed. Any existing workplaces are
+        replaced.
     """
-    # make sure there are enough workplaces
-    initialize_empty_workplaces(pop, len(workplaces))
-
     log.debug("Populating workplaces.")
 
-    # now populate workplaces
-    for nw, wp in enumerate(workplaces):
-        kwargs = dict(wpid=nw,
-                      member_uids=wp,
-                      )
-        workplace = Workplace()
-        workplace.set_layer_group(**kwargs)
-        pop.workplaces[workplace['wpid']] = sc.dcp(workplace)
-
+    pop.workplaces = sparr.GroupTable.from_lists(Workplace, len(workplaces),
+                                                 ragged=dict(member_uids=workplaces),
+                                                 columns=dict(wpid=np.arange(len(workplaces))))
+    pop.n_workplaces = len(pop.workplaces)
     return
 
 
-def get_uids_potential_workers(student_uid_lists, employment_rates, age_by_uid):
+def get_uids_potential_workers(student_uid_lists, employment_rates, age_by_uid, rng=None):
     """
     Get IDs for everyone who could be a worker by removing those who are students and those who can't be employed officially.
 
@@ -140,12 +134,14 @@ def get_uids_potential_workers(student_uid_lists, employment_rates, age_by_uid):
         student_uid_lists (list) : A list of lists where each sublist represents a school with the IDs of students in the school.
         employment_rates (dict)  : The employment rates by age.
         age_by_uid (dict)        : A dictionary mapping ID to age for individuals in the population.
+        rng (np.random.Generator) : random number generator for this stage; see sp.get_rng()
 
     Returns:
         A dictionary of potential workers mapping their ID to their age, a dictionary mapping age to the list of IDs for potential
         workers with that age, and a dictionary mapping age to the count of potential workers left to assign to a workplace for that age.
     """
     log.debug('get_uids_potential_workers()')
+    rng = spsamp.get_rng(rng)
     potential_worker_uids = deepcopy(age_by_uid)
     potential_worker_uids_by_age = {}
     potential_worker_ages_left_count = {}
@@ -176,12 +172,12 @@ def get_uids_potential_workers(student_uid_lists, employment_rates, age_by_uid):
 
     # shuffle workers around!
     for ai in potential_worker_uids_by_age:
-        np.random.shuffle(potential_worker_uids_by_age[ai])
+        rng.shuffle(potential_worker_uids_by_age[ai])
 
     return potential_worker_uids, potential_worker_uids_by_age, potential_worker_ages_left_count
 
 
-def generate_workplace_sizes(workplace_size_distr_by_bracket, workplace_size_brackets, workers_by_age_to_assign_count):
+def generate_workplace_sizes(workplace_size_distr_by_bracket, workplace_size_brackets, workers_by_age_to_assign_count, rng=None):
     """
     Given a number of individuals employed, generate a list of workplace sizes to place everyone in a workplace.
 
@@ -189,10 +185,12 @@ def generate_workplace_sizes(workplace_size_distr_by_bracket, workplace_size_bra
         workplace_size_distr_by_bracket (dict) : The distribution of binned workplace sizes.
         worlplace_size_brackets (dict)         : A dictionary of workplace size brackets.
         workers_by_age_to_assign_count (dict)  : A dictionary mapping age to the count of employed individuals of that age.
+        rng (np.random.Generator)              : random number generator for this stage; see sp.get_rng()
 
     Returns:
         A list of workplace sizes.
     """
+    rng = spsamp.get_rng(rng)
     nworkers = np.sum([workers_by_age_to_assign_count[a] for a in workers_by_age_to_assign_count])
 
     # normalize workplace_size_distr_by_bracket because it's likely a count rather than distribution
@@ -204,13 +202,13 @@ def generate_workplace_sizes(workplace_size_distr_by_bracket, workplace_size_bra
     workplace_sizes = []
 
     while nworkers > 0:
-        size_bracket = np.random.choice(sorted_brackets, p=prob_by_sorted_brackets)
-        size = np.random.choice(workplace_size_brackets[size_bracket])
+        size_bracket = rng.choice(sorted_brackets, p=prob_by_sorted_brackets)
+        size = rng.choice(workplace_size_brackets[size_bracket])
         nworkers -= size
         workplace_sizes.append(size)
     if nworkers < 0:
         workplace_sizes[-1] = workplace_sizes[-1] + nworkers
-    np.random.shuffle(workplace_sizes)
+    rng.shuffle(workplace_sizes)
     return workplace_sizes
 
 
@@ -240,7 +238,7 @@ def get_workers_by_age_to_assign(employment_rates, potential_worker_ages_left_co
     return workers_by_age_to_assign_count
 
 
-def assign_rest_of_workers(workplace_sizes, potential_worker_uids, potential_worker_uids_by_age, workers_by_age_to_assign_count, age_by_uid, age_brackets, age_by_brackets, contact_matrices):
+def assign_rest_of_workers(workplace_sizes, potential_worker_uids, potential_worker_uids_by_age, workers_by_age_to_assign_count, age_by_uid, age_brackets, age_by_brackets, contact_matrices, rng=None):
     """
     Assign the rest of the workers to non-school workplaces.
 
@@ -253,6 +251,7 @@ def assign_rest_of_workers(workplace_sizes, potential_worker_uids, potential_wor
         age_brackets (dict)                   : dictionary mapping age bracket keys to age bracket range
         age_by_brackets (dict)                : dictionary mapping age to the age bracket range it falls in
         contact_matrices (dict)               : dictionary of age specific contact matrix for different physical contact settings
+        rng (np.random.Generator)             : random number generator for this stage; see sp.get_rng()
 
     Returns:
         List of lists where each sublist is a workplace with the ages of workers, list of lists where each sublist is a workplace with the ids of workers,
@@ -260,10 +259,11 @@ def assign_rest_of_workers(workplace_sizes, potential_worker_uids, potential_wor
         mapping age to the count of workers left to assign.
     """
     log.debug('assign_rest_of_workers()')
+    rng = spsamp.get_rng(rng)
+    potential_worker_uids_by_age = spsamp.make_draw_pools(potential_worker_uids_by_age)
     workplace_age_lists = []
     workplace_uid_lists = []
-    worker_age_keys = workers_by_age_to_assign_count.keys()
-    sorted_worker_age_keys = sorted(worker_age_keys)
+    worker_sampler = spsamp.CountSampler(workers_by_age_to_assign_count)  # updates workers_by_age_to_assign_count as workers are placed
 
     # make a copy of the workplace matrix to sample from and modify as people get placed into workplaces and removed from the pool of potential workers
     w_contact_matrix = contact_matrices['W'].copy()
@@ -277,25 +277,17 @@ def assign_rest_of_workers(workplace_sizes, potential_worker_uids, potential_wor
             w_contact_matrix[:, b] = 0
 
     for n, size in enumerate(workplace_sizes):
-        workers_by_age_to_assign_distr = spb.norm_dic(workers_by_age_to_assign_count)
-        if sum(workers_by_age_to_assign_distr.values()) == 0:
+        if worker_sampler.total == 0:
             break
         if sum([len(v) for v in potential_worker_uids_by_age.values()]) == 0:
             break
         new_work, new_work_uids = [], []
 
-        a_prob = [workers_by_age_to_assign_count[a] for a in sorted_worker_age_keys]
-        a_prob = np.array(a_prob)
-        a_prob = a_prob / np.sum(a_prob)
-
-        achoice = np.random.choice(a=sorted_worker_age_keys, p=a_prob)
-        aindex = achoice
+        aindex = worker_sampler.draw(rng.random())
 
-        uid = potential_worker_uids_by_age[aindex][0]
-        potential_worker_uids_by_age[aindex].remove(uid)
+        uid = potential_worker_uids_by_age[aindex].draw()
         potential_worker_uids.pop(uid, None)
-        workers_by_age_to_assign_count[aindex] -= 1
-        workers_by_age_to_assign_distr = spb.norm_dic(workers_by_age_to_assign_count)
+        worker_sampler.decrement(aindex)
         new_work.append(aindex)
         new_work_uids.append(uid)
 
@@ -308,7 +300,7 @@ def assign_rest_of_workers(workplace_sizes, potential_worker_uids, potential_wor
 
         if size > len(potential_worker_uids) - 1: # pragma: no cover
             size = len(potential_worker_uids) - 1
-        workers_left_count = np.sum([workers_by_age_to_assign_count[a] for a in workers_by_age_to_assign_count])
+        workers_left_count = worker_sampler.total
         if size > workers_left_count:
             size = workers_left_count + 1
 
@@ -316,17 +308,15 @@ def assign_rest_of_workers(workplace_sizes, potential_worker_uids, potential_wor
         if len(potential_worker_uids) <= size or workers_left_count <= size:
             for ai in workers_by_age_to_assign_count:
                 for i in range(workers_by_age_to_assign_count[ai]):  # do not change this during the loop but afterwards, and if 0 then no one will be placed
-                    uid = potential_worker_uids_by_age[ai][0]
+                    uid = potential_worker_uids_by_age[ai].draw()
                     new_work.append(ai)
                     new_work_uids.append(uid)
-                    potential_worker_uids_by_age[ai].remove(uid)
                     potential_worker_uids.pop(uid, None)
-                workers_by_age_to_assign_count[ai] = 0  # set to zero now that everyone will be placed in this last workplace
-            workers_by_age_to_assign_distr = spb.norm_dic(workers_by_age_to_assign_count)
+                worker_sampler.set(ai, 0)  # set to zero now that everyone will be placed in this last workplace
         else:
             for i in range(1, size):
 
-                bi = spsamp.fast_choice(b_prob)
+                bi = spsamp.fast_choice(b_prob, rng=rng)
 
                 workers_left_in_bracket = [workers_by_age_to_assign_count[a] for a in age_brackets[bi] if len(potential_worker_uids_by_age[a]) > 0]
 
@@ -334,22 +324,18 @@ def assign_rest_of_workers(workplace_sizes, potential_worker_uids, potential_wor
                     loop_b_prob = sc.dcp(b_prob)  # Make a copy to avoid overwriting the original
                     while np.sum(workers_left_in_bracket) == 0:
                         loop_b_prob[bi] = 0  # Don't pick the same bracket ever again
-                        bi = spsamp.fast_choice(loop_b_prob)
+                        bi = spsamp.fast_choice(loop_b_prob, rng=rng)
                         workers_left_in_bracket = [workers_by_age_to_assign_count[a] for a in age_brackets[bi] if len(potential_worker_uids_by_age[a]) > 0]
-                    a_prob = [workers_by_age_to_assign_count[a] for a in age_brackets[bi]]
-                    ai = age_brackets[bi][spsamp.fast_choice(a_prob)]
+                    ai = worker_sampler.draw_range(age_brackets[bi][0], age_brackets[bi][-1], rng.random())
 
-                    uid = potential_worker_uids_by_age[ai][0]
+                    uid = potential_worker_uids_by_age[ai].draw()
                     new_work.append(ai)
                     new_work_uids.append(uid)
-                    potential_worker_uids_by_age[ai].remove(uid)
                     potential_worker_uids.pop(uid, None)
-                    workers_by_age_to_assign_count[ai] -= 1
-                    workers_by_age_to_assign_distr = spb.norm_dic(workers_by_age_to_assign_count)
+                    worker_sampler.decrement(ai)
 
                 # if there's no one left in the bracket, then you should turn this bracket off in the contact matrix
-                workers_left_in_bracket = [workers_by_age_to_assign_count[a] for a in age_brackets[bi]]
-                if np.sum(workers_left_in_bracket) == 0:
+                if worker_sampler.range_total(age_brackets[bi][0], age_brackets[bi][-1]) == 0:
                     w_contact_matrix[:, bi] = 0.
                     # since the matrix was modified, calculate the bracket probabilities again
                     b_prob = w_contact_matrix[bindex, :]
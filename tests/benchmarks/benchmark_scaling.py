@@ -0,0 +1,268 @@
+"""End-to-end scaling benchmark of SynthPops population generation
+
+This script times sp.Pop for several population sizes, representative
+locations, and feature sets (with and without school types and long term care
+facilities), recording the total time, the time of each generation stage from
+pop.profile, and the peak memory of each run. From these it fits the scaling
+exponent of each stage (time ~ n**exponent) and compares the run against a
+committed baseline, flagging time and memory regressions and stages that have
+become superlinear.
+
+Each case runs in a fresh process so that location defaults and peak memory do
+not carry over between cases, and is repeated, keeping the fastest time of the
+case and of each stage, so that a single slow run is not flagged. Baselines are
+machine specific: regenerate them with --save-baseline on the reference machine
+when the expected performance changes.
+
+Example:
+    $ python benchmark_scaling.py
+    $ python benchmark_scaling.py -n 10000 100000 1000000 --locations seattle_metro --output scaling.json
+    $ python benchmark_scaling.py --save-baseline
+"""
+import os
+import sys
+import time
+import argparse
+import platform
+import multiprocessing as mp
+import numpy as np
+import sciris as sc
+import synthpops as sp
+
+
+# Baseline committed with the repository
+default_baseline = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'scaling.json')
+
+# Feature sets to generate
+variants = {
+    'basic':        dict(with_school_types=0, with_non_teaching_staff=0, with_facilities=0),
+    'school_types': dict(with_school_types=1, with_non_teaching_staff=1, with_facilities=0),
+    'full':         dict(with_school_types=1, with_non_teaching_staff=1, with_facilities=1),
+}
+
+# Representative locations and the variants their data supports: there is no
+# long term care facility data for Dakar or Malawi, and the Dakar school type
+# data fails to sample for some seeds.
+locations = {
+    'seattle_metro': sc.objdict(pars=dict(), variants=['basic', 'school_types', 'full']),
+    'Dakar':         sc.objdict(pars=dict(location='Dakar', state_location='Dakar', country_location='Senegal', use_default=False),
+                                nbrackets=18, variants=['basic']),
+    'Malawi':        sc.objdict(pars=dict(country_location='Malawi', sheet_name='Zambia', use_default=True, household_method='fixed_ages', smooth_ages=1),
+                                defaults='Senegal', variants=['basic', 'school_types']),
+}
+
+
+def peak_rss():
+    """Peak resident memory of this process in MB."""
+    try:
+        import resource
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / 1e6 if sys.platform == 'darwin' else maxrss / 1e3  # bytes on macOS, kilobytes on Linux
+    except ImportError:  # pragma: no cover
+        return sp.checkmem(to_string=False)
+
+
+def run_case(location, variant, n, rand_seed=0):
+    """
+    Generate one population and record its time and memory.
+
+    Args:
+        location (str)  : key of the location in locations
+        variant (str)   : key of the feature set in variants
+        n (int)         : population size
+        rand_seed (int) : random seed
+
+    Returns:
+        dict: The case, the total wall time, the peak memory, and the wall time of each stage.
+    """
+    sp.logger.setLevel('WARNING')
+    loc = locations[location]
+    if 'nbrackets' in loc:
+        sp.set_nbrackets(loc.nbrackets)
+    if 'defaults' in loc:
+        sp.set_location_defaults(country_location=loc.defaults)
+
+    start = time.perf_counter()
+    pop = sp.Pop(n=n, rand_seed=rand_seed, **loc.pars, **variants[variant])
+    wall = time.perf_counter() - start
+    sp.reset_default_settings()
+    return dict(location=location, variant=variant, n=int(n), wall=wall, peak_rss=peak_rss(),
+                stages={stage.name: stage.wall for stage in pop.profile.stages})
+
+
+def run_cases(sizes, location_keys=None, variant_keys=None, rand_seed=0, repeats=3, isolate=True, verbose=True):
+    """
+    Run every combination of location, supported variant, and size.
+
+    Args:
+        sizes (list)         : population sizes
+        location_keys (list) : locations to run; all if None
+        variant_keys (list)  : variants to run; all supported by each location if None
+        rand_seed (int)      : random seed
+        repeats (int)        : number of times to run each case, keeping the minimum time and memory of the case and of each stage
+        isolate (bool)       : If True, run each case in a fresh process
+        verbose (bool)       : If True, print each run as it finishes
+
+    Returns:
+        list: The result of run_case() for each case.
+    """
+    location_keys = sc.tolist(location_keys) if location_keys is not None else list(locations.keys())
+    runs = []
+    for location in location_keys:
+        for variant in locations[location].variants:
+            if variant_keys is not None and variant not in variant_keys:
+                continue
+            for n in sizes:
+                repeat_runs = []
+                for r in range(repeats):
+                    if isolate:
+                        with mp.get_context('spawn').Pool(1) as pool:
+                            repeat_runs.append(pool.apply(run_case, (location, variant, n, rand_seed)))
+                    else:
+                        repeat_runs.append(run_case(location, variant, n, rand_seed))
+                run = repeat_runs[0]
+                run.update(wall=min(rr['wall'] for rr in repeat_runs), peak_rss=min(rr['peak_rss'] for rr in repeat_runs),
+                           stages={stage: min(rr['stages'][stage] for rr in repeat_runs) for stage in run['stages']})
+                runs.append(run)
+                if verbose:
+                    print(f'{location:15s} {variant:13s} {n:>9d} {run["wall"]:>10.2f} s {run["peak_rss"]:>10.1f} MB')
+    return runs
+
+
+def fit_exponents(runs, min_time=0.05):
+    """
+    Fit the scaling exponent of the total time and of each stage for each
+    location and variant, as the slope of log(time) against log(n).
+
+    Args:
+        runs (list)      : output of run_cases()
+        min_time (float) : stages taking less than this many seconds at the largest size are too noisy to fit and are skipped
+
+    Returns:
+        list: The exponent for each location, variant, and stage.
+    """
+    cases = sc.odict()
+    for run in runs:
+        cases.setdefault((run['location'], run['variant']), []).append(run)
+
+    exponents = []
+    for (location, variant), case_runs in cases.items():
+        case_runs = sorted(case_runs, key=lambda r: r['n'])
+        if len(set(r['n'] for r in case_runs)) < 2:
+            continue
+        n = np.array([r['n'] for r in case_runs], dtype=float)
+        times = {'total': [r['wall'] for r in case_runs]}
+        for stage in case_runs[-1]['stages']:
+            times[stage] = [r['stages'].get(stage, 0) for r in case_runs]
+        for stage, t in times.items():
+            t = np.array(t)
+            if t[-1] < min_time or np.any(t <= 0):
+                continue
+            exponent = np.polyfit(np.log(n), np.log(t), 1)[0]
+            exponents.append(dict(location=location, variant=variant, stage=stage, exponent=float(exponent)))
+    return exponents
+
+
+def check(results, baseline=None, time_tolerance=1.5, memory_tolerance=1.5, exponent_tolerance=0.15, superlinear=1.15):
+    """
+    Flag time and memory regressions against a baseline, and stages that scale
+    superlinearly.
+
+    Args:
+        results (dict)             : dictionary with the runs and exponents
+        baseline (dict)            : earlier results to compare against
+        time_tolerance (float)     : flag runs taking more than this multiple of the baseline time
+        memory_tolerance (float)   : flag runs using more than this multiple of the baseline peak memory
+        exponent_tolerance (float) : flag exponents more than this above the baseline exponent
+        superlinear (float)        : exponents above this count as superlinear
+
+    Returns:
+        list: A message for each regression found.
+    """
+    flags = []
+    base_runs = {(r['location'], r['variant'], r['n']): r for r in baseline['runs']} if baseline else {}
+    base_exponents = {(e['location'], e['variant'], e['stage']): e['exponent'] for e in baseline['exponents']} if baseline else {}
+
+    for run in results['runs']:
+        base = base_runs.get((run['location'], run['variant'], run['n']))
+        label = f"{run['location']} {run['variant']} n={run['n']}"
+        if base and run['wall'] > time_tolerance * base['wall']:
+            flags.append(f"{label}: time {run['wall']:0.2f} s is more than {time_tolerance}x the baseline {base['wall']:0.2f} s")
+        if base and run['peak_rss'] > memory_tolerance * base['peak_rss']:
+            flags.append(f"{label}: peak memory {run['peak_rss']:0.1f} MB is more than {memory_tolerance}x the baseline {base['peak_rss']:0.1f} MB")
+
+    for e in results['exponents']:
+        base = base_exponents.get((e['location'], e['variant'], e['stage']))
+        if e['exponent'] > superlinear and (base is None or e['exponent'] > base + exponent_tolerance):
+            compared = '' if base is None else f" (baseline {base:0.2f})"
+            flags.append(f"{e['location']} {e['variant']} {e['stage']}: superlinear scaling exponent {e['exponent']:0.2f}{compared}")
+    return flags
+
+
+def run_benchmark(sizes=None, location_keys=None, variant_keys=None, rand_seed=0, repeats=3, baseline=None, isolate=True, verbose=True, **kwargs):
+    """
+    Run the cases, fit the scaling exponents, and check them against a baseline.
+
+    Args:
+        sizes (list)         : population sizes
+        location_keys (list) : locations to run; all if None
+        variant_keys (list)  : variants to run; all supported by each location if None
+        rand_seed (int)      : random seed
+        repeats (int)        : number of times to run each case
+        baseline (dict)      : earlier results to compare against, e.g. loaded from the committed baseline
+        isolate (bool)       : If True, run each case in a fresh process
+        verbose (bool)       : If True, print each run as it finishes
+        **kwargs             : passed to check()
+
+    Returns:
+        dict: Dictionary with the metadata, runs, exponents, and flags.
+    """
+    sizes = sc.tolist(sizes) if sizes is not None else [10000, 100000]
+    runs = run_cases(sizes, location_keys=location_keys, variant_keys=variant_keys, rand_seed=rand_seed, repeats=repeats, isolate=isolate, verbose=verbose)
+    meta = dict(version=sp.__version__, created=sc.getdate(), git=sc.gitinfo(sp.__file__, verbose=False).get('hash'),
+                python=platform.python_version(), numpy=np.__version__, machine=platform.machine(),
+                processor=platform.processor(), cpu_count=os.cpu_count(), rand_seed=rand_seed, repeats=repeats, sizes=sizes)
+    results = dict(meta=meta, runs=runs, exponents=fit_exponents(runs))
+    results['flags'] = check(results, baseline=baseline, **kwargs)
+    return results
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', dest='sizes', type=int, nargs='*', default=[10000, 100000], help='population sizes')
+    parser.add_argument('--locations', nargs='*', default=None, choices=list(locations.keys()), help='locations to run; all if not given')
+    parser.add_argument('--variants', nargs='*', default=None, choices=list(variants.keys()), help='variants to run; all if not given')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--repeats', type=int, default=3, help='number of times to run each case')
+    parser.add_argument('--baseline', default=default_baseline, help='JSON file of baseline results to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='save the results as the new baseline instead of comparing against it')
+    parser.add_argument('--output', default=None, help='JSON file to save the results to')
+    parser.add_argument('--strict', action='store_true', help='exit with an error if any regression is flagged')
+    args = parser.parse_args()
+
+    baseline = sc.loadjson(args.baseline) if os.path.exists(args.baseline) and not args.save_baseline else None
+    print(f'{"location":15s} {"variant":13s} {"n":>9s} {"time":>12s} {"peak memory":>13s}')
+    results = run_benchmark(sizes=args.sizes, location_keys=args.locations, variant_keys=args.variants, rand_seed=args.seed, repeats=args.repeats, baseline=baseline)
+
+    print(f'\n{"location":15s} {"variant":13s} {"stage":20s} {"exponent":>8s}')
+    for e in results['exponents']:
+        print(f'{e["location"]:15s} {e["variant"]:13s} {e["stage"]:20s} {e["exponent"]:>8.2f}')
+
+    if args.save_baseline:
+        results['flags'] = []
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        sc.savejson(args.baseline, results)
+        print(f'Baseline saved to {args.baseline}')
+    if args.output:
+        sc.savejson(args.output, results)
+        print(f'Results saved to {args.output}')
+
+    if results['flags']:
+        print('\nRegressions:')
+        for flag in results['flags']:
+            print(f'  {flag}')
+        if args.strict:
+            sys.exit(1)
+    elif baseline is not None:
+        print('\nNo regressions against the baseline.')
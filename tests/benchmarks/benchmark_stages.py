@@ -0,0 +1,260 @@
+"""Benchmark the stages of SynthPops population generation
+
+This script times the functions behind each stage of sp.Pop generation (the
+households, schools, teachers, workplaces, and contacts stages, the sampling
+helpers, and pop.compute_information) for a range of population sizes. The
+inputs of each stage are prepared once per population size by running the
+pipeline up to that stage, so only the stage itself is timed. Results are
+printed as a table and can be saved as JSON, and a previous results file can be
+given to compare against.
+
+Example:
+    $ python benchmark_stages.py
+    $ python benchmark_stages.py -n 10000 50000 --repeats 5 --output stages.json
+    $ python benchmark_stages.py -n 10000 -b households_infer_ages -b make_contacts --compare stages.json
+"""
+import argparse
+import platform
+import time
+import numpy as np
+import sciris as sc
+import synthpops as sp
+from synthpops import base as spb
+from synthpops import data_distributions as spdata
+from synthpops import households as sphh
+from synthpops import ltcfs as spltcf
+from synthpops import schools as spsch
+from synthpops import workplaces as spw
+from synthpops import contact_networks as spcnx
+from synthpops import sampling as spsamp
+
+
+# Registry of benchmarks: name -> function(data) returning (func, args, kwargs) to time
+benchmarks = {}
+
+
+def benchmark(name):
+    """Register a function that sets up a benchmark."""
+    def register(setup):
+        benchmarks[name] = setup
+        return setup
+    return register
+
+
+def prepare(n, rand_seed=0):
+    """
+    Run the generation pipeline once, in the same order as Pop.generate(), and
+    keep the inputs of each stage.
+
+    Args:
+        n (int)         : population size
+        rand_seed (int) : random seed
+
+    Returns:
+        sc.objdict: The population and the inputs of each stage.
+    """
+    pop = sp.Pop(n=n, rand_seed=rand_seed, with_facilities=True)
+    rng = spsamp.get_stage_rngs(rand_seed)[1]
+    d = sc.objdict(n=n, population=pop, rng=rng, loc_pars=pop.loc_pars, contact_matrices=pop.contact_matrices,
+                   cm_age_brackets=pop.cm_age_brackets, cm_age_by_brackets=pop.cm_age_by_brackets)
+    loc_pars = d.loc_pars
+
+    age_count = sphh.generate_age_count_multinomial(n, pop.expected_age_dist_values, rng=rng.households)
+    n_nonltcf, d.ltcf_adjusted_age_dist, _, d.ages_left_to_assign, facilities = spltcf.generate_ltcfs(n, True, loc_pars, pop.expected_age_dist, sc.dcp(age_count), rng=rng.ltcfs)
+    d.n_nonltcf = n_nonltcf
+    d.hh_sizes = sphh.generate_household_size_count_from_fixed_pop_size(n_nonltcf, spdata.get_household_size_distr(**loc_pars), rng=rng.households)
+    d.hha_brackets = spdata.get_head_age_brackets(**loc_pars)
+    d.hha_by_size = spdata.get_head_age_by_size_distr(**loc_pars)
+    _, homes = sphh.generate_all_households_infer_ages(n, n_nonltcf, d.hh_sizes, d.hha_by_size, d.hha_brackets, d.cm_age_brackets, d.cm_age_by_brackets,
+                                                       d.contact_matrices, d.ltcf_adjusted_age_dist, sc.dcp(d.ages_left_to_assign), rng=rng.households)
+
+    homes_by_uids, d.age_by_uid = sphh.assign_uids_by_homes(facilities + homes)
+    d.facilities = facilities
+    d.facilities_by_uid_lists = homes_by_uids[0:len(facilities)]
+    d.homes_by_uids = homes_by_uids[len(facilities):]
+
+    d.school_size_brackets = spdata.get_school_size_brackets(**loc_pars)
+    d.uids_in_school, d.uids_in_school_by_age, d.ages_in_school_count = spsch.get_uids_in_school(pop.datadir, n_nonltcf, pop.location, pop.state_location, pop.country_location,
+                                                                                                  d.age_by_uid, homes_by_uids, use_default=pop.use_default, rng=rng.schools)
+    d.school_sizes = spsch.generate_school_sizes(spdata.get_school_size_distr_by_brackets(**loc_pars), d.school_size_brackets, d.uids_in_school, rng=rng.schools)
+    d.student_age_lists, d.student_uid_lists, _ = spsch.send_students_to_school(d.school_sizes, sc.dcp(d.uids_in_school), sc.dcp(d.uids_in_school_by_age), sc.dcp(d.ages_in_school_count),
+                                                                                d.cm_age_brackets, d.cm_age_by_brackets, d.contact_matrices, rng=rng.schools)
+
+    d.employment_rates = spdata.get_employment_rates(**loc_pars)
+    potential_worker_uids, potential_worker_uids_by_age, d.potential_worker_ages_left_count = spw.get_uids_potential_workers(d.student_uid_lists, d.employment_rates, d.age_by_uid, rng=rng.workplaces)
+    workers_by_age_to_assign_count = spw.get_workers_by_age_to_assign(d.employment_rates, d.potential_worker_ages_left_count, spb.get_ids_by_age(d.age_by_uid))
+    workers = spltcf.remove_ltcf_residents_from_potential_workers(d.facilities_by_uid_lists, potential_worker_uids, potential_worker_uids_by_age, workers_by_age_to_assign_count, d.age_by_uid)
+    d.potential_worker_uids, d.potential_worker_uids_by_age, d.workers_by_age_to_assign_count = workers
+
+    teachers = spsch.assign_teachers_to_schools(d.student_age_lists, d.student_uid_lists, d.employment_rates, *sc.dcp([workers[2], workers[0], workers[1]]),
+                                                d.potential_worker_ages_left_count, rng=rng.schools)
+    d.teacher_uid_lists = teachers[1]
+    d.non_teaching_staff_uid_lists = [[] for s in d.student_uid_lists]
+    d.rest_of_workers = sc.dcp(teachers[2:])
+    d.workplace_sizes = spw.generate_workplace_sizes(spdata.get_workplace_size_distr_by_brackets(**loc_pars), spdata.get_workplace_size_brackets(**loc_pars),
+                                                     d.rest_of_workers[2], rng=rng.workplaces)
+    d.workplace_uid_lists = spw.assign_rest_of_workers(d.workplace_sizes, *sc.dcp(d.rest_of_workers), d.age_by_uid, d.cm_age_brackets, d.cm_age_by_brackets,
+                                                       d.contact_matrices, rng=rng.workplaces)[1]
+    return d
+
+
+@benchmark('sample_single_arr')
+def setup_sample_single_arr(d):
+    weights = np.array(d.population.expected_age_dist_values)
+    def run():
+        for i in range(d.n):
+            spsamp.sample_single_arr(weights)
+    return run, (), {}
+
+
+@benchmark('sample_from_range')
+def setup_sample_from_range(d):
+    def run():
+        for i in range(d.n):
+            spsamp.sample_from_range(d.population.expected_age_dist, 20, 65)
+    return run, (), {}
+
+
+@benchmark('resample_age_batch')
+def setup_resample_age_batch(d):
+    ages = np.array([d.age_by_uid[i] for i in range(d.n)])
+    return spsamp.resample_age_batch, (d.population.expected_age_dist_values, ages), {}
+
+
+@benchmark('households_infer_ages')
+def setup_households_infer_ages(d):
+    args = (d.n, d.n_nonltcf, d.hh_sizes, d.hha_by_size, d.hha_brackets, d.cm_age_brackets, d.cm_age_by_brackets, d.contact_matrices, d.ltcf_adjusted_age_dist, d.ages_left_to_assign)
+    return sphh.generate_all_households_infer_ages, args, dict(rng=d.rng.households)
+
+
+@benchmark('households_fixed_ages')
+def setup_households_fixed_ages(d):
+    args = (d.n_nonltcf, d.hh_sizes, d.hha_by_size, d.hha_brackets, d.cm_age_brackets, d.cm_age_by_brackets, d.contact_matrices, d.ages_left_to_assign)
+    return sphh.generate_all_households_fixed_ages, args, dict(rng=d.rng.households)
+
+
+@benchmark('send_students_to_school')
+def setup_send_students_to_school(d):
+    args = (d.school_sizes, d.uids_in_school, d.uids_in_school_by_age, d.ages_in_school_count, d.cm_age_brackets, d.cm_age_by_brackets, d.contact_matrices)
+    return spsch.send_students_to_school, args, dict(rng=d.rng.schools)
+
+
+@benchmark('send_students_to_school_with_school_types')
+def setup_send_students_to_school_with_school_types(d):
+    school_type_age_ranges = spdata.get_school_type_age_ranges(**d.loc_pars)
+    args = (spdata.get_school_size_distr_by_type(**d.loc_pars), d.school_size_brackets, d.uids_in_school, d.uids_in_school_by_age, d.ages_in_school_count,
+            spsch.get_school_types_distr_by_age(school_type_age_ranges), school_type_age_ranges)
+    return spsch.send_students_to_school_with_school_types, args, dict(rng=d.rng.schools)
+
+
+@benchmark('assign_teachers_to_schools')
+def setup_assign_teachers_to_schools(d):
+    args = (d.student_age_lists, d.student_uid_lists, d.employment_rates, d.workers_by_age_to_assign_count, d.potential_worker_uids,
+            d.potential_worker_uids_by_age, d.potential_worker_ages_left_count)
+    return spsch.assign_teachers_to_schools, args, dict(rng=d.rng.schools)
+
+
+@benchmark('assign_rest_of_workers')
+def setup_assign_rest_of_workers(d):
+    args = (d.workplace_sizes, *d.rest_of_workers, d.age_by_uid, d.cm_age_brackets, d.cm_age_by_brackets, d.contact_matrices)
+    return spw.assign_rest_of_workers, args, dict(rng=d.rng.workplaces)
+
+
+@benchmark('make_contacts')
+def setup_make_contacts(d):
+    kwargs = dict(age_by_uid=d.age_by_uid, homes_by_uids=d.homes_by_uids, students_by_uid_lists=d.student_uid_lists,
+                  teachers_by_uid_lists=d.teacher_uid_lists, non_teaching_staff_uid_lists=d.non_teaching_staff_uid_lists,
+                  workplace_by_uid_lists=d.workplace_uid_lists, facilities_by_uid_lists=d.facilities_by_uid_lists,
+                  facilities_staff_uid_lists=[[] for f in d.facilities_by_uid_lists], rng=d.rng.contacts)
+    return spcnx.make_contacts, (sc.objdict(),), kwargs
+
+
+@benchmark('compute_information')
+def setup_compute_information(d):
+    return d.population.compute_information, (), {}
+
+
+def run_benchmarks(sizes=None, names=None, repeats=3, rand_seed=0, verbose=True):
+    """
+    Time each benchmark for each population size. Inputs are copied before
+    each repeat, outside of the timed region, since the stages modify them.
+
+    Args:
+        sizes (list)    : population sizes
+        names (list)    : names of the benchmarks to run; all if None
+        repeats (int)   : number of times to time each benchmark
+        rand_seed (int) : random seed
+        verbose (bool)  : If True, print each result as it is made
+
+    Returns:
+        dict: Dictionary with the metadata and a list of results with the times of each benchmark and size.
+    """
+    sizes = sc.tolist(sizes) if sizes is not None else [5000, 20000]
+    names = sc.tolist(names) if names is not None else list(benchmarks.keys())
+    for name in names:
+        if name not in benchmarks:
+            errormsg = f'Benchmark {name} not found; choices are: {list(benchmarks.keys())}'
+            raise sc.KeyNotFoundError(errormsg)
+
+    results = []
+    for n in sizes:
+        d = prepare(int(n), rand_seed=rand_seed)
+        for name in names:
+            func, args, kwargs = benchmarks[name](d)
+            times = []
+            for r in range(repeats):
+                run_args, run_kwargs = sc.dcp(args), sc.dcp(kwargs)
+                start = time.perf_counter()
+                func(*run_args, **run_kwargs)
+                times.append(time.perf_counter() - start)
+            result = dict(benchmark=name, n=int(n), repeats=repeats, times=times,
+                          min=min(times), median=float(np.median(times)), mean=float(np.mean(times)))
+            results.append(result)
+            if verbose:
+                print(f'{name:45s} {n:>9d} {result["min"]:>10.4f} {result["median"]:>10.4f}')
+
+    meta = dict(version=sp.__version__, created=sc.getdate(), git=sc.gitinfo(sp.__file__, verbose=False).get('hash'),
+                python=platform.python_version(), numpy=np.__version__, machine=platform.machine(), rand_seed=rand_seed)
+    return dict(meta=meta, results=results)
+
+
+def compare(results, baseline):
+    """
+    Compare the median times of two runs of the benchmarks.
+
+    Args:
+        results (dict)  : output of run_benchmarks()
+        baseline (dict) : output of an earlier run of run_benchmarks(), e.g. on another version
+
+    Returns:
+        list: The ratio of the median times (results / baseline) for each benchmark and size found in both.
+    """
+    base = {(r['benchmark'], r['n']): r['median'] for r in baseline['results']}
+    ratios = []
+    for r in results['results']:
+        key = (r['benchmark'], r['n'])
+        if key in base and base[key] > 0:
+            ratios.append(dict(benchmark=r['benchmark'], n=r['n'], ratio=r['median'] / base[key]))
+    return ratios
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', dest='sizes', type=int, nargs='*', default=[5000, 20000], help='population sizes')
+    parser.add_argument('-b', '--benchmark', dest='names', action='append', default=None, choices=list(benchmarks.keys()), help='benchmark to run; all if not given')
+    parser.add_argument('--repeats', type=int, default=3, help='number of times to time each benchmark')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--output', default=None, help='JSON file to save the results to')
+    parser.add_argument('--compare', default=None, help='JSON file of earlier results to compare against')
+    args = parser.parse_args()
+
+    print(f'{"benchmark":45s} {"n":>9s} {"min (s)":>10s} {"median (s)":>10s}')
+    results = run_benchmarks(sizes=args.sizes, names=args.names, repeats=args.repeats, rand_seed=args.seed)
+    if args.output:
+        sc.savejson(args.output, results)
+        print(f'Results saved to {args.output}')
+    if args.compare:
+        print(f'\n{"benchmark":45s} {"n":>9s} {"ratio":>10s}')
+        for r in compare(results, sc.loadjson(args.compare)):
+            print(f'{r["benchmark"]:45s} {r["n"]:>9d} {r["ratio"]:>10.2f}')
@@ -0,0 +1,50 @@
+"""
+Test that the benchmarks still run against the current code.
+"""
+
+import sciris as sc
+import synthpops as sp
+from benchmarks import benchmark_stages, benchmark_scaling
+
+
+def test_benchmark_stages(tmp_path):
+    sp.logger.info("Test running each stage benchmark once on a small population.")
+    results = benchmark_stages.run_benchmarks(sizes=[2000], repeats=1, verbose=False)
+    names = [r['benchmark'] for r in results['results']]
+    assert names == list(benchmark_stages.benchmarks.keys()), 'Check failed: not every benchmark was run.'
+    assert all(r['min'] > 0 for r in results['results']), 'Check failed: benchmark times are not positive.'
+
+    filename = str(tmp_path / 'stages.json')
+    sc.savejson(filename, results)
+    ratios = benchmark_stages.compare(results, sc.loadjson(filename))
+    assert all(r['ratio'] == 1 for r in ratios) and len(ratios) == len(names), 'Check failed: results do not compare equal to themselves.'
+    print('Check passed.')
+
+
+def test_benchmark_scaling():
+    sp.logger.info("Test the scaling benchmark and its regression checks on small populations.")
+    results = benchmark_scaling.run_benchmark(sizes=[1000, 2000], location_keys=['seattle_metro'], variant_keys=['basic'], repeats=2, isolate=False, verbose=False)
+    assert [r['n'] for r in results['runs']] == [1000, 2000], 'Check failed: not every size was run.'
+    assert 'total' in [e['stage'] for e in results['exponents']], 'Check failed: no exponent for the total time.'
+
+    baseline = sc.dcp(results)
+    assert benchmark_scaling.check(results, baseline=baseline, superlinear=100) == [], 'Check failed: results flagged against themselves.'
+    for run in baseline['runs']:
+        run['wall'] /= 10
+    for e in baseline['exponents']:
+        e['exponent'] -= 1
+    flags = benchmark_scaling.check(results, baseline=baseline, superlinear=0)
+    assert any('time' in f for f in flags), 'Check failed: time regression not flagged.'
+    assert any('superlinear' in f for f in flags), 'Check failed: exponent regression not flagged.'
+
+    committed = sc.loadjson(benchmark_scaling.default_baseline)
+    assert {'meta', 'runs', 'exponents'} <= set(committed.keys()), 'Check failed: the committed baseline is not complete.'
+    cases = {(location, variant, n) for location, loc in benchmark_scaling.locations.items() for variant in loc.variants for n in committed['meta']['sizes']}
+    assert {(r['location'], r['variant'], r['n']) for r in committed['runs']} == cases, 'Check failed: the committed baseline does not cover every case.'
+    print('Check passed.')
+
+
+if __name__ == '__main__':
+
+    test_benchmark_stages(sc.path('.'))
+    test_benchmark_scaling()
@@ -95,6 +95,35 @@ def test_smoothed_and_fixed_ages_household_method(do_show=False):
     return fig, ax
 
 
+def test_fixed_ages_household_filler_seed():
+    sp.logger.info("Test that the fixed_ages household filler places everyone and is reproducible with a seed.")
+
+    cm_age_brackets = {i: np.arange(5 * i, 5 * i + 5) for i in range(16)}
+    cm_age_by_brackets = {a: b for b, ages in cm_age_brackets.items() for a in ages}
+    household_matrix = np.ones((16, 16)) + 2 * np.eye(16)
+
+    sizes = np.array([2, 3, 4, 2, 5] * 200)
+    heads = np.array([25, 30, 40, 70, 55] * 200)
+    age_count = np.bincount(np.random.randint(80, size=(sizes - 1).sum()), minlength=80)
+
+    homes = []
+    for i in range(2):
+        ages_left_to_assign = {a: int(c) for a, c in enumerate(age_count)}
+        homes_dic = {size: [] for size in range(2, 6)}
+        homes_dic, ages_left_to_assign = sp.generate_larger_households_fixed_ages(sizes, heads, None, cm_age_brackets, cm_age_by_brackets, sc.dcp(household_matrix), ages_left_to_assign, homes_dic, seed=1)
+        homes.append(homes_dic)
+        assert sum(ages_left_to_assign.values()) == 0, 'Check failed: not everyone was placed in a household.'
+
+    for size in range(2, 6):
+        assert homes[0][size].shape == ((sizes == size).sum(), size), f'Check failed: households of size {size} have the wrong shape.'
+        assert np.array_equal(homes[0][size], homes[1][size]), f'Check failed: households of size {size} differ with the same seed.'
+        assert np.array_equal(homes[0][size][:, 0], heads[sizes == size]), f'Check failed: reference persons of households of size {size} are not in order.'
+
+    ages = np.concatenate([homes[0][size][:, 1:].ravel() for size in range(2, 6)])
+    assert np.array_equal(np.bincount(ages, minlength=80), age_count), 'Check failed: the ages placed do not match the ages left to assign.'
+    print('Check passed.')
+
+
 if __name__ == '__main__':
 
     pop = test_original_household_method(do_show=True)
@@ -102,3 +131,5 @@ if __name__ == '__main__':
     fig, ax = test_fixed_ages_household_method(do_show=True)
 
     fig, ax = test_smoothed_and_fixed_ages_household_method(do_show=True)
+
+    test_fixed_ages_household_filler_seed()
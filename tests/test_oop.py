@@ -74,6 +74,25 @@ def test_api(do_plot=False):
     return popdict
 
 
+def test_lazy_information():
+    ''' Information and summary are computed on first access, cached, and invalidated when the population changes '''
+    sp.logger.info('Testing lazy information and summary')
+    pop = sp.Pop(n=settings.pop_sizes.small, rand_seed=0)
+    assert pop.__dict__.get('_information') is None, 'Check failed: information was computed during construction.'
+    assert pop.summary.mean_age > 0, 'Check failed: summary was not computed on access.'
+    information = pop.information
+    assert pop.information is information, 'Check failed: information is not cached.'
+
+    pop.add_household(sp.Household(member_uids=[0], reference_uid=0, reference_age=pop.popdict[0]['age']))
+    assert pop.__dict__.get('_summary') is None, 'Check failed: summary was not invalidated.'
+    assert pop.information is not information, 'Check failed: information was not recomputed.'
+
+    pop2 = sp.Pop(n=settings.pop_sizes.small, rand_seed=0, precompute_information=True)
+    assert pop2.__dict__.get('_summary') is not None, 'Check failed: summary was not precomputed.'
+    assert pop2.summary.mean_age == sp.Pop(n=settings.pop_sizes.small, rand_seed=0).summary.mean_age, 'Check failed: lazy and precomputed summaries do not match.'
+    return pop
+
+
 if __name__ == '__main__':
 
     T = sc.tic()
@@ -81,6 +100,7 @@ if __name__ == '__main__':
     default_pop = test_default()
     alt_pops    = test_alternatives()
     api_popdict = test_api(do_plot=True)
+    lazy_pop    = test_lazy_information()
 
     sc.toc(T)
     print('Done.')
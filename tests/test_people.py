@@ -78,6 +78,23 @@ def test_advanced_people():
     return ppl
 
 
+def test_people_from_arrays():
+    sc.heading('People built from the arrays match People built from the popdict')
+    for use_arrays in [False, True]:
+        pop = sp.Pop(n=2000, rand_seed=1, with_facilities=True, use_arrays=use_arrays)
+        ppl = pop.to_people()
+        ppl_popdict = sp.people.make_people(popdict=pop.to_dict(), rand_seed=pop.rand_seed)
+
+        for key in ['uid', 'age', 'sex']:
+            assert np.array_equal(ppl[key], ppl_popdict[key]), f'Check failed: {key} does not match.'
+        assert ppl.contacts.keys() == ppl_popdict.contacts.keys(), 'Check failed: layers do not match.'
+        for lkey in ppl.contacts.keys():
+            ppl.contacts[lkey].validate()
+            for col in ['p1', 'p2', 'beta']:
+                assert np.array_equal(ppl.contacts[lkey][col], ppl_popdict.contacts[lkey][col]), f'Check failed: {col} in layer {lkey} does not match.'
+    return ppl
+
+
 def test_randpop():
     ppl = sp.people.make_people(n=100, pop_type='hybrid')
     return ppl
@@ -111,6 +128,7 @@ def test_other():
 if __name__ == '__main__':
     ppl  = test_people()
     ppl2 = test_advanced_people()
+    ppl4 = test_people_from_arrays()
     ppl3 = test_randpop()
     data = test_age_structure()
     test_other()
\ No newline at end of file
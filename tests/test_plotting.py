@@ -57,6 +57,32 @@ def test_calculate_contact_matrix_errors(create_pop):
         pop.plot_contacts(density_or_frequency='neither')
 
 
+def test_calculate_contact_matrices(create_pop):
+    """
+    Test that the contact matrices computed for all layers in one pass match
+    those added up contact by contact, and that aggregating them to age brackets
+    directly matches sp.get_aggregate_matrix().
+    """
+    sp.logger.info("Test sp.calculate_contact_matrices() against a contact by contact calculation.")
+    pop = create_pop
+    matrices = sp.calculate_contact_matrices(pop.popdict)
+    aggregate_matrices = sp.calculate_contact_matrices(pop.popdict, layers=pop.layers, age_by_brackets=pop.age_by_brackets)
+
+    for layer in pop.layers:
+        for method in ['density', 'frequency']:
+            expected = np.zeros((101, 101))
+            for person in pop.popdict.values():
+                for c in person['contacts'][layer]:
+                    expected[person['age'], pop.popdict[c]['age']] += 1.0 if method == 'density' else 1.0 / len(person['contacts'][layer])
+            assert np.allclose(matrices[layer][method], expected), f'Check failed: {method} matrix for layer {layer} does not match.'
+            assert np.allclose(aggregate_matrices[layer][method], sp.get_aggregate_matrix(expected, pop.age_by_brackets)), f'Check failed: aggregated {method} matrix for layer {layer} does not match.'
+            assert np.array_equal(sp.calculate_contact_matrix(pop.popdict, method, layer), matrices[layer][method]), 'Check failed: calculate_contact_matrix() does not match.'
+    print('Check passed. Contact matrices match.')
+
+    with pytest.raises(ValueError):
+        sp.calculate_contact_matrices(pop.popdict, density_or_frequency='neither')
+
+
 def test_catch_pop_type_errors():
     """
     Test that synthpops.plotting methods raise error when pop type is not in
@@ -351,6 +377,7 @@ if __name__ == '__main__':
     pop = sp.Pop(**pars)
     figs = test_plots(create_pop=pop, do_plot=True)
     test_calculate_contact_matrix_errors(create_pop=pop)
+    test_calculate_contact_matrices(create_pop=pop)
     test_catch_pop_type_errors()
     test_restoring_matplotlib_defaults()
     test_plot_array()
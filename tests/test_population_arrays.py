@@ -0,0 +1,230 @@
+"""
+Test the columnar, array-backed population store.
+"""
+
+import json
+import gzip
+import sciris as sc
+import synthpops as sp
+import numpy as np
+import pytest
+
+
+# parameters to generate a test population
+pars = sc.objdict(
+    n                       = 2e3,
+    rand_seed               = 123,
+
+    with_facilities         = 1,
+    with_non_teaching_staff = 1,
+    with_school_types       = 1,
+    school_mixing_type      = {'pk': 'age_and_class_clustered', 'es': 'age_and_class_clustered', 'ms': 'age_and_class_clustered', 'hs': 'random', 'uv': 'random'},
+)
+
+
+def test_edges_to_csr():
+    sp.logger.info("Test converting an edge array to CSR adjacency arrays.")
+    edges = np.array([[0, 2], [1, 2], [3, 0]])
+    indptr, indices = sp.edges_to_csr(4, edges)
+    assert list(indptr) == [0, 2, 3, 5, 6], 'Check failed: indptr is not correct.'
+    assert list(indices) == [2, 3, 2, 0, 1, 0], 'Check failed: indices are not correct.'
+    print('Check passed.')
+
+
+def test_group_edges():
+    sp.logger.info("Test getting the edges of fully connected groups and filling a layer from them.")
+    edges = sp.group_edges([[4, 1, 2], [0], [3, 5]])
+    assert sorted(map(tuple, edges.tolist())) == [(1, 2), (3, 5), (4, 1), (4, 2)], 'Check failed: group edges are not correct.'
+
+    arrays = sp.PopulationArrays(n=6, layer_keys=['H'])
+    arrays.set_layer_edges('H', np.concatenate([edges, edges[:1]]))
+    arrays.set_groups('hhid', [[4, 1, 2], [0], [3, 5]])
+    assert list(arrays.get_contacts(4, 'H')) == [1, 2], 'Check failed: repeated edges are not stored once.'
+    assert list(arrays.hhid) == [1, 0, 0, 2, 0, 2], 'Check failed: group ids are not correct.'
+    print('Check passed.')
+
+
+def test_population_arrays_match_popdict():
+    sp.logger.info("Test that the arrays backend reproduces the popdict.")
+    pop = sp.Pop(**pars)
+    pop_arrays = sp.Pop(**pars, use_arrays=True)
+
+    assert isinstance(pop_arrays.arrays, sp.PopulationArrays), 'Check failed: pop.arrays is not a PopulationArrays object.'
+    assert isinstance(pop_arrays.popdict, sp.PopDictView), 'Check failed: pop.popdict is not a view over the arrays.'
+    assert len(pop_arrays.popdict) == len(pop.popdict), 'Check failed: populations are not the same size.'
+
+    for uid, person in pop.popdict.items():
+        view_person = pop_arrays.popdict[uid]
+        assert list(view_person.keys()) == list(person.keys()), f'Check failed: keys for person {uid} do not match.'
+        for key, value in person.items():
+            if key == 'contacts':
+                for layer in value:
+                    assert sorted(view_person[key][layer]) == sorted(value[layer]), f'Check failed: {layer} contacts for person {uid} do not match.'
+            else:
+                assert view_person[key] == value, f'Check failed: {key} for person {uid} does not match.'
+    print('Check passed. The arrays backend matches the popdict.')
+
+    for layer in pop.layers:
+        degree = [len(pop.popdict[i]['contacts'][layer]) for i in range(pop.n)]
+        assert np.array_equal(pop_arrays.arrays.degree(layer), degree), f'Check failed: degree in layer {layer} does not match.'
+
+    converted = sp.PopulationArrays.from_popdict(pop.popdict)
+    for key in converted.columns:
+        assert np.array_equal(pop_arrays.arrays[key], converted[key]), f'Check failed: {key} generated into the arrays does not match.'
+    assert pop_arrays.arrays.labels == converted.labels, 'Check failed: labels generated into the arrays do not match.'
+
+    popdict = pop_arrays.to_dict()
+    assert isinstance(popdict, dict), 'Check failed: to_dict() did not return a dict.'
+    assert pop_arrays.summary.mean_age == pop.summary.mean_age
+
+
+def test_population_arrays_errors():
+    sp.logger.info("Test that popdicts with non contiguous uids are rejected.")
+    popdict = {1: {'age': 10, 'sex': 0, 'contacts': {'H': []}}}
+    with pytest.raises(ValueError):
+        sp.PopulationArrays.from_popdict(popdict)
+
+    arrays = sp.PopulationArrays(n=2, layer_keys=['H'])
+    view = sp.PopDictView(arrays)
+    with pytest.raises(KeyError):
+        view[2]
+
+
+@pytest.mark.parametrize("use_arrays", [False, True])
+def test_compute_statistics(use_arrays):
+    sp.logger.info("Test that the single pass statistics match the per-table functions.")
+    pop = sp.Pop(**pars, use_arrays=use_arrays)
+    popdict = pop.to_dict()
+    stats = sp.compute_statistics(sp.PopulationArrays.from_popdict(popdict))
+
+    assert stats.age_count == sp.count_ages(popdict), 'Check failed: age count does not match.'
+    assert stats.household_sizes == sp.get_household_sizes(popdict), 'Check failed: household sizes do not match.'
+    assert stats.household_heads == sp.get_household_heads(popdict), 'Check failed: household heads do not match.'
+    assert stats.ltcf_sizes == sp.get_ltcf_sizes(popdict), 'Check failed: long term care facility sizes do not match.'
+    assert stats.enrollment_by_age == sp.count_enrollment_by_age(popdict), 'Check failed: enrollment by age does not match.'
+    assert stats.employment_by_age == sp.count_employment_by_age(popdict), 'Check failed: employment by age does not match.'
+    assert stats.workplace_sizes == sp.get_workplace_sizes(popdict), 'Check failed: workplace sizes do not match.'
+    enrollment = sp.count_enrollment_by_school_type(popdict)
+    assert {k: sorted(v) for k, v in stats.enrollment_by_school_type.items()} == {k: sorted(v) for k, v in enrollment.items()}, 'Check failed: enrollment by school type does not match.'
+    assert pop.information.household_sizes == stats.household_sizes, 'Check failed: pop.information does not use the statistics.'
+    print('Check passed. The statistics match.')
+
+
+def test_group_table():
+    sp.logger.info("Test the array-backed tables of households, schools, workplaces, and ltcfs.")
+    pop = sp.Pop(**pars)
+    for name in ['households', 'workplaces', 'schools', 'ltcfs']:
+        assert isinstance(getattr(pop, name), sp.GroupTable), f'Check failed: {name} are not stored as a sp.GroupTable.'
+        assert getattr(pop, name).is_packed, f'Check failed: {name} objects were created during generation.'
+
+    households = pop.households
+    sizes = households.sizes()
+    assert sizes.sum() == sum(person['hhid'] is not None for person in pop.popdict.values()), 'Check failed: household sizes do not add up.'
+    assert np.array_equal(households.column('hhid'), np.arange(len(households))), 'Check failed: hhid column does not match.'
+    for hhid in [0, len(households) - 1]:
+        household = pop.get_household(hhid)
+        assert isinstance(household, sp.Household), 'Check failed: did not create a sp.Household object.'
+        assert np.array_equal(household['member_uids'], households.members(hhid)), 'Check failed: household members do not match.'
+        assert household['reference_age'] == pop.age_by_uid[household['reference_uid']], 'Check failed: reference age does not match.'
+    assert not households.is_packed, 'Check failed: accessed households are not kept.'
+
+    mixing_types = pop.schools.column('school_mixing_type')
+    for school, mixing_type in zip(pop.schools, mixing_types):
+        assert school['school_mixing_type'] == mixing_type, 'Check failed: school mixing type does not match.'
+        assert ('classrooms' in school) == (mixing_type == 'age_and_class_clustered'), 'Check failed: classrooms are not only in clustered schools.'
+        if 'classrooms' in school:
+            assert school['n_classrooms'] == len(school['classrooms']), 'Check failed: the number of classrooms does not match.'
+            assert all(isinstance(c, sp.Classroom) for c in school['classrooms']), 'Check failed: classrooms are not sp.Classroom objects.'
+
+    # changes made through the objects persist and are packed again
+    schools = sp.GroupTable(sp.pack_groups(pop.schools), sp.School, child_classes={'classrooms': sp.Classroom})
+    assert [sorted(s.keys()) for s in schools] == [sorted(s.keys()) for s in pop.schools], 'Check failed: school keys do not match after packing.'
+    pop.households[0]['reference_age'] = 99
+    assert pop.households[0]['reference_age'] == 99, 'Check failed: changes to a household do not persist.'
+    pop.add_household(sp.Household(member_uids=[0]))
+    assert len(pop.households) == len(sizes) + 1 and pop.n_households == len(sizes) + 1, 'Check failed: household not appended.'
+    packed = sp.pack_groups(pop.households)
+    assert packed.columns['reference_age'][0] == 99 and packed.n == len(sizes) + 1, 'Check failed: changes are not packed.'
+
+    with pytest.raises(ValueError):
+        sp.GroupTable.from_lists(sp.Workplace, 2, ragged=dict(member_uids=[[0]]))
+    with pytest.raises(KeyError):
+        pop.workplaces.sizes('student_uids')
+    print('Check passed. Group tables match their group objects.')
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_save_load_arrays(mmap, tmp_path):
+    sp.logger.info("Test saving a population to the arrays directory format and loading it back.")
+    pop = sp.Pop(**pars)
+    dirname = str(tmp_path / 'pop')
+    pop.save(dirname, format='arrays')
+    pop_loaded = sp.Pop.load(dirname, mmap=mmap)
+
+    assert isinstance(pop_loaded.popdict, sp.PopDictView), 'Check failed: the loaded popdict is not a view over the arrays.'
+    assert isinstance(pop_loaded.arrays.age, np.memmap) == mmap, 'Check failed: arrays are not memory mapped as requested.'
+    popdict, popdict_loaded = pop.to_dict(), pop_loaded.to_dict()
+    for uid, person in popdict.items():
+        for key, value in person.items():
+            if key == 'contacts':
+                for layer in value:
+                    assert sorted(popdict_loaded[uid][key][layer]) == sorted(value[layer]), f'Check failed: {layer} contacts for person {uid} do not match.'
+            else:
+                assert popdict_loaded[uid][key] == value, f'Check failed: {key} for person {uid} does not match.'
+
+    for name in ['households', 'workplaces', 'schools', 'ltcfs']:
+        groups, groups_loaded = getattr(pop, name), getattr(pop_loaded, name)
+        assert len(groups_loaded) == len(groups), f'Check failed: the number of {name} does not match.'
+        for group, group_loaded in zip(groups, groups_loaded):
+            assert type(group_loaded) == type(group), f'Check failed: {name} are not loaded as {type(group)}.'
+            assert np.array_equal(group_loaded['member_uids'], group['member_uids']), f'Check failed: {name} members do not match.'
+
+    school = pop.schools[0]
+    assert [c['student_uids'].tolist() for c in pop_loaded.schools[0]['classrooms']] == [c['student_uids'].tolist() for c in school['classrooms']], 'Check failed: classrooms do not match.'
+    assert pop_loaded.summary == pop.summary, 'Check failed: summary does not match.'
+    assert pop_loaded.age_brackets.keys() == pop.age_brackets.keys(), 'Check failed: age brackets are not keyed by int.'
+    assert pop_loaded.count_pop_ages() == pop.count_pop_ages(), 'Check failed: age count does not match.'
+    print('Check passed. The loaded population matches the saved population.')
+
+    with pytest.raises(ValueError):
+        pop.save(dirname, format='csv')
+
+
+@pytest.mark.parametrize("use_arrays", [False, True])
+def test_save_json_streaming(use_arrays, tmp_path):
+    sp.logger.info("Test streaming a population to NDJSON and JSON arrays.")
+    pop = sp.Pop(**pars, use_arrays=use_arrays)
+    popdict = pop.to_dict()
+
+    filenames = pop.to_json(str(tmp_path / 'pop.ndjson.gz'), format='ndjson', separate_layers=True, chunk_size=333)
+    assert filenames[1] == str(tmp_path / 'pop_H.ndjson.gz'), 'Check failed: layer file is not named after the population file.'
+    with gzip.open(filenames[0], 'rt') as f:
+        records = [json.loads(line) for line in f]
+    assert [r['uid'] for r in records] == list(range(pop.n)), 'Check failed: not one record per person in uid order.'
+    assert all('contacts' not in r for r in records), 'Check failed: contacts written with separate layers.'
+    assert records[10]['age'] == popdict[10]['age'], 'Check failed: person attributes do not match.'
+
+    for layer, filename in zip(popdict[0]['contacts'].keys(), filenames[1:]):
+        with gzip.open(filename, 'rt') as f:
+            edges = [json.loads(line) for line in f]
+        n_edges = sum(len(person['contacts'][layer]) for person in popdict.values()) // 2
+        assert len(edges) == n_edges, f'Check failed: number of {layer} edges does not match.'
+        assert all(i < j and j in popdict[i]['contacts'][layer] for i, j in edges), f'Check failed: {layer} edges do not match the popdict.'
+
+    filenames = pop.to_json(str(tmp_path / 'pop.json'), format='array', chunk_size=333)
+    records = sc.loadjson(filenames[0])
+    assert len(records) == pop.n, 'Check failed: the JSON array does not have one record per person.'
+    assert sorted(records[5]['contacts']['H']) == sorted(popdict[5]['contacts']['H']), 'Check failed: contacts do not match.'
+
+    with pytest.raises(ValueError):
+        pop.to_json(str(tmp_path / 'pop.csv'), format='csv')
+    print('Check passed. Streamed JSON matches the popdict.')
+
+
+if __name__ == '__main__':
+
+    test_edges_to_csr()
+    test_group_edges()
+    test_population_arrays_match_popdict()
+    test_population_arrays_errors()
+    test_group_table()
@@ -0,0 +1,54 @@
+"""
+Test the per-stage profile of population generation.
+"""
+
+import pytest
+import sciris as sc
+import synthpops as sp
+
+
+# parameters to generate a test population
+pars = sc.objdict(
+    n               = 2e3,
+    rand_seed       = 123,
+    with_facilities = 1,
+)
+
+
+@pytest.mark.parametrize("trace_memory", [False, True])
+def test_pop_profile(trace_memory, tmp_path):
+    sp.logger.info("Test the per-stage profile of Pop generation.")
+    pop = sp.Pop(**pars, trace_memory=trace_memory)
+    profile = pop.profile
+
+    names = [stage.name for stage in profile.stages]
+    for name in ['ltcfs', 'households', 'uids', 'school_enrollment', 'school_assignment', 'teachers', 'staff', 'ltcf_staff', 'workplaces', 'contacts']:
+        assert name in names, f'Check failed: stage {name} is not in the profile.'
+    assert all(stage.wall >= 0 and stage.cpu >= 0 for stage in profile.stages), 'Check failed: negative stage times.'
+    assert profile['households'].counts['n_households'] == len(pop.households), 'Check failed: household count does not match.'
+    assert profile['uids'].counts['n_people'] == pop.n, 'Check failed: people count does not match.'
+    assert ('traced_peak' in profile['contacts']) == trace_memory, 'Check failed: tracemalloc measures do not match trace_memory.'
+    assert profile.total.wall == pytest.approx(sum(stage.wall for stage in profile.stages)), 'Check failed: total wall time does not match.'
+
+    filename = str(tmp_path / 'profile.json')
+    profile.to_json(filename)
+    data = sc.loadjson(filename)
+    assert data['meta']['n'] == pop.n, 'Check failed: metadata not saved.'
+    assert [stage['name'] for stage in data['stages']] == names, 'Check failed: stages not saved.'
+    assert len(profile.to_df()) == len(names), 'Check failed: dataframe does not have a row per stage.'
+    print('Check passed.')
+
+
+def test_profile_errors():
+    sp.logger.info("Test that laps are only recorded once the profile has started.")
+    profile = sp.Profile()
+    with pytest.raises(RuntimeError):
+        profile.lap('stage')
+    with pytest.raises(KeyError):
+        profile['stage']
+
+
+if __name__ == '__main__':
+
+    test_pop_profile(trace_memory=False, tmp_path=sc.path('.'))
+    test_profile_errors()
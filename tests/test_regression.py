@@ -63,9 +63,8 @@ def get_pop_contact_matrix(pop, layer, method):
         array: contact matrix
     """
     age_brackets = spdd.get_census_age_brackets(**pop.loc_pars)
-    matrix = sp.calculate_contact_matrix(pop.popdict, method, layer)
     ageindex = spb.get_age_by_brackets(age_brackets)
-    agg_matrix = spb.get_aggregate_matrix(matrix, ageindex)
+    agg_matrix = sp.calculate_contact_matrices(pop.popdict, layer, method, age_by_brackets=ageindex)[layer][method]
     return agg_matrix
 
 
@@ -0,0 +1,57 @@
+"""
+Test generating stochastic replicates of a population with shared inputs.
+"""
+
+import pytest
+import numpy as np
+import synthpops as sp
+
+
+# parameters to generate the test replicates
+pars = dict(
+    n                       = 3e3,
+    with_facilities         = 1,
+    with_non_teaching_staff = 1,
+)
+
+
+def test_make_populations():
+    sp.logger.info("Test that replicates differ from each other and are reproducible from their seeds.")
+    sp.clear_location_cache()
+    pops = sp.make_populations(3, rand_seed=1, **pars)
+    assert len(pops) == 3, 'Check failed: wrong number of replicates.'
+    assert len(sp.data_distributions._inputs_cache) == 1, 'Check failed: the inputs were not loaded once and cached.'
+    assert len({pop.rand_seed for pop in pops}) == 3, 'Check failed: replicates share a seed.'
+    assert not np.array_equal(pops[0].age_by_uid, pops[1].age_by_uid), 'Check failed: replicates are identical.'
+
+    again = sp.make_populations(seeds=[pop.rand_seed for pop in pops[:2]], n_workers=2, **pars)
+    for pop1, pop2 in zip(pops, again):
+        assert np.array_equal(pop1.age_by_uid, pop2.age_by_uid), 'Check failed: replicate ages not reproducible.'
+        assert pop1.to_dict()[0] == pop2.to_dict()[0], 'Check failed: replicate contacts not reproducible.'
+
+    single = sp.Pop(**pars, rand_seed=pops[2].rand_seed)
+    assert np.array_equal(single.age_by_uid, pops[2].age_by_uid), 'Check failed: a replicate differs from sp.Pop with its seed.'
+
+    with pytest.raises(ValueError):
+        sp.make_populations(**pars)
+    with pytest.raises(ValueError):
+        sp.make_populations(2, seeds=[1, 2, 3], **pars)
+    print('Check passed. Replicates are independent and reproducible.')
+
+
+def test_save_replicates(tmp_path):
+    sp.logger.info("Test that replicates are saved as they finish.")
+    filename = str(tmp_path / 'pop_{i}_{seed}.pop')
+    paths = sp.make_populations(seeds=[4, 5], filename=filename, **pars)
+    assert paths == [filename.format(i=0, seed=4), filename.format(i=1, seed=5)], 'Check failed: replicates not saved to the expected paths.'
+    pop = sp.Pop.load(paths[1])
+    assert pop.rand_seed == 5 and pop.n == pars['n'], 'Check failed: saved replicate does not match.'
+
+    with pytest.raises(ValueError):
+        sp.make_populations(seeds=[4, 5], filename=str(tmp_path / 'pop.pop'), **pars)
+    print('Check passed. Replicates are saved.')
+
+
+if __name__ == '__main__':
+
+    test_make_populations()
@@ -92,5 +92,21 @@ def test_age_and_class_cluster_params(average_class_size, caplog):
                                                            f' which is larger than {average_class_size} but result is {actual_class_size}'
 
 
+def test_parallel_school_edges():
+    sp.logger.info("Test that school and workplace contacts generated across worker processes do not depend on the number of workers.")
+    test_pars = sc.dcp(pars)
+    test_pars['school_mixing_type'] = {'pk': 'age_and_class_clustered', 'es': 'age_and_class_clustered', 'ms': 'age_clustered', 'hs': 'random', 'uv': 'random'}
+    pop_1 = sp.Pop(**test_pars, n_workers=1)
+    pop_2 = sp.Pop(**test_pars, n_workers=2)
+
+    for i in range(pop_1.n):
+        person_1, person_2 = pop_1.popdict[i], pop_2.popdict[i]
+        for layer in pop_1.layers:
+            assert sorted(person_1['contacts'][layer]) == sorted(person_2['contacts'][layer]), f'Check failed: {layer} contacts for person {i} depend on the number of workers.'
+        for key in ['scid', 'sc_type', 'sc_mixing_type', 'wpid']:
+            assert person_1[key] == person_2[key], f'Check failed: {key} for person {i} depends on the number of workers.'
+    print('Check passed.')
+
+
 if __name__ == '__main__':
     pytest.main(['-vs', __file__])
@@ -0,0 +1,85 @@
+"""
+Test generating a population as independent shards stitched together.
+"""
+
+import pytest
+import numpy as np
+import sciris as sc
+import synthpops as sp
+
+
+# parameters to generate a test population
+pars = sc.objdict(
+    n                       = 8e3,
+    rand_seed               = 123,
+
+    with_facilities         = 1,
+    with_non_teaching_staff = 1,
+    with_school_types       = 1,
+    school_mixing_type      = {'pk': 'age_and_class_clustered', 'es': 'age_and_class_clustered', 'ms': 'age_clustered', 'hs': 'random', 'uv': 'random'},
+)
+
+
+def test_split_population():
+    sp.logger.info("Test splitting a population into shards with their own seeds.")
+    sizes = sp.split_population(10, 3)
+    assert sizes == [4, 3, 3], 'Check failed: shard sizes are not as equal as possible.'
+    with pytest.raises(ValueError):
+        sp.split_population(10, 0)
+
+    shard_pars = sp.get_shard_pars([dict(n=6, location='a'), dict(n=4, rand_seed=5)], rand_seed=1)
+    assert shard_pars[0]['location'] == 'a' and shard_pars[1]['rand_seed'] == 5, 'Check failed: shard parameters not kept.'
+    assert sp.get_shard_seeds(1, 3) == sp.get_shard_seeds(1, 3), 'Check failed: shard seeds are not reproducible.'
+    assert len(set(sp.get_shard_seeds(1, 3))) == 3, 'Check failed: shards share a seed.'
+    with pytest.raises(ValueError):
+        sp.get_shard_pars([dict(location='a')])
+
+
+@pytest.mark.parametrize("use_arrays", [False, True])
+def test_sharded_pop(use_arrays):
+    sp.logger.info("Test that the shards of a population are stitched together with disjoint uids and re-based group ids.")
+    n_shards = 3
+    pop = sp.Pop(**pars, shards=n_shards, use_arrays=use_arrays)
+    arrays = pop.arrays if use_arrays else sp.PopulationArrays.from_popdict(pop.popdict)
+    assert len(pop.popdict) == pop.n, 'Check failed: the population does not have n people.'
+
+    # each group's members point back to it
+    member_keys = dict(households='member_uids', schools='student_uids', workplaces='member_uids', ltcfs='resident_uids')
+    for name, key in sp.sharding.shard_group_keys.items():
+        groups = getattr(pop, name)
+        assert len(groups) == getattr(pop, f'n_{name}'), f'Check failed: the number of {name} does not match.'
+        ids = np.repeat(np.arange(len(groups)), groups.sizes(member_keys[name]))
+        members = groups.indices(member_keys[name])
+        assert np.array_equal(arrays[key][members], ids), f'Check failed: {key} of the {name} members do not match.'
+    assert all(pop.age_by_uid[h['reference_uid']] == h['reference_age'] for h in pop.households[:10]), 'Check failed: reference uids not shifted.'
+
+    # contacts stay within the uid range of each shard
+    bounds = np.cumsum([0] + sp.split_population(pop.n, n_shards))
+    shard_of = np.searchsorted(bounds, np.arange(pop.n), side='right') - 1
+    for layer in arrays.layer_keys:
+        csr = arrays.contacts[layer]
+        people = np.repeat(np.arange(pop.n), np.diff(csr.indptr))
+        assert np.array_equal(shard_of[people], shard_of[csr.indices]), f'Check failed: {layer} contacts cross shards.'
+
+    assert pop.profile['shards'].counts['n_shards'] == n_shards, 'Check failed: shards not recorded in the profile.'
+    assert pop.summary['mean_age'] == pytest.approx(pop.age_by_uid.mean()), 'Check failed: summary does not match the stitched population.'
+    print('Check passed. The shards are stitched together.')
+
+
+def test_sharded_pop_reproducible():
+    sp.logger.info("Test that a sharded population is reproducible and independent of the number of workers.")
+    pop1 = sp.Pop(n=5e3, rand_seed=1, shards=[dict(n=3000), dict(n=2000)], use_arrays=True)
+    pop2 = sp.Pop(n=5e3, rand_seed=1, shards=[dict(n=3000), dict(n=2000)], use_arrays=True, n_workers=2)
+    assert pop1.n == 5000, 'Check failed: n is not the sum of the shard sizes.'
+    for key in ['age', 'hhid', 'scid', 'wpid']:
+        assert np.array_equal(pop1.arrays[key], pop2.arrays[key]), f'Check failed: {key} differs between runs.'
+    for layer in pop1.arrays.layer_keys:
+        assert np.array_equal(pop1.arrays.contacts[layer].indices, pop2.arrays.contacts[layer].indices), f'Check failed: {layer} contacts differ between runs.'
+    print('Check passed. Sharded populations are reproducible.')
+
+
+if __name__ == '__main__':
+
+    test_split_population()
+    test_sharded_pop(use_arrays=True)
+    test_sharded_pop_reproducible()
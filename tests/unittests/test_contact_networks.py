@@ -4,6 +4,7 @@ Test generation of a synthetic population with microstructure, reading from file
 import sciris as sc
 import synthpops as sp
 from synthpops import contact_networks as cn
+import numpy as np
 import pytest
 
 @pytest.fixture
@@ -35,6 +36,108 @@ def test_get_contact_counts_by_layer(layer, create_simple_pop):
                   "LTCF": "ltcf_res"}
     assert len(contact.get(layer_map[layer])) > 0
 
+
+def test_get_contact_counts_by_role(create_simple_pop):
+    popdict = create_simple_pop.popdict
+    contact, contact_by_id = cn.get_contact_counts_by_layer(popdict, 'S', with_layer_ids=True)
+    teachers = [uid for uid, person in popdict.items() if person['sc_teacher']]
+    expected = [len([c for c in popdict[uid]['contacts']['S'] if popdict[c]['sc_student']]) for uid in teachers]
+    assert contact['sc_teacher']['sc_student'] == expected, 'Check failed: teacher to student contact counts do not match.'
+    expected = [len([c for c in popdict[uid]['contacts']['S'] if popdict[c]['sc_teacher'] or popdict[c]['sc_staff']]) for uid in teachers]
+    assert contact['sc_teacher']['all_staff'] == expected, 'Check failed: teacher to staff contact counts do not match.'
+
+    first_scid = next(person['scid'] for person in popdict.values() if person['scid'] is not None)
+    assert list(contact_by_id.keys())[0] == first_scid, 'Check failed: school ids are not in order of first appearance.'
+    assert contact_by_id[first_scid] == [len(p['contacts']['S']) for p in popdict.values() if p['scid'] == first_scid], 'Check failed: contact counts by school do not match.'
+
+def test_get_random_graph_edges():
+    np.random.seed(0)
+    sizes = np.array([0, 1, 3, 4, 30, 500] * 100)
+    average_degree = 5
+    edges = cn.get_random_graph_edges(sizes, average_degree)
+    group = np.repeat(np.arange(len(sizes)), sizes)
+
+    assert edges.shape[1] == 2, 'Check failed: edges are not an (E, 2) array.'
+    assert (edges[:, 0] < edges[:, 1]).all(), 'Check failed: edges include self loops or are not ordered.'
+    assert len(np.unique(edges, axis=0)) == len(edges), 'Check failed: edges include duplicates.'
+    assert (group[edges[:, 0]] == group[edges[:, 1]]).all(), 'Check failed: edges cross groups.'
+
+    # groups no larger than the average degree are complete graphs and larger groups match the expected degree of a G(N, p) graph
+    degree = np.bincount(edges.ravel(), minlength=sizes.sum())
+    for size in [3, 4]:
+        assert (degree[sizes[group] == size] == size - 1).all(), f'Check failed: groups of size {size} are not complete graphs.'
+    for size in [30, 500]:
+        expected = average_degree * (size - 1) / size
+        assert abs(degree[sizes[group] == size].mean() - expected) < 0.2, f'Check failed: the average degree in groups of size {size} does not match the G(N, p) model.'
+
+
+def test_random_graph_edges():
+    edges = cn.random_graph_edges(5, 10)
+    assert sorted(map(tuple, edges.tolist())) == [(i, j) for i in range(5) for j in range(i + 1, 5)], 'Check failed: the graph is not complete when the average degree is at least the number of nodes.'
+
+    edges_1 = cn.random_graph_edges(1000, 10, seed=2)
+    edges_2 = cn.random_graph_edges(1000, 10, seed=2)
+    assert np.array_equal(edges_1, edges_2), 'Check failed: graphs with the same seed are not the same.'
+    assert edges_1.min() >= 0 and edges_1.max() < 1000, 'Check failed: edges are not between nodes 0 to n - 1.'
+
+    G = cn.random_graph_model(list(range(1000)), 10, seed=2)
+    assert G.number_of_nodes() == 1000 and G.number_of_edges() == len(edges_1), 'Check failed: random_graph_model() does not match random_graph_edges().'
+
+    sizes = [4, 0, 50, 7]
+    edges, edge_offsets = cn.get_random_graph_edges(sizes, 5, return_offsets=True)
+    offsets = np.cumsum([0] + sizes)
+    assert len(edge_offsets) == len(sizes) + 1 and edge_offsets[-1] == len(edges), 'Check failed: edge offsets do not cover the edges.'
+    for g in range(len(sizes)):
+        group_edges = edges[edge_offsets[g]:edge_offsets[g + 1]]
+        assert ((group_edges >= offsets[g]) & (group_edges < offsets[g + 1])).all(), f'Check failed: edges of group {g} are not within the group.'
+
+
+def test_get_workplace_edges():
+    workplaces = [[4, 9, 2], [7, 1, 0, 3, 5, 6, 8]]
+    edges = cn.get_workplace_edges(workplaces, 20)
+    assert len(edges) == 3 + 21, 'Check failed: small workplaces are not complete graphs.'
+    assert set(edges[:3].ravel()) == {2, 4, 9}, 'Check failed: edges are not mapped to worker ids.'
+
+    workplaces = [list(range(i * 40, (i + 1) * 40)) for i in range(50)]
+    edges_by_workers = []
+    for n_workers in [1, 2]:
+        sp.set_seed(1)
+        edges_by_workers.append(cn.get_workplace_edges(workplaces, 10, n_workers=n_workers, chunk_size=300))
+    assert np.array_equal(*edges_by_workers), 'Check failed: workplace edges depend on the number of workers.'
+
+
+def test_make_contacts_workplace_layer():
+    age_by_uid = dict.fromkeys(range(60), 40)
+    workplaces = [list(range(0, 30)), list(range(30, 55))]
+    kwargs = dict(age_by_uid=age_by_uid, homes_by_uids=[[uid] for uid in range(60)], students_by_uid_lists=[], teachers_by_uid_lists=[],
+                  workplace_by_uid_lists=workplaces, facilities_by_uid_lists=None, max_contacts={'W': 4})
+    sp.set_seed(2)
+    popdict = cn.make_contacts(sc.objdict(), **kwargs)
+    sp.set_seed(2)
+    arrays = cn.make_contacts(sc.objdict(), **kwargs, use_arrays=True)
+    assert isinstance(arrays, sp.PopulationArrays), 'Check failed: use_arrays did not return a PopulationArrays object.'
+    for uid in range(60):
+        assert sorted(popdict[uid]['contacts']['W']) == list(arrays.get_contacts(uid, 'W')), f'Check failed: workplace contacts of {uid} differ between the paths.'
+    assert arrays.degree('W')[55:].sum() == 0 and arrays.degree('W')[:55].mean() > 2, 'Check failed: workplace contacts not generated for the workers.'
+    assert list(arrays.wpid) == [0] * 30 + [1] * 25 + [-1] * 5, 'Check failed: workplace ids are not correct.'
+
+
+def test_get_reduced_contact_edges():
+    sp.set_seed(0)
+    for n_1, n_2 in [(60, 12), (80, 1), (6, 4)]:
+        edges = cn.get_reduced_contact_edges(n_1, n_2, average_degree=10)
+        assert np.all(edges[:, 0] < edges[:, 1]), 'Check failed: edges are not ordered or have self loops.'
+        assert len(np.unique(edges, axis=0)) == len(edges), 'Check failed: duplicate edges.'
+        cross = edges[(edges[:, 0] < n_1) & (edges[:, 1] >= n_1)]
+        assert set(cross[:, 0]) == set(range(n_1)), 'Check failed: some members of group 1 have no contact in group 2.'
+    assert len(edges) == 10 * 9 // 2, 'Check failed: small groups are not complete graphs.'
+
+    popdict = {uid: {'contacts': {}} for uid in range(100)}
+    popdict = sp.create_reduced_contacts_with_group_types(popdict, list(range(50, 90)), list(range(90, 100)), 'LTCF', average_degree=10)
+    assert 'LTCF' not in popdict[0]['contacts'], 'Check failed: people outside the groups were modified.'
+    assert all(len(popdict[uid]['contacts']['LTCF'] & set(range(90, 100))) for uid in range(50, 90)), 'Check failed: residents without staff contacts.'
+
+
 if __name__ == '__main__':
 
     datadir = sp.datadir
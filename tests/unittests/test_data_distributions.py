@@ -1,5 +1,6 @@
 import os
 import pytest
+import numpy as np
 import synthpops as sp
 from synthpops import data_distributions as spdd
 
@@ -84,6 +85,31 @@ def test_get_contact_matrix():
     assert len(data_matrix) == 16
 
 
+def test_contact_matrix_store(tmp_path):
+    sheet_name = 'Zambia'
+    sp.clear_contact_matrix_cache()
+    for setting_code in ['H', 'S', 'W', 'C']:
+        data_matrix = spdd.get_contact_matrix(datadir, setting_code, sheet_name=sheet_name)
+        assert (data_matrix == spdd.read_contact_matrices(datadir, setting_code)[sheet_name]).all(), \
+            f"Compiled {setting_code} matrix does not match the MUestimates data, rerun sp.compile_contact_matrices()."
+
+    # repeated calls use the cache and return copies that can be changed safely
+    data_matrix = spdd.get_contact_matrix(datadir, 'H', sheet_name=sheet_name)
+    assert (datadir, sheet_name, 'H') in spdd._contact_matrix_cache
+    data_matrix *= 0
+    assert spdd.get_contact_matrix(datadir, 'H', sheet_name=sheet_name).sum() > 0
+
+    filename = sp.compile_contact_matrices(datadir, filename=str(tmp_path / 'store.npz'))
+    with np.load(filename) as store:
+        assert len(store.files) == 4 * len(spdd.read_contact_matrices(datadir, 'H'))
+    assert len(spdd._contact_matrix_cache) == 0, "Compiling the store did not clear the cache."
+
+    with pytest.raises(KeyError):
+        spdd.get_contact_matrix(datadir, 'H', sheet_name='not a country')
+    with pytest.raises(NotImplementedError):
+        spdd.get_contact_matrix(datadir, 'X', sheet_name=sheet_name)
+
+
 if __name__ == '__main__':
     # We currently have files for both Senegal and USA for this data
     # test_get_gender_fraction_by_age_path()
@@ -177,6 +177,25 @@ def test_populate_parent_exception():
         assert "Invalid type" in str(err)
 
 
+def test_location_cache():
+    """
+    Test that repeated loads of the same location return the cached object and
+    that clearing the cache forces a reload from disk.
+    """
+    specific_location = "Dakar"
+    state_location = "Dakar"
+    country_location = "Senegal"
+    sp.clear_location_cache()
+    location_data = sp.load_location(specific_location, state_location, country_location, revert_to_default=False)
+    assert sp.load_location(specific_location, state_location, country_location) is location_data, \
+        "Repeated load of the same location did not use the cache."
+
+    sp.clear_location_cache()
+    reloaded_data = sp.load_location(specific_location, state_location, country_location)
+    assert reloaded_data is not location_data, "Clearing the cache did not force a reload."
+    assert reloaded_data.location_name == location_data.location_name
+
+
 if __name__ == "__main__":
     testcase = 'test_location_data'
     pytest.main(['-v', '-k', testcase])
@@ -7,6 +7,8 @@ import synthpops as sp
 import numpy as np
 import pytest
 import scipy
+import itertools
+import bisect
 
 
 def test_fast_choice(do_plot=False, sigma=5):
@@ -137,6 +139,136 @@ def test_statistic_test():
         sp.statistic_test(expected, actual_bad, test)  # should fail
 
 
+def test_draw_pool():
+    sc.heading('Testing DrawPool...')
+
+    pool = sp.DrawPool([5, 3, 8, 1])
+    assert len(pool) == 4 and pool[0] == 5
+
+    pool.remove(8)
+    assert pool.draw() == 5
+    assert pool == [3, 1]
+    assert 8 not in pool and 3 in pool
+
+    pool.append(7)
+    assert [pool.draw() for i in range(len(pool))] == [3, 1, 7]
+    with pytest.raises(IndexError):
+        pool.draw()
+    with pytest.raises(ValueError):
+        pool.remove(5)
+
+    # removing many ids from a large pool keeps the order of the rest
+    n = 1000
+    pool = sp.DrawPool(range(n))
+    for uid in range(0, n, 2):
+        pool.remove(uid)
+    assert pool.tolist() == list(range(1, n, 2))
+
+    uids_by_age = sp.make_draw_pools({20: [1, 2], 21: []})
+    assert all(isinstance(v, sp.DrawPool) for v in uids_by_age.values())
+    assert uids_by_age[20].draw() == 1
+
+    return pool
+
+
+def test_count_sampler(sigma=5):
+    sc.heading('Testing CountSampler...')
+
+    counts = {a: c for a, c in enumerate([0, 3, 1, 0, 6, 2])}
+    sampler = sp.CountSampler(counts)
+    assert sampler.total == 12
+    assert sampler.range_total(1, 2) == 4
+
+    # draws match fast_choice on the same random numbers
+    for u in np.linspace(0, 0.999, 50):
+        assert sampler.draw(u) == bisect_choice(list(counts.values()), u)
+        assert sampler.draw_range(2, 4, u) == 2 + bisect_choice([counts[a] for a in range(2, 5)], u)
+
+    # updates are written through to the counts
+    sampler.decrement(4, 2)
+    sampler.set(1, 0)
+    assert counts[4] == 4 and counts[1] == 0
+    assert sampler.total == 7 and sampler.range_total(0, 1) == 0
+
+    # draws follow the counts
+    n = 10000
+    samples = np.array([sampler.draw() for i in range(n)])
+    assert not np.isin(samples, [0, 1, 3]).any()
+    assert np.isclose(np.mean(samples == 4), 4 / 7, atol=sigma / np.sqrt(n))
+
+    with pytest.raises(ValueError):
+        sampler.draw_range(10, 20)
+
+    return sampler
+
+
+def test_sample_from_cdfs():
+    sc.heading('Testing sample_from_cdfs()...')
+    weights = [np.array([1, 2, 4, 2, 1]), np.array([0, 3]), np.array([0, 0, 0]), np.array([5])]
+    cdfs = sp.get_cdfs(weights)
+    u = np.random.random(1000)
+    rows = np.random.randint(len(weights), size=len(u))
+    samples = sp.sample_from_cdfs(cdfs, rows, u)
+    expected = [bisect_choice(weights[r], ui) for r, ui in zip(rows, u)]
+    assert np.array_equal(samples, expected), 'Check failed: sample_from_cdfs() does not match fast_choice().'
+    print('Check passed.')
+
+
+def test_resample_age_batch(n=20000):
+    sc.heading('Testing resample_age_batch()...')
+    np.random.seed(0)
+    age_dist_vals = np.ones(101)
+    min_vals, max_vals = sp.get_resample_age_ranges()
+    for age in [0, 1, 2, 50, 99, 100]:
+        resampled = sp.resample_age_batch(age_dist_vals, np.full(200, age))
+        assert resampled.min() >= min_vals[age] and resampled.max() <= max_vals[age], f'Check failed: age {age} was resampled outside of [{min_vals[age]}, {max_vals[age]}].'
+
+        single = [sp.resample_age(age_dist_vals, age) for i in range(200)]
+        assert set(resampled) == set(single), f'Check failed: resample_age_batch() and resample_age() sample from different ranges for age {age}.'
+
+    # compare the distribution of resampled ages to the exact distribution
+    age_dist_vals = np.arange(101, 0, -1, dtype=float)
+    ages = np.random.randint(101, size=n)
+    resampled = sp.resample_age_batch(age_dist_vals, ages)
+    expected = np.zeros(101)
+    for age, count in enumerate(np.bincount(ages, minlength=101)):
+        weights = age_dist_vals[min_vals[age]:max_vals[age] + 1]
+        expected[min_vals[age]:max_vals[age] + 1] += count * weights / weights.sum()
+    actual = np.bincount(resampled, minlength=101)
+    sp.statistic_test(expected, actual, test=scipy.stats.chisquare, verbose=True, die=True)
+    print('Check passed.')
+
+
+def test_stage_rngs():
+    sc.heading('Testing independent random number streams for generation stages...')
+    seed_sequence, rngs = sp.get_stage_rngs(1)
+    assert list(rngs.keys()) == sp.rng_stages, 'Check failed: not all stages have a random number generator.'
+    draws = [rng.random() for rng in rngs.values()]
+    assert len(set(draws)) == len(draws), 'Check failed: stage streams are not independent.'
+
+    # a stage draws the same numbers regardless of what was drawn from the global streams before it
+    age_distr = np.ones(101) / 101
+    counts = []
+    for i in range(2):
+        seed_sequence, rngs = sp.get_stage_rngs(1)
+        np.random.random(i * 10)
+        counts.append(sp.generate_age_count_multinomial(1000, age_distr, rng=rngs.households))
+    assert counts[0] == counts[1], 'Check failed: the stage output depends on the global random number streams.'
+
+    # and draws from its own generator without touching the global streams
+    state = np.random.get_state()[1].copy()
+    sizes = sp.generate_household_sizes([0, 5, 3, 2], rng=rngs.households)
+    assert np.array_equal(np.random.get_state()[1], state), 'Check failed: the stage reseeded or drew from the global random number streams.'
+    assert sorted(sizes) == [2] * 5 + [3] * 3 + [4] * 2, 'Check failed: wrong household sizes.'
+    print('Check passed.')
+
+
+def bisect_choice(weights, u):
+    """ Reference for fast_choice() with a fixed random number """
+    cum_weights = list(itertools.accumulate(weights))
+    return bisect.bisect(cum_weights, u * cum_weights[-1], 0, len(cum_weights) - 1)
+
+
 if __name__ == '__main__':
 
     T = sc.tic()
@@ -147,6 +279,11 @@ if __name__ == '__main__':
     test_check_dist_binom()
     test_other_distributions()
     test_statistic_test()
+    test_draw_pool()
+    test_count_sampler()
+    test_sample_from_cdfs()
+    test_resample_age_batch()
+    test_stage_rngs()
 
     sc.toc(T)
     print('Done.')